@@ -0,0 +1 @@
+"""Benchmarks de las páginas sobre bibliotecas sintéticas (ver ``python -m benchmarks --help``)."""
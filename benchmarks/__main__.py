@@ -0,0 +1,5 @@
+import sys
+
+from benchmarks.medicion import main
+
+sys.exit(main())
@@ -0,0 +1,144 @@
+"""Perfil de importaciones de cada página (arranque en frío).
+
+Uso::
+
+    python -m benchmarks arranque [--paginas main.py ...] [--repeticiones 3] [--verificar]
+
+Cada página se corre con ``AppTest`` en un proceso nuevo con
+``python -X importtime``: Streamlit y ``AppTest`` se importan antes de correr
+la página, así que lo que se mide es lo que la página agrega al arranque.
+Se reporta el total, el desglose por paquete (según quién lo importó primero)
+y cuánto costó cada dependencia pesada que llegó a cargarse.
+
+Con ``--verificar`` se comprueban los presupuestos de ``PRESUPUESTOS``: la
+puerta de entrada (``main.py`` sin sesión, que redirige al login, y el login)
+no debe cargar ninguna dependencia pesada ni pasarse del tiempo asignado.
+"""
+import json
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+PAGINAS = sorted(
+    ["main.py", *(str(p.relative_to(RAIZ)) for p in (RAIZ / "pages").glob("*.py"))],
+    key=lambda p: (p != "main.py", p),
+)
+# Solo se justifican en las ramas que dibujan tablas o gráficos (o al crear el cliente)
+PESADAS = ("pandas", "plotly", "pyarrow", "PIL", "supabase")
+# Milisegundos de importaciones sin sesión (la puerta de entrada de la app)
+PRESUPUESTOS = {"main.py": 150, "pages/0_login.py": 100}
+LIBROS = 200
+MARCA = "--- nbooks: inicio de la página ---"
+
+#================== PROCESO HIJO =========================
+
+def _correr_pagina(pagina: str, ruta_tablas: str, con_sesion: bool) -> None:
+    """Corre la página en este proceso; las importaciones previas a MARCA no cuentan."""
+    import logging
+
+    from streamlit.testing.v1 import AppTest
+
+    from benchmarks.cliente_falso import ClienteFalso
+
+    for nombre in [n for n in logging.root.manager.loggerDict if n.startswith("streamlit")]:
+        logging.getLogger(nombre).setLevel(logging.ERROR)
+    tablas = json.loads(Path(ruta_tablas).read_text(encoding="utf-8"))
+    app = AppTest.from_file(str(RAIZ / pagina), default_timeout=120)
+    app.secrets["supabase"] = {"url": "https://falso.supabase.co", "key": "falsa"}
+    if con_sesion:
+        app.session_state["user"] = {"benchmark": True}
+    print(MARCA, file=sys.stderr, flush=True)
+
+    import supabase_client
+
+    def crear_cliente(url, key):
+        import supabase  # lo mismo que pagaría el cliente real
+
+        return ClienteFalso(tablas)
+
+    supabase_client.create_client = crear_cliente
+    app.run()
+    print(json.dumps([e.message for e in app.exception], ensure_ascii=False))
+
+#================== MEDICIÓN =========================
+
+def _leer_importtime(salida: str) -> list:
+    """Entradas ``(nivel, modulo, acumulado_ms)`` posteriores a MARCA."""
+    _, _, despues = salida.partition(MARCA)
+    entradas = []
+    for linea in despues.splitlines():
+        if not linea.startswith("import time:") or "imported package" in linea:
+            continue
+        _, acumulado, nombre = linea[len("import time:"):].split("|")
+        sangria = len(nombre) - len(nombre.lstrip()) - 1
+        entradas.append((sangria // 2, nombre.strip(), int(acumulado) / 1000))
+    return entradas
+
+def perfil_pagina(pagina: str, ruta_tablas: str, con_sesion: bool = True) -> dict:
+    """Importaciones de una corrida de la página en un proceso nuevo."""
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "benchmarks.arranque", "_pagina",
+         pagina, ruta_tablas, "1" if con_sesion else ""],
+        cwd=RAIZ, capture_output=True, text=True,
+    )
+    if MARCA not in proceso.stderr:
+        raise RuntimeError(f"{pagina}: el proceso falló\n{proceso.stderr[-2000:]}")
+    entradas = _leer_importtime(proceso.stderr)
+    por_paquete = defaultdict(float)
+    for nivel, modulo, ms in entradas:
+        if nivel == 0:
+            por_paquete[modulo.split(".")[0]] += ms
+    pesadas = {}
+    for _, modulo, ms in entradas:
+        # La primera vez que aparece el paquete raíz es la que carga todo lo demás
+        if modulo in PESADAS and modulo not in pesadas:
+            pesadas[modulo] = round(ms, 1)
+    return {
+        "pagina": pagina,
+        "con_sesion": con_sesion,
+        "total_ms": round(sum(por_paquete.values()), 1),
+        "por_paquete": {p: round(ms, 1) for p, ms in sorted(por_paquete.items(), key=lambda x: -x[1])},
+        "pesadas": pesadas,
+        "errores": json.loads(proceso.stdout.strip().splitlines()[-1]) if proceso.stdout.strip() else [],
+    }
+
+def perfilar(paginas: list, repeticiones: int = 1, con_sesion: bool = True) -> list:
+    """Perfil de cada página; con varias repeticiones se queda con la más rápida."""
+    from benchmarks.generador import generar_biblioteca
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta_tablas = Path(carpeta) / "tablas.json"
+        ruta_tablas.write_text(json.dumps(generar_biblioteca(LIBROS)), encoding="utf-8")
+        return [
+            min((perfil_pagina(p, str(ruta_tablas), con_sesion) for _ in range(repeticiones)),
+                key=lambda r: r["total_ms"])
+            for p in paginas
+        ]
+
+def verificar(repeticiones: int = 3) -> list:
+    """Problemas de la puerta de entrada: dependencias pesadas o presupuestos excedidos."""
+    problemas = []
+    for perfil in perfilar(list(PRESUPUESTOS), repeticiones, con_sesion=False):
+        pagina = perfil["pagina"]
+        if perfil["pesadas"]:
+            problemas.append(f"{pagina} importa {', '.join(perfil['pesadas'])} sin sesión")
+        if perfil["total_ms"] > PRESUPUESTOS[pagina]:
+            problemas.append(f"{pagina}: {perfil['total_ms']} ms de importaciones (presupuesto {PRESUPUESTOS[pagina]} ms)")
+        problemas += [f"{pagina}: {error}" for error in perfil["errores"]]
+    return problemas
+
+def imprimir(perfil: dict, detalle: int = 6) -> None:
+    sesion = "con sesión" if perfil["con_sesion"] else "sin sesión"
+    print(f"{perfil['pagina']:<28} {sesion:<10} {perfil['total_ms']:>8.1f} ms", file=sys.stderr)
+    for paquete, ms in list(perfil["por_paquete"].items())[:detalle]:
+        print(f"    {paquete:<24} {ms:>8.1f} ms", file=sys.stderr)
+    if perfil["pesadas"]:
+        print("    pesadas: " + ", ".join(f"{p} {ms} ms" for p, ms in perfil["pesadas"].items()), file=sys.stderr)
+    for error in perfil["errores"]:
+        print(f"    ERROR: {error}", file=sys.stderr)
+
+if __name__ == "__main__" and sys.argv[1:2] == ["_pagina"]:
+    _correr_pagina(sys.argv[2], sys.argv[3], bool(sys.argv[4]))
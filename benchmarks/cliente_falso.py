@@ -0,0 +1,512 @@
+"""Cliente de Supabase falso, en memoria, que registra cada llamada.
+
+Implementa lo que la app usa de supabase-py: ``table()`` con los filtros de
+PostgREST, ``rpc("registrar_libro")``, ``rpc("buscar_libros")``, ``storage`` y ``auth``. Las vistas de
+sql/ (``vista_libros``, ``vista_libros_busqueda``, ``vista_autores`` y
+``vista_estadisticas``) se calculan en memoria y se guardan hasta la
+siguiente escritura. Cada operación agrega una ``Llamada`` a
+``cliente.llamadas``.
+"""
+import datetime
+import json
+import re
+import time
+from collections import Counter, defaultdict
+from typing import NamedTuple
+
+from indice_busqueda import normalizar
+
+class Llamada(NamedTuple):
+    tabla: str
+    operacion: str
+    filas: int
+    segundos: float
+
+class Respuesta:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+#================== COMPARACIONES =========================
+
+def _comparar(valor, referencia) -> int:
+    """-1, 0 o 1 comparando como números si ambos lo son y si no como texto."""
+    if not (isinstance(valor, (int, float)) and isinstance(referencia, (int, float))):
+        valor, referencia = str(valor), str(referencia)
+    return (valor > referencia) - (valor < referencia)
+
+def _patron_like(patron: str, sin_mayusculas: bool) -> re.Pattern:
+    partes = re.split(r"(\\.|%|_)", patron)
+    traducido = "".join(
+        ".*" if p == "%" else "." if p == "_" else re.escape(p[1:] if p.startswith("\\") else p)
+        for p in partes
+    )
+    return re.compile(f"^{traducido}$", re.S | (re.I if sin_mayusculas else 0))
+
+def _literal(texto: str):
+    if texto.startswith('"') and texto.endswith('"'):
+        return texto[1:-1]
+    return None if texto == "null" else texto
+
+_OPERADORES = {
+    "eq": lambda v, r: v is not None and _comparar(v, r) == 0,
+    "neq": lambda v, r: v is not None and _comparar(v, r) != 0,
+    "gt": lambda v, r: v is not None and _comparar(v, r) > 0,
+    "gte": lambda v, r: v is not None and _comparar(v, r) >= 0,
+    "lt": lambda v, r: v is not None and _comparar(v, r) < 0,
+    "lte": lambda v, r: v is not None and _comparar(v, r) <= 0,
+    "is": lambda v, r: v is None if r is None else v is r,
+}
+
+def _partir(texto: str) -> list:
+    """Parte ``a,and(b,c),d`` por las comas de primer nivel."""
+    partes, nivel, actual = [], 0, ""
+    for caracter in texto:
+        if caracter == "," and nivel == 0:
+            partes.append(actual)
+            actual = ""
+            continue
+        nivel += {"(": 1, ")": -1}.get(caracter, 0)
+        actual += caracter
+    return partes + [actual] if actual else partes
+
+def _condicion_or(texto: str) -> callable:
+    """Traduce la sintaxis de ``or_`` de PostgREST (``col.op.valor`` y ``and(...)``)."""
+    texto = texto.strip()
+    for grupo, combinar in (("and(", all), ("or(", any)):
+        if texto.startswith(grupo):
+            condiciones = [_condicion_or(p) for p in _partir(texto[len(grupo):-1])]
+            return lambda fila: combinar(c(fila) for c in condiciones)
+    columna, operador, valor = texto.split(".", 2)
+    referencia = _literal(valor)
+    if operador in ("like", "ilike"):
+        patron = _patron_like(referencia.replace("*", "%"), operador == "ilike")
+        return lambda fila: bool(patron.match(str(fila.get(columna) or "")))
+    return lambda fila: _OPERADORES[operador](fila.get(columna), referencia)
+
+# Claves únicas de sql/003 y sql/010: el on_conflict de un upsert tiene que ser una de ellas
+CLAVES_UNICAS = {
+    "autores": {("id",), ("nombre_busqueda",)},
+    "tipos": {("id",), ("nombre_busqueda",)},
+    "libros": {("id",), ("nombre", "autor_id")},
+    "libro_tipos": {("libro_id", "tipo_id")},
+}
+
+#================== CONSULTAS =========================
+
+class Consulta:
+    """Constructor de consultas con la misma interfaz encadenable que postgrest-py."""
+
+    def __init__(self, cliente: "ClienteFalso", tabla: str):
+        self.cliente = cliente
+        self.tabla = tabla
+        self.operacion = "select"
+        self.columnas = "*"
+        self.contar = None
+        self.datos = None
+        self.conflicto = None
+        self.ignorar_duplicados = False
+        self.condiciones = []
+        self.ordenes = []
+        self.desde, self.cantidad = 0, None
+
+    # --- Operación ---
+
+    def select(self, columnas: str = "*", count: str = None, **_):
+        self.columnas, self.contar = columnas, count
+        return self
+
+    def insert(self, datos, **_):
+        self.operacion, self.datos = "insert", datos
+        return self
+
+    def upsert(self, datos, on_conflict: str = "", ignore_duplicates: bool = False, **_):
+        self.operacion, self.datos = "upsert", datos
+        self.conflicto, self.ignorar_duplicados = on_conflict, ignore_duplicates
+        return self
+
+    def update(self, datos, **_):
+        self.operacion, self.datos = "update", datos
+        return self
+
+    def delete(self, **_):
+        self.operacion = "delete"
+        return self
+
+    # --- Filtros ---
+
+    def _filtro(self, columna: str, operador: str, referencia):
+        self.condiciones.append(lambda fila: _OPERADORES[operador](fila.get(columna), referencia))
+        return self
+
+    def eq(self, columna, valor): return self._filtro(columna, "eq", valor)
+    def neq(self, columna, valor): return self._filtro(columna, "neq", valor)
+    def gt(self, columna, valor): return self._filtro(columna, "gt", valor)
+    def gte(self, columna, valor): return self._filtro(columna, "gte", valor)
+    def lt(self, columna, valor): return self._filtro(columna, "lt", valor)
+    def lte(self, columna, valor): return self._filtro(columna, "lte", valor)
+
+    def is_(self, columna, valor):
+        return self._filtro(columna, "is", None if valor in (None, "null") else valor)
+
+    def in_(self, columna, valores):
+        valores = set(valores)
+        self.condiciones.append(lambda fila: fila.get(columna) in valores)
+        return self
+
+    def like(self, columna, patron):
+        regex = _patron_like(patron, False)
+        self.condiciones.append(lambda fila: bool(regex.match(str(fila.get(columna) or ""))))
+        return self
+
+    def ilike(self, columna, patron):
+        regex = _patron_like(patron, True)
+        self.condiciones.append(lambda fila: bool(regex.match(str(fila.get(columna) or ""))))
+        return self
+
+    def contains(self, columna, valor):
+        buscados = json.loads(valor) if isinstance(valor, str) else valor
+
+        def contiene(fila):
+            lista = fila.get(columna) or []
+            return all(
+                any(all(e.get(k) == v for k, v in b.items()) for e in lista) if isinstance(b, dict) else b in lista
+                for b in buscados
+            )
+
+        self.condiciones.append(contiene)
+        return self
+
+    def or_(self, filtros: str):
+        condiciones = [_condicion_or(p) for p in _partir(filtros)]
+        self.condiciones.append(lambda fila: any(c(fila) for c in condiciones))
+        return self
+
+    # --- Orden y ventana ---
+
+    def order(self, columna: str, desc: bool = False, nullsfirst: bool = None):
+        # Como Postgres: los nulls van al final en orden ascendente y al principio en descendente
+        self.ordenes.append((columna, desc, desc if nullsfirst is None else nullsfirst))
+        return self
+
+    def range(self, desde: int, hasta: int):
+        self.desde, self.cantidad = desde, hasta - desde + 1
+        return self
+
+    def limit(self, cantidad: int):
+        self.cantidad = cantidad
+        return self
+
+    # --- Ejecución ---
+
+    def execute(self) -> Respuesta:
+        inicio = time.perf_counter()
+        respuesta = getattr(self, f"_{self.operacion}")()
+        self.cliente.registrar(self.tabla, self.operacion, len(respuesta.data or []), time.perf_counter() - inicio)
+        return respuesta
+
+    def _filtradas(self, filas: list) -> list:
+        return [f for f in filas if all(c(f) for c in self.condiciones)] if self.condiciones else list(filas)
+
+    def _select(self) -> Respuesta:
+        filas = self._filtradas(self.cliente.filas(self.tabla))
+        for columna, desc, nulls_primero in reversed(self.ordenes):
+            con_valor = sorted((f for f in filas if f.get(columna) is not None), key=lambda f: f[columna], reverse=desc)
+            nulos = [f for f in filas if f.get(columna) is None]
+            filas = nulos + con_valor if nulls_primero else con_valor + nulos
+        total = len(filas)
+        fin = None if self.cantidad is None else self.desde + self.cantidad
+        filas = filas[self.desde:fin]
+        if self.columnas.strip() == "*":
+            datos = [dict(f) for f in filas]
+        else:
+            nombres = [c.strip() for c in self.columnas.split(",")]
+            datos = [{c: f.get(c) for c in nombres} for f in filas]
+        return Respuesta(datos, total if self.contar else None)
+
+    def _insert(self) -> Respuesta:
+        filas = self.datos if isinstance(self.datos, list) else [self.datos]
+        return Respuesta([dict(self.cliente.insertar(self.tabla, dict(f))) for f in filas])
+
+    def _upsert(self) -> Respuesta:
+        claves = [c.strip() for c in self.conflicto.split(",")] if self.conflicto else ["id"]
+        if tuple(claves) not in CLAVES_UNICAS.get(self.tabla, {tuple(claves)}):
+            # Como Postgres (42P10) cuando no hay una clave única sobre esas columnas
+            raise RuntimeError(
+                f"there is no unique or exclusion constraint matching the ON CONFLICT specification "
+                f"({self.tabla}: {self.conflicto or 'id'})"
+            )
+        existentes = {tuple(f.get(c) for c in claves): f for f in self.cliente.tablas[self.tabla]}
+        resultado = []
+        for fila in (self.datos if isinstance(self.datos, list) else [self.datos]):
+            existente = existentes.get(tuple(fila.get(c) for c in claves))
+            if existente is None:
+                existente = existentes[tuple(fila.get(c) for c in claves)] = self.cliente.insertar(self.tabla, dict(fila))
+            elif not self.ignorar_duplicados:
+                self.cliente.modificar(self.tabla, existente, fila)
+            resultado.append(dict(existente))
+        return Respuesta(resultado)
+
+    def _update(self) -> Respuesta:
+        filas = self._filtradas(self.cliente.tablas[self.tabla])
+        for fila in filas:
+            self.cliente.modificar(self.tabla, fila, self.datos)
+        return Respuesta([dict(f) for f in filas])
+
+    def _delete(self) -> Respuesta:
+        filas = self._filtradas(self.cliente.tablas[self.tabla])
+        self.cliente.borrar(self.tabla, filas)
+        return Respuesta([dict(f) for f in filas])
+
+#================== STORAGE, AUTH Y RPC =========================
+
+class _Bucket:
+    def __init__(self, cliente: "ClienteFalso", nombre: str):
+        self.cliente, self.nombre = cliente, nombre
+
+    def upload(self, ruta: str, contenido: bytes, opciones: dict = None):
+        self.cliente.archivos[(self.nombre, ruta)] = contenido
+        self.cliente.registrar(f"storage:{self.nombre}", "upload", 1, 0.0)
+
+    def download(self, ruta: str) -> bytes:
+        self.cliente.registrar(f"storage:{self.nombre}", "download", 1, 0.0)
+        return self.cliente.archivos[(self.nombre, ruta)]
+
+    def get_public_url(self, ruta: str) -> str:
+        return f"https://falso.supabase.co/storage/v1/object/public/{self.nombre}/{ruta}"
+
+class _Storage:
+    def __init__(self, cliente: "ClienteFalso"):
+        self.cliente = cliente
+
+    def from_(self, bucket: str) -> _Bucket:
+        return _Bucket(self.cliente, bucket)
+
+class _SesionAuth(NamedTuple):
+    access_token: str
+    refresh_token: str
+    expires_at: int
+
+class _Usuario(NamedTuple):
+    id: str
+    email: str
+
+class _RespuestaAuth(NamedTuple):
+    user: _Usuario
+    session: _SesionAuth
+
+class _Auth:
+    # Mismas formas que supabase-py: respuestas con ``user`` y ``session``
+    def __init__(self, cliente: "ClienteFalso"):
+        self.cliente = cliente
+
+    def _respuesta(self, email: str) -> _RespuestaAuth:
+        return _RespuestaAuth(_Usuario(f"usuario-{email}", email), _SesionAuth("acceso", "renovacion", int(time.time()) + 3600))
+
+    def sign_in_with_password(self, credenciales: dict) -> _RespuestaAuth:
+        self.cliente.registrar("auth", "sign_in", 1, 0.0)
+        return self._respuesta(credenciales.get("email"))
+
+    def sign_up(self, credenciales: dict) -> _RespuestaAuth:
+        self.cliente.registrar("auth", "sign_up", 1, 0.0)
+        return self._respuesta(credenciales.get("email"))
+
+    def set_session(self, access_token: str, refresh_token: str) -> _RespuestaAuth:
+        self.cliente.registrar("auth", "set_session", 1, 0.0)
+        return self._respuesta(None)
+
+    def refresh_session(self) -> _RespuestaAuth:
+        self.cliente.registrar("auth", "refresh_session", 1, 0.0)
+        return self._respuesta(None)
+
+    def sign_out(self, opciones: dict = None) -> None:
+        self.cliente.registrar("auth", "sign_out", 0, 0.0)
+
+class _Rpc:
+    def __init__(self, cliente: "ClienteFalso", funcion: str, parametros: dict):
+        self.cliente, self.funcion, self.parametros = cliente, funcion, parametros
+
+    def execute(self) -> Respuesta:
+        inicio = time.perf_counter()
+        datos = getattr(self.cliente, f"_rpc_{self.funcion}")(**self.parametros)
+        filas = len(datos["libros"]) if isinstance(datos, dict) else len(datos)
+        self.cliente.registrar(f"rpc:{self.funcion}", "rpc", filas, time.perf_counter() - inicio)
+        return Respuesta(datos)
+
+#================== CLIENTE =========================
+
+def _ahora() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+class ClienteFalso:
+    """Reemplazo en memoria del cliente de Supabase sobre ``{tabla: filas}``."""
+
+    def __init__(self, tablas: dict):
+        self.tablas = {tabla: [dict(f) for f in filas] for tabla, filas in tablas.items()}
+        for tabla in ("autores", "tipos", "libros", "libro_tipos", "libros_eliminados"):
+            self.tablas.setdefault(tabla, [])
+        for fila in (*self.tablas["autores"], *self.tablas["tipos"]):
+            fila.setdefault("nombre_busqueda", normalizar(fila["nombre"]))
+        self._siguiente_id = {
+            tabla: max((f.get("id") or 0 for f in filas), default=0) + 1 for tabla, filas in self.tablas.items()
+        }
+        self._vistas = {}
+        self.archivos = {}
+        self.llamadas = []
+        self.storage = _Storage(self)
+        self.auth = _Auth(self)
+
+    def table(self, tabla: str) -> Consulta:
+        return Consulta(self, tabla)
+
+    def from_(self, tabla: str) -> Consulta:
+        return Consulta(self, tabla)
+
+    def rpc(self, funcion: str, parametros: dict) -> _Rpc:
+        return _Rpc(self, funcion, parametros)
+
+    def registrar(self, tabla: str, operacion: str, filas: int, segundos: float) -> None:
+        self.llamadas.append(Llamada(tabla, operacion, filas, segundos))
+
+    # --- Escrituras sobre las tablas base ---
+
+    def insertar(self, tabla: str, fila: dict) -> dict:
+        if tabla != "libro_tipos" and fila.get("id") is None:
+            fila["id"] = self._siguiente_id[tabla]
+            self._siguiente_id[tabla] += 1
+        if tabla == "libros":
+            fila["updated_at"] = _ahora()
+        if tabla in ("autores", "tipos") and not fila.get("nombre_busqueda"):
+            # Como el trigger de sql/010
+            fila["nombre_busqueda"] = normalizar(fila["nombre"])
+        self.tablas[tabla].append(fila)
+        self._tocar(tabla, fila)
+        return fila
+
+    def modificar(self, tabla: str, fila: dict, cambios: dict) -> None:
+        fila.update(cambios)
+        if tabla == "libros":
+            fila["updated_at"] = _ahora()
+        self._tocar(tabla, fila)
+
+    def borrar(self, tabla: str, filas: list) -> None:
+        ids = {id(f) for f in filas}
+        self.tablas[tabla] = [f for f in self.tablas[tabla] if id(f) not in ids]
+        if tabla == "libros":
+            borrados = {f["id"] for f in filas}
+            self.tablas["libro_tipos"] = [v for v in self.tablas["libro_tipos"] if v["libro_id"] not in borrados]
+            # Con el dueño del libro, como el trigger de sql/011
+            self.tablas["libros_eliminados"].extend(
+                {"libro_id": f["id"], "eliminado_en": _ahora(), "user_id": f.get("user_id")} for f in filas
+            )
+        for fila in filas:
+            self._tocar(tabla, fila)
+
+    def _tocar(self, tabla: str, fila: dict) -> None:
+        # Como los triggers de sql/007: un vínculo nuevo o borrado cambia el libro
+        if tabla == "libro_tipos":
+            for libro in self.tablas["libros"]:
+                if libro["id"] == fila["libro_id"]:
+                    libro["updated_at"] = _ahora()
+        self._vistas.clear()
+
+    # --- Lecturas (tablas y vistas) ---
+
+    def filas(self, tabla: str) -> list:
+        if tabla in self.tablas:
+            return self.tablas[tabla]
+        if tabla not in self._vistas:
+            self._vistas[tabla] = getattr(self, f"_vista_{tabla}")()
+        return self._vistas[tabla]
+
+    def _vista_vista_libros(self) -> list:
+        autores = {a["id"]: a["nombre"] for a in self.tablas["autores"]}
+        tipos = {t["id"]: t["nombre"] for t in self.tablas["tipos"]}
+        por_libro = defaultdict(list)
+        for vinculo in self.tablas["libro_tipos"]:
+            por_libro[vinculo["libro_id"]].append(vinculo["tipo_id"])
+        filas = []
+        for libro in self.tablas["libros"]:
+            suyos = sorted((tipos[i], i) for i in por_libro.get(libro["id"], ()))
+            filas.append({
+                **libro,
+                "autor": autores.get(libro.get("autor_id")),
+                "tipos": ", ".join(nombre for nombre, _ in suyos) or None,
+                "tipos_lista": [{"id": i, "nombre": nombre} for nombre, i in suyos],
+            })
+        return filas
+
+    def _vista_vista_libros_busqueda(self) -> list:
+        return [
+            {
+                **libro,
+                "texto_busqueda": normalizar(" ".join(filter(None, (libro["nombre"], libro["autor"], libro["tipos"])))),
+                "autor_busqueda": normalizar(libro["autor"] or ""),
+            }
+            for libro in self.filas("vista_libros")
+        ]
+
+    def _vista_vista_autores(self) -> list:
+        conteos = defaultdict(lambda: {"libros": 0, "leidos": 0, "ultima_lectura": None})
+        for libro in self.tablas["libros"]:
+            conteo = conteos[libro.get("autor_id")]
+            conteo["libros"] += 1
+            conteo["leidos"] += libro.get("estado_lectura") == "Leído"
+            if libro.get("fecha_leido"):
+                conteo["ultima_lectura"] = max(conteo["ultima_lectura"] or "", libro["fecha_leido"])
+        return [
+            {**autor, **conteos[autor["id"]]}
+            for autor in self.tablas["autores"]
+        ]
+
+    def _vista_vista_estadisticas(self) -> list:
+        tipos = {t["id"]: t["nombre"] for t in self.tablas["tipos"]}
+        conteos = Counter()
+        for libro in self.tablas["libros"]:
+            if libro.get("fecha_leido"):
+                conteos[("mes", libro["fecha_leido"][:7])] += 1
+            if libro.get("estado_lectura"):
+                conteos[("estado", libro["estado_lectura"])] += 1
+        for vinculo in self.tablas["libro_tipos"]:
+            conteos[("tipo", tipos[vinculo["tipo_id"]])] += 1
+        return [{"dimension": d, "clave": c, "cantidad": n} for (d, c), n in conteos.items()]
+
+    # --- Funciones (sql/002, sql/008 y sql/009) ---
+
+    def _rpc_buscar_libros(self, p_texto, p_estado=None, p_autor=None, p_tipo=None,
+                           p_desplazamiento=0, p_limite=24) -> dict:
+        # Aproximación en memoria: cada palabra como subcadena (sin tsvector ni
+        # pg_trgm) y el rango con los pesos de sql/008
+        pesos = {"nombre": 1.0, "autor": 0.4, "tipos": 0.2, "descripcion": 0.1}
+        columnas = ("id", "nombre", "autor", "tipos", "tipos_lista", "estado_lectura", "en_kindle", "portada_path")
+        palabras = normalizar(p_texto or "").split()
+        aciertos = []
+        for libro in self.filas("vista_libros"):
+            campos = {c: normalizar(libro.get(c) or "") for c in pesos}
+            if not all(any(p in texto for texto in campos.values()) for p in palabras):
+                continue
+            if p_estado and libro.get("estado_lectura") != p_estado:
+                continue
+            if p_autor and normalizar(p_autor) not in campos["autor"]:
+                continue
+            if p_tipo and p_tipo not in {t["nombre"] for t in libro["tipos_lista"]}:
+                continue
+            rango = sum(peso for p in palabras for c, peso in pesos.items() if p in campos[c])
+            # Solo las columnas de la tarjeta, como sql/009
+            aciertos.append({**{c: libro.get(c) for c in columnas}, "rango": rango})
+        aciertos.sort(key=lambda l: (-l["rango"], l["nombre"] or "", l["id"]))
+        return {"total": len(aciertos), "libros": aciertos[p_desplazamiento:p_desplazamiento + p_limite]}
+
+    def _rpc_registrar_libro(self, p_nombre, p_autor_id, p_portada_path, p_estado_lectura, p_en_kindle, p_tipos) -> list:
+        tipos = {t["nombre"]: t["id"] for t in self.tablas["tipos"]}
+        faltantes = [n for n in p_tipos if n not in tipos]
+        if faltantes:
+            raise RuntimeError(f"Tipos inexistentes: {', '.join(faltantes)}")
+        libro = self.insertar("libros", {
+            "nombre": p_nombre, "autor_id": p_autor_id, "portada_path": p_portada_path,
+            "estado_lectura": p_estado_lectura, "en_kindle": p_en_kindle,
+            "descripcion": None, "fecha_inicio": None, "fecha_leido": None,
+        })
+        for nombre in p_tipos:
+            self.insertar("libro_tipos", {"libro_id": libro["id"], "tipo_id": tipos[nombre]})
+        return [dict(libro)]
@@ -0,0 +1,74 @@
+"""Bibliotecas sintéticas deterministas para los benchmarks.
+
+``generar_biblioteca(n_libros, semilla)`` devuelve siempre las mismas tablas
+(``autores``, ``tipos``, ``libros``, ``libro_tipos`` y ``libros_eliminados``)
+para la misma semilla y fecha de referencia, con proporciones parecidas a una
+biblioteca real: ~1 autor cada 8 libros, 1 a 3 tipos por libro y fechas de
+lectura en los tres años anteriores a la referencia.
+"""
+import datetime
+import random
+
+from importacion import ESTADOS
+
+SEMILLA = 42
+# Fija para que dos corridas en días distintos lean los mismos datos
+REFERENCIA = datetime.date(2025, 12, 31)
+LIBROS_POR_AUTOR = 8
+TIPOS = [
+    "Fantasía", "Romance", "Terror", "Ciencia ficción", "Misterio", "Thriller",
+    "Histórica", "Aventura", "Drama", "Humor", "Poesía", "Ensayo", "Biografía",
+    "Juvenil", "Distopía", "Policial", "Clásico", "Cuento", "Autoayuda", "Filosofía",
+]
+_PESOS_ESTADOS = [45, 30, 8, 12, 5]  # mismo orden que ESTADOS
+_NOMBRES = ["Ana", "José", "María", "Gabriel", "Lucía", "Ñuño", "Sofía", "Andrés", "Élodie", "Tomás"]
+_APELLIDOS = ["García", "Pérez", "Márquez", "López", "Núñez", "Álvarez", "Ortega", "Díaz", "Ibáñez", "Ruiz"]
+_PALABRAS = [
+    "sombra", "viento", "casa", "río", "noche", "ciudad", "memoria", "jardín", "fuego",
+    "silencio", "mar", "camino", "espejo", "invierno", "luz", "bosque", "reino", "última",
+]
+
+def _fecha_hora(fecha: datetime.date) -> str:
+    return datetime.datetime.combine(fecha, datetime.time(12), datetime.timezone.utc).isoformat()
+
+def generar_biblioteca(n_libros: int, semilla: int = SEMILLA, referencia: datetime.date = REFERENCIA) -> dict:
+    """Devuelve ``{tabla: filas}`` con ``n_libros`` libros."""
+    azar = random.Random(semilla)
+
+    autores = []
+    for autor_id in range(1, max(1, n_libros // LIBROS_POR_AUTOR) + 1):
+        nombre = f"{azar.choice(_NOMBRES)} {azar.choice(_APELLIDOS)} {autor_id}"
+        autores.append({"id": autor_id, "nombre": nombre})
+    tipos = [{"id": tipo_id, "nombre": nombre} for tipo_id, nombre in enumerate(TIPOS, start=1)]
+
+    libros, libro_tipos = [], []
+    for libro_id in range(1, n_libros + 1):
+        estado = azar.choices(ESTADOS, _PESOS_ESTADOS)[0]
+        inicio = fin = None
+        if estado in ("Leído", "En proceso", "Abandonado"):
+            inicio = referencia - datetime.timedelta(days=azar.randrange(3 * 365))
+            if estado == "Leído":
+                fin = min(referencia, inicio + datetime.timedelta(days=azar.randrange(1, 60)))
+        titulo = " ".join(azar.choice(_PALABRAS) for _ in range(azar.randint(2, 4))).capitalize()
+        libros.append({
+            "id": libro_id,
+            "nombre": f"{titulo} {libro_id}",
+            "autor_id": azar.randrange(1, len(autores) + 1) if azar.random() > 0.02 else None,
+            "portada_path": None,
+            "estado_lectura": estado,
+            "en_kindle": azar.random() < 0.3,
+            "descripcion": " ".join(azar.choice(_PALABRAS) for _ in range(azar.randint(10, 60))),
+            "fecha_inicio": inicio.isoformat() if inicio else None,
+            "fecha_leido": fin.isoformat() if fin else None,
+            "updated_at": _fecha_hora(fin or inicio or referencia),
+        })
+        for tipo_id in azar.sample(range(1, len(tipos) + 1), azar.randint(1, 3)):
+            libro_tipos.append({"libro_id": libro_id, "tipo_id": tipo_id})
+
+    return {
+        "autores": autores,
+        "tipos": tipos,
+        "libros": libros,
+        "libro_tipos": libro_tipos,
+        "libros_eliminados": [],
+    }
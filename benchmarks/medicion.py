@@ -0,0 +1,227 @@
+"""Mide las páginas de la app con ``AppTest`` sobre bibliotecas sintéticas.
+
+Uso::
+
+    python -m benchmarks correr [--escalas 1000 10000 100000] [--paginas main.py ...]
+                                [--opcion filtros_en_servidor=true ...] [--salida benchmarks/resultados]
+    python -m benchmarks comparar benchmarks/resultados/A.json benchmarks/resultados/B.json
+    python -m benchmarks arranque [--paginas main.py ...] [--sin-sesion] [--verificar]
+
+Por cada escala y página se mide la primera carga (cachés vacías) y un rerun
+(cachés calientes): tiempo, tiempo dentro del backend falso, elementos
+dibujados, llamadas al backend y pico de memoria de la primera carga
+(``tracemalloc``). El resultado se guarda en un JSON con el commit, para
+comparar corridas entre commits. ``arranque`` mide las importaciones de cada
+página (ver benchmarks/arranque.py).
+"""
+import argparse
+import datetime
+import json
+import logging
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.element_tree import Block
+
+import supabase_client
+from benchmarks import arranque
+from benchmarks.cliente_falso import ClienteFalso
+from benchmarks.generador import SEMILLA, generar_biblioteca
+
+RAIZ = Path(__file__).resolve().parent.parent
+ESCALAS = [1000, 10000, 100000]
+PAGINAS = ["main.py", "pages/2_Editar.py", "pages/4_Estadisticas.py"]
+SALIDA = Path("benchmarks/resultados")
+TIEMPO_MAXIMO = 600  # segundos por corrida de una página
+
+#================== MEDICIÓN =========================
+
+def _contar_elementos(nodo) -> int:
+    if isinstance(nodo, Block) or hasattr(nodo, "children"):
+        return sum(_contar_elementos(hijo) for hijo in nodo.children.values())
+    return 1
+
+def _resumen_llamadas(llamadas: list) -> dict:
+    return {
+        "total": len(llamadas),
+        "filas": sum(l.filas for l in llamadas),
+        "segundos_backend": round(sum(l.segundos for l in llamadas), 4),
+        "por_operacion": dict(Counter(f"{l.tabla}.{l.operacion}" for l in llamadas)),
+    }
+
+def _nueva_app(pagina: str, opciones: dict) -> AppTest:
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    app = AppTest.from_file(str(RAIZ / pagina), default_timeout=TIEMPO_MAXIMO)
+    app.secrets["supabase"] = {"url": "https://falso.supabase.co", "key": "falsa"}
+    app.secrets["nbooks"] = dict(opciones)
+    app.session_state["user"] = {"benchmark": True}
+    return app
+
+def _correr(app: AppTest, cliente: ClienteFalso) -> tuple:
+    cliente.llamadas.clear()
+    inicio = time.perf_counter()
+    app.run()
+    return time.perf_counter() - inicio, list(cliente.llamadas)
+
+def medir_pagina(pagina: str, cliente: ClienteFalso, opciones: dict) -> dict:
+    """Mide una página: primera carga, rerun y pico de memoria de la primera carga."""
+    app = _nueva_app(pagina, opciones)
+    segundos_carga, llamadas_carga = _correr(app, cliente)
+    segundos_rerun, llamadas_rerun = _correr(app, cliente)
+    errores = [e.value for e in app.exception]
+
+    # Aparte: tracemalloc hace más lentas las corridas que mide
+    app = _nueva_app(pagina, opciones)
+    tracemalloc.start()
+    try:
+        _correr(app, cliente)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "pagina": pagina,
+        "primera_carga_s": round(segundos_carga, 4),
+        "rerun_s": round(segundos_rerun, 4),
+        "elementos": _contar_elementos(app._tree),
+        "memoria_pico_mb": round(pico / 2**20, 2),
+        "llamadas_primera_carga": _resumen_llamadas(llamadas_carga),
+        "llamadas_rerun": _resumen_llamadas(llamadas_rerun),
+        "errores": errores,
+    }
+
+def correr(escalas: list, paginas: list, opciones: dict, semilla: int = SEMILLA, al_medir: callable = None) -> dict:
+    """Mide cada página en cada escala y devuelve el resultado completo."""
+    cliente_original = supabase_client.create_client
+    resultados = []
+    try:
+        for escala in escalas:
+            cliente = ClienteFalso(generar_biblioteca(escala, semilla))
+            supabase_client.create_client = lambda url, key: cliente
+            for pagina in paginas:
+                medicion = {"escala": escala, **medir_pagina(pagina, cliente, opciones)}
+                resultados.append(medicion)
+                if al_medir:
+                    al_medir(medicion)
+    finally:
+        supabase_client.create_client = cliente_original
+        st.cache_resource.clear()
+
+    return {
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "streamlit": st.__version__,
+        "semilla": semilla,
+        "opciones": opciones,
+        "resultados": resultados,
+    }
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocido"
+
+#================== COMPARAR =========================
+
+METRICAS = ["primera_carga_s", "rerun_s", "elementos", "memoria_pico_mb"]
+
+def comparar(anterior: dict, actual: dict) -> list:
+    """Filas ``(escala, pagina, metrica, antes, despues, variacion)`` de dos resultados."""
+    previas = {(r["escala"], r["pagina"]): r for r in anterior["resultados"]}
+    filas = []
+    for r in actual["resultados"]:
+        previa = previas.get((r["escala"], r["pagina"]))
+        if previa is None:
+            continue
+        valores = [(m, previa[m], r[m]) for m in METRICAS]
+        valores += [
+            (f"llamadas_{fase}", previa[f"llamadas_{fase}"]["total"], r[f"llamadas_{fase}"]["total"])
+            for fase in ("primera_carga", "rerun")
+        ]
+        for metrica, antes, despues in valores:
+            variacion = (despues - antes) / antes if antes else None
+            filas.append((r["escala"], r["pagina"], metrica, antes, despues, variacion))
+    return filas
+
+#================== CLI =========================
+
+def _opcion(texto: str) -> tuple:
+    clave, _, valor = texto.partition("=")
+    try:
+        return clave, json.loads(valor)
+    except json.JSONDecodeError:
+        return clave, valor
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks de las páginas de NBooks.")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    p_correr = comandos.add_parser("correr", help="mide las páginas y guarda el resultado en JSON")
+    p_correr.add_argument("--escalas", type=int, nargs="+", default=ESCALAS, help="cantidades de libros")
+    p_correr.add_argument("--paginas", nargs="+", default=PAGINAS)
+    p_correr.add_argument("--opcion", type=_opcion, action="append", default=[],
+                          help="clave=valor de [nbooks], p. ej. filtros_en_servidor=true")
+    p_correr.add_argument("--semilla", type=int, default=SEMILLA)
+    p_correr.add_argument("--salida", type=Path, default=SALIDA)
+
+    p_comparar = comandos.add_parser("comparar", help="compara dos resultados")
+    p_comparar.add_argument("anterior", type=Path)
+    p_comparar.add_argument("actual", type=Path)
+
+    p_arranque = comandos.add_parser("arranque", help="perfil de importaciones de cada página")
+    p_arranque.add_argument("--paginas", nargs="+", default=arranque.PAGINAS)
+    p_arranque.add_argument("--repeticiones", type=int, default=1, help="se queda con la corrida más rápida")
+    p_arranque.add_argument("--sin-sesion", action="store_true", help="corre las páginas sin usuario")
+    p_arranque.add_argument("--verificar", action="store_true",
+                            help="falla si main.py o el login exceden su presupuesto o cargan dependencias pesadas")
+    args = parser.parse_args(argv)
+    # AppTest corre sin servidor: los avisos de "missing ScriptRunContext" son esperables
+    for nombre in [n for n in logging.root.manager.loggerDict if n.startswith("streamlit")]:
+        logging.getLogger(nombre).setLevel(logging.ERROR)
+
+    if args.comando == "comparar":
+        anterior = json.loads(args.anterior.read_text(encoding="utf-8"))
+        actual = json.loads(args.actual.read_text(encoding="utf-8"))
+        print(f"{anterior['commit']} -> {actual['commit']}")
+        for escala, pagina, metrica, antes, despues, variacion in comparar(anterior, actual):
+            cambio = f"{variacion:+.1%}" if variacion is not None else "-"
+            print(f"{escala:>7} {pagina:<28} {metrica:<22} {antes:>10} {despues:>10} {cambio:>8}")
+        return 0
+
+    if args.comando == "arranque":
+        if args.verificar:
+            problemas = arranque.verificar(max(args.repeticiones, 3))
+            for problema in problemas:
+                print(problema, file=sys.stderr)
+            return 1 if problemas else 0
+        perfiles = arranque.perfilar(args.paginas, args.repeticiones, not args.sin_sesion)
+        for perfil in perfiles:
+            arranque.imprimir(perfil)
+        return 1 if any(p["errores"] for p in perfiles) else 0
+
+    def al_medir(m):
+        print(
+            f"{m['escala']:>7} {m['pagina']:<28} carga {m['primera_carga_s']:.3f}s  rerun {m['rerun_s']:.3f}s  "
+            f"{m['elementos']} elementos  {m['llamadas_primera_carga']['total']}/{m['llamadas_rerun']['total']} llamadas  "
+            f"{m['memoria_pico_mb']} MB" + (f"  ERRORES: {m['errores']}" if m["errores"] else ""),
+            file=sys.stderr,
+        )
+
+    resultado = correr(args.escalas, args.paginas, dict(args.opcion), args.semilla, al_medir)
+    args.salida.mkdir(parents=True, exist_ok=True)
+    destino = args.salida / f"{datetime.datetime.now():%Y%m%dT%H%M%S}_{resultado['commit']}.json"
+    destino.write_text(json.dumps(resultado, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(destino)
+    return 1 if any(r["errores"] for r in resultado["resultados"]) else 0
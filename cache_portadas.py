@@ -0,0 +1,184 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import streamlit as st
+from configuracion import SQLITE_PORTADAS, backend_local, config
+from supabase_client import get_supabase_client
+
+logger = logging.getLogger("nbooks.portadas")
+
+# Carpeta servida por Streamlit en /app/static (ver .streamlit/config.toml)
+DIRECTORIO_STATIC = Path(__file__).parent / "static"
+DIRECTORIO_CACHE = DIRECTORIO_STATIC / "portadas"
+MAX_MB = 200
+MAX_ENTRADAS = 2000
+# Descargas en paralelo al precargar las portadas de una página
+HILOS_DESCARGA = 8
+
+#================== CACHÉ LRU EN DISCO =========================
+
+class CachePortadas:
+    """Caché LRU en disco de los archivos del bucket de portadas.
+
+    Las entradas se identifican por su ruta en el bucket (``portada_path`` o
+    la ruta de una de sus versiones). Cuando se supera ``max_bytes`` o
+    ``max_entradas`` se borran las menos usadas. El orden de uso se refleja
+    en la fecha de modificación de cada archivo, así que sobrevive a un
+    reinicio del servidor.
+    """
+
+    def __init__(self, directorio: Path, descargar: callable, max_bytes: int, max_entradas: int):
+        self.directorio = Path(directorio)
+        self._descargar = descargar  # ruta -> bytes
+        self.max_bytes = max_bytes
+        self.max_entradas = max_entradas
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()  # ruta -> tamaño, de menos a más reciente
+        self._bytes = 0
+        self._indexar()
+
+    def _indexar(self) -> None:
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        archivos = [a for a in self.directorio.rglob("*") if a.is_file() and not a.name.startswith(".")]
+        for archivo in sorted(archivos, key=lambda a: a.stat().st_mtime):
+            tamano = archivo.stat().st_size
+            self._entradas[archivo.relative_to(self.directorio).as_posix()] = tamano
+            self._bytes += tamano
+        with self._lock:
+            self._desalojar()
+
+    def _archivo(self, ruta: str) -> Path:
+        archivo = (self.directorio / ruta).resolve()
+        if self.directorio.resolve() not in archivo.parents:
+            raise ValueError(f"Ruta de portada inválida: {ruta}")
+        return archivo
+
+    def presente(self, ruta: str) -> bool:
+        """Indica si ``ruta`` ya está en disco; si está, la marca como recién usada."""
+        archivo = self._archivo(ruta)
+        with self._lock:
+            if ruta in self._entradas and archivo.exists():
+                self._entradas.move_to_end(ruta)
+                self.aciertos += 1
+                os.utime(archivo)
+                return True
+        return False
+
+    def asegurar(self, ruta: str) -> Path:
+        """Devuelve el archivo local de ``ruta``, descargándolo si no está en caché."""
+        archivo = self._archivo(ruta)
+        if self.presente(ruta):
+            return archivo
+        with self._lock:
+            self.fallos += 1
+
+        datos = self._descargar(ruta)
+        archivo.parent.mkdir(parents=True, exist_ok=True)
+        temporal = archivo.with_name(f".{archivo.name}.{threading.get_ident()}")
+        temporal.write_bytes(datos)
+        os.replace(temporal, archivo)
+
+        with self._lock:
+            self._bytes += len(datos) - self._entradas.pop(ruta, 0)
+            self._entradas[ruta] = len(datos)
+            self._desalojar(conservar=ruta)
+        return archivo
+
+    def obtener(self, ruta: str) -> bytes:
+        """Devuelve el contenido de ``ruta`` (para ``st.image``)."""
+        return self.asegurar(ruta).read_bytes()
+
+    def _desalojar(self, conservar: str = None) -> None:
+        while self._entradas and (self._bytes > self.max_bytes or len(self._entradas) > self.max_entradas):
+            ruta, tamano = next(iter(self._entradas.items()))
+            if ruta == conservar:
+                break
+            del self._entradas[ruta]
+            self._bytes -= tamano
+            try:
+                (self.directorio / ruta).unlink()
+            except FileNotFoundError:
+                pass
+
+    def estadisticas(self) -> dict:
+        """Contadores de aciertos/fallos y ocupación actual."""
+        with self._lock:
+            return {
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+            }
+
+#================== FUENTES =========================
+
+def fuente_supabase(bucket: str) -> callable:
+    """Descarga los archivos desde Supabase Storage."""
+    supabase = get_supabase_client()
+    return lambda ruta: supabase.storage.from_(bucket).download(ruta)
+
+def fuente_local(directorio: str) -> callable:
+    """Lee los archivos de una carpeta local que imita al bucket (pruebas, modo offline)."""
+    raiz = Path(directorio)
+    return lambda ruta: (raiz / ruta).read_bytes()
+
+#================== ACCESO =========================
+
+def cache_activa() -> bool:
+    """Indica si las portadas se sirven desde la caché local (``portadas_cache = true``).
+
+    Con el backend SQLite siempre: las portadas no tienen URL pública.
+    """
+    return bool(config("portadas_cache", False)) or backend_local()
+
+@st.cache_resource
+def get_cache_portadas(bucket: str) -> CachePortadas:
+    """Devuelve la caché de portadas, compartida globalmente."""
+    bucket_local = config("sqlite_portadas", SQLITE_PORTADAS) if backend_local() else config("portadas_bucket_local")
+    descargar = fuente_local(bucket_local) if bucket_local else fuente_supabase(bucket)
+    return CachePortadas(
+        DIRECTORIO_CACHE,
+        descargar,
+        max_bytes=int(config("portadas_cache_mb", MAX_MB)) * 1024 * 1024,
+        max_entradas=int(config("portadas_cache_entradas", MAX_ENTRADAS)),
+    )
+
+def url_local(bucket: str, ruta: str) -> str:
+    """Asegura ``ruta`` en la caché y devuelve su URL en la ruta estática de Streamlit."""
+    archivo = get_cache_portadas(bucket).asegurar(ruta)
+    return "app/static/" + archivo.relative_to(DIRECTORIO_STATIC.resolve()).as_posix()
+
+@st.cache_resource
+def _pool_descargas() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=HILOS_DESCARGA, thread_name_prefix="nbooks-portadas")
+
+def precargar(bucket: str, rutas: list) -> None:
+    """Descarga en paralelo las rutas que falten (p. ej. las portadas de una página).
+
+    Las que ya están en disco solo se marcan como usadas, sin pasar por el
+    pool: en un rerun normal no se encola nada.
+    """
+    cache = get_cache_portadas(bucket)
+
+    def asegurar(ruta):
+        try:
+            cache.asegurar(ruta)
+        except Exception:
+            logger.exception("No se pudo cachear la portada %s", ruta)
+
+    def falta(ruta):
+        try:
+            return not cache.presente(ruta)
+        except ValueError:
+            return True  # asegurar registra la ruta inválida
+
+    faltantes = [ruta for ruta in set(rutas) if falta(ruta)]
+    if faltantes:
+        for descarga in [_pool_descargas().submit(asegurar, ruta) for ruta in faltantes]:
+            descarga.result()
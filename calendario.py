@@ -0,0 +1,120 @@
+"""Cálculos del calendario de lectura sobre una ventana de fechas.
+
+Cada lectura va de ``fecha_inicio`` a ``fecha_leido``. Si falta una de las
+dos se toma el día que haya, salvo los libros "En proceso", que se extienden
+hasta hoy. Todo se recorta a la ventana, así que el costo depende del
+período elegido y no del tamaño de la biblioteca.
+"""
+import datetime
+
+EN_PROCESO = "En proceso"
+
+def ventana_anual(anio: int) -> tuple:
+    """Primer y último día de ``anio``."""
+    return datetime.date(anio, 1, 1), datetime.date(anio, 12, 31)
+
+def _fecha(valor) -> datetime.date:
+    if not valor:
+        return None
+    if isinstance(valor, datetime.date):
+        return valor
+    return datetime.date.fromisoformat(str(valor)[:10])
+
+def extremos(libro: dict, hoy: datetime.date) -> tuple:
+    """``(inicio, fin)`` de la lectura de un libro, o ``(None, None)`` si no tiene fechas."""
+    inicio, fin = _fecha(libro.get("fecha_inicio")), _fecha(libro.get("fecha_leido"))
+    if fin is None and inicio and libro.get("estado_lectura") == EN_PROCESO:
+        fin = max(inicio, hoy)
+    inicio, fin = inicio or fin, fin or inicio
+    if inicio and fin < inicio:
+        inicio, fin = fin, inicio
+    return inicio, fin
+
+def en_ventana(libro: dict, desde: datetime.date, hasta: datetime.date, hoy: datetime.date) -> bool:
+    """Indica si la lectura del libro toca la ventana (mismo criterio que ``filtro_ventana``)."""
+    inicio, fin = extremos(libro, hoy)
+    return inicio is not None and inicio <= hasta and fin >= desde
+
+def filtro_ventana(desde: datetime.date, hasta: datetime.date) -> str:
+    """Condición ``or`` de PostgREST que trae las lecturas que tocan la ventana.
+
+    Trae exactamente los libros que acepta ``en_ventana``: los que tienen las
+    dos fechas (también al revés, con el fin antes que el inicio), los que
+    solo tienen una y los que siguen en proceso.
+    """
+    d, h = desde.isoformat(), hasta.isoformat()
+    return ",".join([
+        f"and(fecha_inicio.lte.{h},fecha_leido.gte.{d})",
+        f"and(fecha_leido.lte.{h},fecha_inicio.gte.{d})",
+        f"and(fecha_inicio.is.null,fecha_leido.gte.{d},fecha_leido.lte.{h})",
+        f"and(fecha_leido.is.null,fecha_inicio.gte.{d},fecha_inicio.lte.{h})",
+        f'and(fecha_leido.is.null,fecha_inicio.lte.{h},estado_lectura.eq."{EN_PROCESO}")',
+    ])
+
+#================== AGREGADOS =========================
+
+def conteos_por_dia(libros: list, desde: datetime.date, hasta: datetime.date) -> dict:
+    """``{fecha: cantidad}`` de libros terminados cada día de la ventana."""
+    conteos = {}
+    for libro in libros:
+        fin = _fecha(libro.get("fecha_leido"))
+        if fin and desde <= fin <= hasta:
+            conteos[fin] = conteos.get(fin, 0) + 1
+    return conteos
+
+def conteos_por_semana(conteos_dia: dict) -> dict:
+    """Agrupa los conteos diarios por lunes de cada semana."""
+    semanas = {}
+    for dia, cantidad in conteos_dia.items():
+        lunes = dia - datetime.timedelta(days=dia.weekday())
+        semanas[lunes] = semanas.get(lunes, 0) + cantidad
+    return dict(sorted(semanas.items()))
+
+def matriz_heatmap(conteos_dia: dict, desde: datetime.date, hasta: datetime.date) -> tuple:
+    """Arma la grilla semana × día de la semana para un heatmap.
+
+    Devuelve ``(z, semanas, fechas)``: ``z[d][s]`` es la cantidad del día
+    ``d`` (0 = lunes) de la semana ``s`` y ``None`` fuera de la ventana.
+    """
+    primer_lunes = desde - datetime.timedelta(days=desde.weekday())
+    n_semanas = (hasta - primer_lunes).days // 7 + 1
+    semanas = [primer_lunes + datetime.timedelta(weeks=s) for s in range(n_semanas)]
+    z = [[None] * n_semanas for _ in range(7)]
+    fechas = [[""] * n_semanas for _ in range(7)]
+    for s, lunes in enumerate(semanas):
+        for d in range(7):
+            dia = lunes + datetime.timedelta(days=d)
+            if desde <= dia <= hasta:
+                z[d][s] = conteos_dia.get(dia, 0)
+                fechas[d][s] = dia.isoformat()
+    return z, semanas, fechas
+
+def tramos(libros: list, desde: datetime.date, hasta: datetime.date, hoy: datetime.date) -> list:
+    """Lecturas recortadas a la ventana, repartidas en carriles sin solaparse.
+
+    Cada tramo es ``{"nombre", "estado_lectura", "inicio", "fin", "carril"}``
+    con ``fin`` exclusivo. El número de carriles es el máximo de lecturas
+    simultáneas, no la cantidad de libros.
+    """
+    resultado = []
+    for libro in libros:
+        inicio, fin = extremos(libro, hoy)
+        if inicio is None or inicio > hasta or fin < desde:
+            continue
+        resultado.append({
+            "nombre": libro.get("nombre"),
+            "estado_lectura": libro.get("estado_lectura"),
+            "inicio": max(inicio, desde),
+            "fin": min(fin, hasta) + datetime.timedelta(days=1),
+        })
+
+    resultado.sort(key=lambda t: (t["inicio"], t["fin"]))
+    fin_carriles = []  # fin del último tramo de cada carril
+    for tramo in resultado:
+        carril = next((i for i, fin in enumerate(fin_carriles) if fin <= tramo["inicio"]), len(fin_carriles))
+        if carril == len(fin_carriles):
+            fin_carriles.append(tramo["fin"])
+        else:
+            fin_carriles[carril] = tramo["fin"]
+        tramo["carril"] = carril
+    return resultado
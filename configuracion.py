@@ -0,0 +1,16 @@
+import streamlit as st
+
+def config(clave: str, defecto: any = None) -> any:
+    """Lee una opción de la sección ``[nbooks]`` de los secrets."""
+    try:
+        return st.secrets.get("nbooks", {}).get(clave, defecto)
+    except FileNotFoundError:
+        return defecto
+
+# Ubicación por defecto de los datos con ``backend = "sqlite"``
+SQLITE_RUTA = "datos/nbooks.db"
+SQLITE_PORTADAS = "datos/portadas"
+
+def backend_local() -> bool:
+    """Indica si los datos viven en SQLite y una carpeta local (``backend = "sqlite"``)."""
+    return config("backend", "supabase") == "sqlite"
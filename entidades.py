@@ -0,0 +1,46 @@
+"""Resolución de nombres de autores y tipos a sus ids.
+
+``IndiceEntidades`` indexa una tabla (``autores`` o ``tipos``) por nombre
+normalizado (sin tildes ni mayúsculas, ver ``indice_busqueda.normalizar``):
+las búsquedas son O(1) y "Garcia" encuentra a "García" en lugar de crear un
+duplicado. Los que falten se crean en bloque con
+``Repositorio.resolver_nombres`` (ver ``repositorio.py``).
+"""
+from indice_busqueda import normalizar
+
+class IndiceEntidades:
+    """Índice nombre normalizado -> fila sobre las filas de una tabla ``{"id", "nombre"}``."""
+
+    def __init__(self, filas: list):
+        self._por_clave = {}  # nombre normalizado -> fila, en el orden recibido
+        for fila in filas:
+            self._por_clave.setdefault(normalizar(fila["nombre"]), fila)
+
+    def __len__(self) -> int:
+        return len(self._por_clave)
+
+    def __contains__(self, nombre: str) -> bool:
+        return normalizar(nombre) in self._por_clave
+
+    def fila(self, nombre: str) -> dict:
+        """Fila del nombre indicado (sin importar tildes ni mayúsculas), o ``None``."""
+        return self._por_clave.get(normalizar(nombre))
+
+    def id_de(self, nombre: str) -> int:
+        """Id del nombre indicado, o ``None`` si no existe."""
+        fila = self.fila(nombre)
+        return fila["id"] if fila else None
+
+    def opciones(self) -> list:
+        """Nombres tal como están guardados, para los selectores."""
+        return [fila["nombre"] for fila in self._por_clave.values()]
+
+    def faltantes(self, nombres) -> list:
+        """Nombres (sin repetir) que todavía no existen en la tabla."""
+        vistos, resultado = set(), []
+        for nombre in nombres:
+            clave = normalizar(nombre)
+            if clave and clave not in self._por_clave and clave not in vistos:
+                vistos.add(clave)
+                resultado.append(nombre.strip())
+        return resultado
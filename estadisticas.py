@@ -0,0 +1,33 @@
+"""Agregados de la página de Estadísticas.
+
+Cada agregado es una fila ``{"dimension", "clave", "cantidad"}``, con
+``dimension`` en ``mes`` (``AAAA-MM`` de ``fecha_leido``), ``estado`` o
+``tipo``. Es el formato de ``vista_estadisticas`` (sql/004_estadisticas.sql);
+``agregar`` lo calcula en memoria cuando no se usa esa vista.
+"""
+from collections import Counter
+
+DIMENSIONES = ("mes", "estado", "tipo")
+
+def agregar(libros: list) -> list:
+    """Calcula los agregados a partir de filas de ``vista_libros`` ya preparadas (``tipos_libro``)."""
+    conteos = {dimension: Counter() for dimension in DIMENSIONES}
+    for libro in libros:
+        if libro.get("fecha_leido"):
+            conteos["mes"][str(libro["fecha_leido"])[:7]] += 1
+        if libro.get("estado_lectura"):
+            conteos["estado"][libro["estado_lectura"]] += 1
+        for tipo in libro.get("tipos_lista", ()):
+            conteos["tipo"][tipo.nombre] += 1
+    return [
+        {"dimension": dimension, "clave": clave, "cantidad": cantidad}
+        for dimension, contador in conteos.items()
+        for clave, cantidad in contador.items()
+    ]
+
+def por_dimension(filas: list) -> dict:
+    """Agrupa las filas de agregados como ``{dimension: {clave: cantidad}}``."""
+    resultado = {dimension: {} for dimension in DIMENSIONES}
+    for fila in filas:
+        resultado.setdefault(fila["dimension"], {})[fila["clave"]] = fila["cantidad"]
+    return resultado
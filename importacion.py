@@ -0,0 +1,319 @@
+"""Importación masiva de libros desde CSV / JSON.
+
+Uso como script::
+
+    python importacion.py biblioteca.csv [--lote 200] [--hilos 8]
+
+Columnas reconocidas: ``nombre`` (obligatoria), ``autor``, ``tipos``
+(separados por coma o punto y coma; en JSON también una lista),
+``estado_lectura``, ``en_kindle``, ``descripcion``, ``fecha_inicio``,
+``fecha_leido`` y ``portada`` (ruta local o URL de la imagen).
+
+Las portadas por URL se descargan en el servidor: solo http(s), hacia
+direcciones públicas, con límite de tamaño y de tiempo.
+"""
+import argparse
+import csv
+import datetime
+import ipaddress
+import itertools
+import json
+import socket
+import sys
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from indice_busqueda import normalizar
+from repositorio import repositorio_desde_archivo
+
+TAMANO_LOTE = 200
+HILOS_PORTADAS = 8
+# Límites de la descarga de cada portada por URL
+MAX_BYTES_PORTADA = 10 * 1024 * 1024
+SEGUNDOS_PORTADA = 20
+
+ESTADOS = ["Leído", "Por leer", "En proceso", "No leído", "Abandonado"]
+_ESTADOS_POR_CLAVE = {e.lower(): e for e in ESTADOS}
+_VERDADEROS = {"1", "true", "si", "sí", "x", "yes", "y"}
+
+#================== LECTURA =========================
+
+def leer_filas(archivo, formato: str):
+    """Genera las filas de ``archivo`` (texto) de a una.
+
+    CSV y JSON Lines se leen en streaming; un JSON con una lista se carga
+    de una vez.
+    """
+    if formato == "csv":
+        yield from csv.DictReader(archivo)
+    elif formato == "jsonl":
+        for linea in archivo:
+            if linea.strip():
+                yield json.loads(linea)
+    elif formato == "json":
+        datos = json.load(archivo)
+        yield from (datos if isinstance(datos, list) else [datos])
+    else:
+        raise ValueError(f"Formato no soportado: {formato}")
+
+def formato_de(nombre_archivo: str) -> str:
+    """Deduce el formato por la extensión del archivo."""
+    extension = Path(nombre_archivo).suffix.lower().lstrip(".")
+    return {"ndjson": "jsonl"}.get(extension, extension)
+
+def _lotes(iterable, tamano: int):
+    iterador = iter(iterable)
+    while lote := list(itertools.islice(iterador, tamano)):
+        yield lote
+
+#================== NORMALIZACIÓN =========================
+
+def _texto(valor) -> str:
+    return str(valor).strip() if valor is not None else ""
+
+def _fecha(valor) -> str:
+    texto = _texto(valor)
+    return datetime.date.fromisoformat(texto).isoformat() if texto else None
+
+def _tipos(valor) -> list:
+    if isinstance(valor, list):
+        nombres = valor
+    else:
+        nombres = _texto(valor).replace(";", ",").split(",")
+    return list(dict.fromkeys(_texto(n) for n in nombres if _texto(n)))
+
+def normalizar_fila(fila: dict) -> dict:
+    """Valida una fila del archivo y la lleva al formato de la tabla ``libros``.
+
+    Lanza ``ValueError`` con un mensaje legible si la fila no es válida.
+    """
+    nombre = _texto(fila.get("nombre"))
+    if not nombre:
+        raise ValueError("Falta el nombre del libro.")
+
+    estado = _texto(fila.get("estado_lectura")) or "Por leer"
+    if estado.lower() not in _ESTADOS_POR_CLAVE:
+        raise ValueError(f"Estado de lectura desconocido: {estado}")
+
+    try:
+        fecha_inicio = _fecha(fila.get("fecha_inicio"))
+        fecha_leido = _fecha(fila.get("fecha_leido"))
+    except ValueError:
+        raise ValueError("Fecha inválida (se espera AAAA-MM-DD).")
+
+    en_kindle = fila.get("en_kindle")
+    return {
+        "nombre": nombre,
+        "autor": _texto(fila.get("autor")) or None,
+        "tipos": _tipos(fila.get("tipos")),
+        "estado_lectura": _ESTADOS_POR_CLAVE[estado.lower()],
+        "en_kindle": en_kindle if isinstance(en_kindle, bool) else _texto(en_kindle).lower() in _VERDADEROS,
+        "descripcion": _texto(fila.get("descripcion")) or None,
+        "fecha_inicio": fecha_inicio,
+        "fecha_leido": fecha_leido,
+        "portada": _texto(fila.get("portada")) or None,
+    }
+
+#================== ESCRITURA =========================
+
+def validar_url_portada(url: str) -> None:
+    """Lanza ``ValueError`` si ``url`` no es http(s) hacia una dirección pública.
+
+    Las URLs vienen del archivo importado: sin esto el servidor podría leer
+    servicios internos (loopback, red privada, metadatos de la nube).
+    """
+    partes = urllib.parse.urlsplit(url)
+    if partes.scheme not in ("http", "https") or not partes.hostname:
+        raise ValueError("Solo se admiten portadas por http(s).")
+    try:
+        direcciones = {
+            info[4][0]
+            for info in socket.getaddrinfo(partes.hostname, partes.port or 443, proto=socket.IPPROTO_TCP)
+        }
+    except (socket.gaierror, UnicodeError):
+        raise ValueError(f"No se pudo resolver {partes.hostname}.")
+    for direccion in direcciones:
+        ip = ipaddress.ip_address(direccion.split("%")[0])
+        if ip.version == 6 and ip.ipv4_mapped:
+            ip = ip.ipv4_mapped
+        if not ip.is_global or ip.is_multicast:
+            raise ValueError(f"Dirección no permitida para una portada: {partes.hostname}")
+
+class _RedireccionValidada(urllib.request.HTTPRedirectHandler):
+    """Valida también el destino de cada redirección."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        validar_url_portada(newurl)
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+_navegador = urllib.request.build_opener(_RedireccionValidada)
+
+def _descargar_portada(url: str) -> bytes:
+    validar_url_portada(url)
+    limite = time.monotonic() + SEGUNDOS_PORTADA
+    with _navegador.open(url, timeout=SEGUNDOS_PORTADA) as respuesta:
+        longitud = respuesta.headers.get("Content-Length", "")
+        if longitud.isdigit() and int(longitud) > MAX_BYTES_PORTADA:
+            raise ValueError(f"La portada supera los {MAX_BYTES_PORTADA // 1_048_576} MB.")
+        bloques, total = [], 0
+        while bloque := respuesta.read(64 * 1024):
+            total += len(bloque)
+            if total > MAX_BYTES_PORTADA:
+                raise ValueError(f"La portada supera los {MAX_BYTES_PORTADA // 1_048_576} MB.")
+            if time.monotonic() > limite:
+                raise ValueError(f"La portada tardó más de {SEGUNDOS_PORTADA} s en descargarse.")
+            bloques.append(bloque)
+    return b"".join(bloques)
+
+def _leer_portada(origen: str, directorio_base: Path = None) -> bytes:
+    if "://" in origen:
+        return _descargar_portada(origen)
+    if directorio_base is None:
+        raise ValueError("Solo se admiten portadas por URL.")
+    return (directorio_base / origen).read_bytes()
+
+def importar(
+    repositorio,
+    filas,
+    al_progresar: callable = None,
+    tamano_lote: int = TAMANO_LOTE,
+    hilos: int = HILOS_PORTADAS,
+    directorio_portadas: Path = None,
+) -> dict:
+    """Importa las filas por lotes y devuelve un resumen.
+
+    Por lote, a través de ``repositorio`` (ver ``repositorio.py``): un upsert
+    de autores, uno de tipos, las portadas en paralelo (``hilos`` a la vez),
+    un upsert de libros y uno de ``libro_tipos``. Autores y tipos se
+    resuelven por nombre normalizado ("Garcia Marquez" es "García Márquez")
+    y los libros se identifican por (nombre, autor), así que reimportar el
+    mismo archivo actualiza en lugar de duplicar.
+
+    ``al_progresar(resumen)`` se llama después de cada lote. Las filas con
+    problemas quedan en ``resumen["errores"]`` como ``(numero_fila, mensaje)``.
+    """
+    resumen = {"procesadas": 0, "importadas": 0, "errores": []}
+
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        for lote in _lotes(enumerate(filas, start=1), tamano_lote):
+            validas = []
+            for numero, fila in lote:
+                try:
+                    validas.append((numero, normalizar_fila(fila)))
+                except ValueError as e:
+                    resumen["errores"].append((numero, str(e)))
+
+            try:
+                importadas = _importar_lote(repositorio, validas, pool, directorio_portadas, resumen["errores"])
+            except Exception as e:
+                importadas = 0
+                resumen["errores"].extend((numero, f"Error en el lote: {e}") for numero, _ in validas)
+
+            resumen["procesadas"] += len(lote)
+            resumen["importadas"] += importadas
+            if al_progresar:
+                al_progresar(resumen)
+
+    return resumen
+
+def _importar_lote(repositorio, filas: list, pool, directorio_portadas: Path, errores: list) -> int:
+    if not filas:
+        return 0
+
+    # Cada grafía sale con el id de su nombre normalizado: las variantes no duplican
+    autores = repositorio.resolver_nombres("autores", (f["autor"] for _, f in filas if f["autor"]))
+    tipos = repositorio.resolver_nombres("tipos", (t for _, f in filas for t in f["tipos"]))
+
+    def clave_libro(fila: dict) -> tuple:
+        return normalizar(fila["nombre"]), autores.get(fila["autor"])
+
+    # --- Portadas en paralelo ---
+    def subir(item):
+        numero, fila = item
+        try:
+            datos = _leer_portada(fila["portada"], directorio_portadas)
+            return repositorio.subir_portada(datos, fila["nombre"])
+        except Exception as e:
+            errores.append((numero, f"Portada no importada: {e}"))
+            return None
+
+    con_portada = [item for item in filas if item[1]["portada"]]
+    portadas = dict(zip((n for n, _ in con_portada), pool.map(subir, con_portada)))
+
+    # --- Libros (un registro por nombre normalizado + autor dentro del lote) ---
+    libros = {}
+    for numero, fila in filas:
+        libro = {
+            "nombre": fila["nombre"],
+            "autor_id": autores.get(fila["autor"]),
+            "estado_lectura": fila["estado_lectura"],
+            "en_kindle": fila["en_kindle"],
+            "descripcion": fila["descripcion"],
+            "fecha_inicio": fila["fecha_inicio"],
+            "fecha_leido": fila["fecha_leido"],
+        }
+        if portadas.get(numero):
+            libro["portada_path"] = portadas[numero]
+        clave = clave_libro(fila)
+        libros[clave] = {**libros.get(clave, {}), **libro}
+
+    # Un upsert por juego de columnas: así los libros sin portada nueva no
+    # pisan la que ya tenían.
+    ids = {}
+    for tiene_portada in (True, False):
+        grupo = [l for l in libros.values() if ("portada_path" in l) == tiene_portada]
+        if grupo:
+            insertados = repositorio.guardar_libros(grupo)
+            ids.update({(normalizar(l["nombre"]), l["autor_id"]): l["id"] for l in insertados})
+
+    # --- Vínculos libro-tipo ---
+    vinculos = {
+        (ids[clave_libro(f)], tipos[t])
+        for _, f in filas for t in f["tipos"]
+        if clave_libro(f) in ids
+    }
+    repositorio.vincular_tipos(vinculos)
+
+    return len(filas)
+
+#================== CLI =========================
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Importa libros a NBooks desde CSV / JSON.")
+    parser.add_argument("archivo", type=Path)
+    parser.add_argument("--formato", choices=["csv", "json", "jsonl"], help="por defecto, según la extensión")
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE, help="filas por lote")
+    parser.add_argument("--hilos", type=int, default=HILOS_PORTADAS, help="subidas de portadas en paralelo")
+    parser.add_argument("--secrets", type=Path, default=Path(".streamlit/secrets.toml"))
+    args = parser.parse_args(argv)
+
+    repositorio = repositorio_desde_archivo(args.secrets)
+    formato = args.formato or formato_de(args.archivo.name)
+
+    def al_progresar(resumen):
+        print(
+            f"\r{resumen['procesadas']} filas · {resumen['importadas']} importadas · "
+            f"{len(resumen['errores'])} errores",
+            end="", file=sys.stderr, flush=True,
+        )
+
+    with open(args.archivo, encoding="utf-8-sig", newline="") as archivo:
+        resumen = importar(
+            repositorio,
+            leer_filas(archivo, formato),
+            al_progresar=al_progresar,
+            tamano_lote=args.lote,
+            hilos=args.hilos,
+            directorio_portadas=args.archivo.parent,
+        )
+    print(file=sys.stderr)
+
+    for numero, mensaje in resumen["errores"]:
+        print(f"Fila {numero}: {mensaje}", file=sys.stderr)
+    return 1 if resumen["errores"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
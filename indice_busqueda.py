@@ -0,0 +1,106 @@
+import unicodedata
+from collections import defaultdict
+
+#================== NORMALIZACIÓN =========================
+
+def normalizar(texto: str) -> str:
+    """Pasa a minúsculas, quita tildes y colapsa espacios ("García  Márquez" -> "garcia marquez")."""
+    if not texto:
+        return ""
+    descompuesto = unicodedata.normalize("NFKD", str(texto))
+    sin_tildes = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return " ".join(sin_tildes.casefold().split())
+
+def _trigramas(texto: str) -> set:
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+#================== ÍNDICE =========================
+
+class IndiceCatalogo:
+    """Índice invertido en memoria sobre título, autor y tipos de los libros.
+
+    Se construye una sola vez por versión de los datos. Las búsquedas de texto
+    se resuelven intersectando las listas de trigramas (y verificando la
+    subcadena solo sobre los candidatos), y los filtros de tipo y estado con
+    conjuntos precalculados; el resultado combinado es la intersección.
+    """
+
+    def __init__(self, libros: list):
+        self._libros = {}                     # id -> libro
+        self._orden = {}                      # id -> posición original
+        self._textos = {}                     # id -> "titulo autor tipos" normalizado
+        self._autores = {}                    # id -> autor normalizado
+        self._trigramas = defaultdict(set)    # trigrama -> ids (texto completo)
+        self._trigramas_autor = defaultdict(set)
+        self._por_tipo = defaultdict(set)     # tipo normalizado -> ids
+        self._por_estado = defaultdict(set)   # estado -> ids
+
+        for posicion, libro in enumerate(libros):
+            libro_id = libro["id"]
+            self._libros[libro_id] = libro
+            self._orden[libro_id] = posicion
+
+            autor = normalizar(libro.get("autor"))
+            texto = normalizar(f"{libro.get('nombre') or ''} {libro.get('autor') or ''} {libro.get('tipos') or ''}")
+            self._textos[libro_id] = texto
+            self._autores[libro_id] = autor
+
+            for trigrama in _trigramas(texto):
+                self._trigramas[trigrama].add(libro_id)
+            for trigrama in _trigramas(autor):
+                self._trigramas_autor[trigrama].add(libro_id)
+
+            for tipo in libro.get("tipos_lista", ()):
+                self._por_tipo[normalizar(tipo.nombre)].add(libro_id)
+            self._por_estado[libro.get("estado_lectura")].add(libro_id)
+
+    def __len__(self) -> int:
+        return len(self._libros)
+
+    def _buscar_subcadena(self, consulta: str, textos: dict, trigramas: dict) -> set:
+        consulta = normalizar(consulta)
+        if len(consulta) < 3:
+            # Consultas de 1-2 letras no tienen trigramas: se verifican todas.
+            candidatos = textos.keys()
+        else:
+            listas = sorted((trigramas.get(t, set()) for t in _trigramas(consulta)), key=len)
+            candidatos = set.intersection(*listas) if listas else set()
+        return {i for i in candidatos if consulta in textos[i]}
+
+    def buscar(self, consulta: str) -> set:
+        """Ids de los libros cuyo título, autor o tipos contienen ``consulta``."""
+        return self._buscar_subcadena(consulta, self._textos, self._trigramas)
+
+    def por_autor(self, consulta: str) -> set:
+        """Ids de los libros cuyo autor contiene ``consulta``."""
+        return self._buscar_subcadena(consulta, self._autores, self._trigramas_autor)
+
+    def por_tipo(self, tipo: str) -> set:
+        """Ids de los libros que tienen exactamente el tipo indicado."""
+        return self._por_tipo.get(normalizar(tipo), set())
+
+    def por_estado(self, estado: str) -> set:
+        """Ids de los libros con el estado de lectura indicado."""
+        return self._por_estado.get(estado, set())
+
+    def filtrar(self, busqueda: str = "", autor: str = "", tipo: str = None, estado: str = None) -> list:
+        """Aplica los filtros combinados y devuelve los libros en su orden original.
+
+        Los filtros vacíos (o ``None``) no restringen el resultado.
+        """
+        conjuntos = []
+        if estado:
+            conjuntos.append(self.por_estado(estado))
+        if tipo:
+            conjuntos.append(self.por_tipo(tipo))
+        if autor:
+            conjuntos.append(self.por_autor(autor))
+        if busqueda:
+            conjuntos.append(self.buscar(busqueda))
+
+        if not conjuntos:
+            ids = self._libros.keys()
+        else:
+            conjuntos.sort(key=len)
+            ids = set.intersection(*conjuntos)
+        return [self._libros[i] for i in sorted(ids, key=self._orden.__getitem__)]
@@ -0,0 +1,239 @@
+"""Medición de las llamadas a Supabase.
+
+``instrumentar(cliente)`` envuelve el cliente para que cada ``execute()``
+(tablas y RPC), cada operación de Storage y cada llamada de auth registre
+tabla, operación, latencia, filas y bytes. Cada medición:
+
+* se suma a los contadores globales (``metricas()``),
+* se emite como una línea JSON en el logger ``nbooks.llamadas`` (nivel INFO,
+  se activa con ``log_llamadas = true``),
+* y si la sesión tiene el panel de desarrollo abierto (``?dev=1`` o
+  ``panel_desarrollo = true``) se muestra en la barra lateral con el resumen
+  del rerun actual.
+
+Las llamadas de hilos en segundo plano (refrescos de la caché, escrituras
+optimistas) no pertenecen a ningún rerun: solo van a los contadores y al log.
+"""
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from typing import NamedTuple
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from configuracion import config
+
+logger = logging.getLogger("nbooks.llamadas")
+
+# Operaciones del cliente de Storage y de auth que hacen una petición
+OPERACIONES_STORAGE = {"upload", "download", "remove", "list", "update", "move", "copy"}
+# Misma (tabla, operación) más veces que esto en un rerun: probable N+1
+UMBRAL_REPETICIONES = 3
+CLAVE_REGISTRO = "_panel_desarrollo_registro"
+
+class Medicion(NamedTuple):
+    tabla: str
+    operacion: str
+    segundos: float
+    filas: int
+    bytes: int
+    error: str = None
+
+#================== CONTADORES GLOBALES =========================
+
+_lock = threading.Lock()
+_metricas = {}  # "tabla.operacion" -> Counter(llamadas, segundos, filas, bytes, errores)
+
+def metricas() -> dict:
+    """Totales por ``tabla.operacion`` desde que arrancó el proceso."""
+    with _lock:
+        return {clave: dict(contador) for clave, contador in _metricas.items()}
+
+def _registrar(medicion: Medicion) -> None:
+    with _lock:
+        contador = _metricas.setdefault(f"{medicion.tabla}.{medicion.operacion}", Counter())
+        contador.update(
+            llamadas=1, segundos=medicion.segundos, filas=medicion.filas,
+            bytes=medicion.bytes, errores=int(medicion.error is not None),
+        )
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps(medicion._asdict(), ensure_ascii=False))
+    registro = _registro_del_rerun()
+    if registro is not None:
+        registro.agregar(medicion)
+
+#================== MEDICIÓN =========================
+
+def _tamano(datos) -> int:
+    if datos is None:
+        return 0
+    if isinstance(datos, (bytes, bytearray)):
+        return len(datos)
+    return len(json.dumps(datos, default=str).encode())
+
+def _medir_bytes() -> bool:
+    # Serializar la respuesta para medirla cuesta: solo si alguien la va a ver
+    return logger.isEnabledFor(logging.INFO) or _registro_del_rerun() is not None
+
+def _medir(tabla: str, operacion: str, llamar: callable, datos_de: callable = lambda r: r):
+    inicio = time.perf_counter()
+    try:
+        resultado = llamar()
+    except Exception as e:
+        _registrar(Medicion(tabla, operacion, time.perf_counter() - inicio, 0, 0, f"{type(e).__name__}: {e}"))
+        raise
+    segundos = time.perf_counter() - inicio
+    datos = datos_de(resultado)
+    filas = len(datos) if isinstance(datos, list) else int(datos is not None)
+    _registrar(Medicion(tabla, operacion, segundos, filas, _tamano(datos) if _medir_bytes() else 0))
+    return resultado
+
+class _Consulta:
+    """Envuelve un constructor de postgrest y mide su ``execute()``."""
+
+    def __init__(self, constructor, tabla: str, operacion: str = "select"):
+        self._constructor = constructor
+        self._tabla = tabla
+        self._operacion = operacion
+
+    def __getattr__(self, nombre: str):
+        atributo = getattr(self._constructor, nombre)
+        if not callable(atributo):
+            # Propiedades que devuelven otro constructor, como ``.not_``
+            return _Consulta(atributo, self._tabla, self._operacion) if hasattr(atributo, "execute") else atributo
+
+        def encadenar(*args, **kwargs):
+            resultado = atributo(*args, **kwargs)
+            if not hasattr(resultado, "execute"):
+                return resultado
+            operacion = nombre if nombre in ("select", "insert", "upsert", "update", "delete") else self._operacion
+            return _Consulta(resultado, self._tabla, operacion)
+
+        return encadenar
+
+    def execute(self):
+        return _medir(self._tabla, self._operacion, self._constructor.execute, lambda r: r.data)
+
+class _Servicio:
+    """Envuelve un cliente de Storage (un bucket) o de auth y mide las operaciones indicadas."""
+
+    def __init__(self, servicio, tabla: str, operaciones: set = None):
+        self._servicio = servicio
+        self._tabla = tabla
+        self._operaciones = operaciones
+
+    def __getattr__(self, nombre: str):
+        atributo = getattr(self._servicio, nombre)
+        if not callable(atributo) or (self._operaciones is not None and nombre not in self._operaciones):
+            return atributo
+        if nombre == "from_":
+            return lambda bucket: _Servicio(atributo(bucket), f"storage:{bucket}", OPERACIONES_STORAGE)
+
+        def medido(*args, **kwargs):
+            if nombre == "upload":
+                # Lo que importa de una subida es lo que se envía
+                datos = args[1] if len(args) > 1 else kwargs.get("file")
+                return _medir(self._tabla, nombre, lambda: atributo(*args, **kwargs), lambda _: datos)
+            return _medir(self._tabla, nombre, lambda: atributo(*args, **kwargs))
+
+        return medido
+
+class ClienteInstrumentado:
+    """Cliente de Supabase que mide cada llamada (ver el docstring del módulo)."""
+
+    def __init__(self, cliente):
+        self._cliente = cliente
+        self.auth = _Servicio(cliente.auth, "auth")
+
+    @property
+    def storage(self) -> _Servicio:
+        # El cliente rehace Storage con el token nuevo al iniciar sesión o renovarlo
+        return _Servicio(self._cliente.storage, "storage")
+
+    def table(self, tabla: str) -> _Consulta:
+        return _Consulta(self._cliente.table(tabla), tabla)
+
+    def from_(self, tabla: str) -> _Consulta:
+        return self.table(tabla)
+
+    def rpc(self, funcion: str, parametros: dict = None, *args, **kwargs) -> _Consulta:
+        return _Consulta(self._cliente.rpc(funcion, parametros or {}, *args, **kwargs), f"rpc:{funcion}", "rpc")
+
+    def __getattr__(self, nombre: str):
+        return getattr(self._cliente, nombre)
+
+def instrumentar(cliente) -> ClienteInstrumentado:
+    """Envuelve el cliente de Supabase para medir sus llamadas."""
+    if config("log_llamadas", False) and not logger.handlers:
+        manejador = logging.StreamHandler()
+        manejador.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+        logger.addHandler(manejador)
+        logger.setLevel(logging.INFO)
+    return ClienteInstrumentado(cliente)
+
+#================== PANEL DE DESARROLLO =========================
+
+class _RegistroRerun:
+    """Llamadas de un rerun y el lugar de la barra lateral donde se muestran."""
+
+    def __init__(self, lugar):
+        self.lugar = lugar
+        self.mediciones = []
+        self._dibujar()
+
+    def agregar(self, medicion: Medicion) -> None:
+        self.mediciones.append(medicion)
+        # Se redibuja con cada llamada: el resumen queda completo aunque la
+        # página termine con st.stop()
+        self._dibujar()
+
+    def _dibujar(self) -> None:
+        with self.lugar.container():
+            _dibujar(self.mediciones)
+
+def _registro_del_rerun() -> _RegistroRerun:
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is None or ctx.fragment_ids_this_run:
+        # Hilo en segundo plano, o rerun de un fragmento (no vuelve a dibujar la barra lateral)
+        return None
+    return st.session_state.get(CLAVE_REGISTRO)
+
+def _dibujar(mediciones: list) -> None:
+    total_ms = sum(m.segundos for m in mediciones) * 1000
+    with st.expander(f"🛠️ Backend: {len(mediciones)} llamadas · {total_ms:.0f} ms", expanded=True):
+        col_filas, col_kb = st.columns(2)
+        col_filas.metric("Filas", sum(m.filas for m in mediciones))
+        col_kb.metric("KB", f"{sum(m.bytes for m in mediciones) / 1024:.1f}")
+        repetidas = Counter((m.tabla, m.operacion) for m in mediciones)
+        for (tabla, operacion), veces in repetidas.items():
+            if veces > UMBRAL_REPETICIONES:
+                st.warning(f"{tabla}.{operacion} se llamó {veces} veces en este rerun (¿N+1?)")
+        st.dataframe(
+            [
+                {
+                    "tabla": m.tabla, "operación": m.operacion, "ms": round(m.segundos * 1000, 1),
+                    "filas": m.filas, "KB": round(m.bytes / 1024, 1), "error": m.error,
+                }
+                for m in mediciones
+            ],
+            hide_index=True,
+        )
+
+def panel_activo() -> bool:
+    """Indica si esta sesión muestra el panel (``?dev=1`` la activa hasta cerrar la sesión)."""
+    if st.query_params.get("dev") == "1":
+        st.session_state["panel_desarrollo"] = True
+    return bool(config("panel_desarrollo", False) or st.session_state.get("panel_desarrollo"))
+
+def panel_desarrollo() -> None:
+    """Abre en la barra lateral el resumen de llamadas de este rerun (si el panel está activo).
+
+    Se llama al principio de cada página, antes de cualquier lectura.
+    """
+    if not panel_activo():
+        st.session_state.pop(CLAVE_REGISTRO, None)
+        return
+    st.session_state[CLAVE_REGISTRO] = _RegistroRerun(st.sidebar.empty())
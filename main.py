@@ -1,10 +1,32 @@
+import math
 import streamlit as st
-from supabase_client import get_supabase_client 
-
-# 2. Llama a la función para obtener el cliente
-supabase = get_supabase_client()
+from instrumentacion import panel_desarrollo
+from utils import (
+    config, modo_snapshot, obtener_indice_catalogo, obtener_pagina_libros, obtener_pagina_filtrada,
+    obtener_busqueda, obtener_tipos, obtener_detalle_libro, actualizar_estado_optimista,
+)
+from portadas import BUCKET, precargar_portadas
+from cache_portadas import cache_activa, get_cache_portadas
+from tarjetas import detalle_html, grilla
+from sesiones import SesionExpirada, cerrar_sesion
+
+try:
+    from st_keyup import st_keyup
+except ImportError:  # dependencia opcional: sin ella se filtra al presionar Enter
+    st_keyup = None
+
+# Milisegundos de pausa al escribir antes de volver a filtrar
+DEBOUNCE_BUSQUEDA_MS = 300
+
+# Con `filtros_en_servidor = true` en [nbooks] los filtros se resuelven en
+# Supabase (requiere sql/001_vista_libros_busqueda.sql); si no, con el índice local.
+FILTROS_EN_SERVIDOR = config("filtros_en_servidor", False) and not modo_snapshot()
+# Con `busqueda_en_servidor = true` la búsqueda general es de texto completo y
+# ordena por relevancia (requiere sql/008_busqueda_texto.sql).
+BUSQUEDA_EN_SERVIDOR = config("busqueda_en_servidor", False) and not modo_snapshot()
 
 st.set_page_config(page_title="NBooks", page_icon="📚", layout="wide")
+panel_desarrollo()
 
 # --- Redirección si no hay usuario ---
 if "user" not in st.session_state:
@@ -16,293 +38,238 @@ with col1:
 with col2:
     st.markdown("")
     if st.button("Cerrar sesión"):
+        cerrar_sesion()
         st.session_state.pop("user", None)
         st.switch_page("pages/0_login.py")
 
 st.markdown("Explora tus libros registrados y gestiona su progreso de lectura.")
 
 #================== FUNCIONES =========================
-def obtener_badge_estado(estado):
-    estado_limpio = estado.strip()
-    
-    # Mapeo de estado a color y ícono (usando los íconos de Material Design):
-    color_map = {
-        "leído": ("green", "check_circle"),
-        "por leer": ("blue", "bookmark_add"),
-        "en proceso": ("orange", "hourglass_top"),
-        "no leído": ("gray", "visibility_off"),
-        "abandonado": ("red", "cancel"),
-    }
-    
-    color, icon = color_map.get(estado_limpio.lower(), ("gray", "help"))
-    return f":{color}-badge[:material/{icon}: {estado_limpio}]"
-
-def actualizar_estado(libro_id, nuevo_estado):
-    """Actualiza el estado de lectura de un libro y refresca la página."""
-    if nuevo_estado:
-        supabase.table("libros").update({"estado_lectura": nuevo_estado}).eq("id", libro_id).execute()
-        st.success(f"Estado actualizado.")
-        st.rerun()
+def actualizar_estado(libro):
+    """Callback de "Guardar Estado": aplica el nuevo estado al instante y lo
+    guarda en segundo plano.
+
+    Después vuelve a correr solo el fragmento del catálogo: la tarjeta sale
+    con el estado nuevo y el diálogo se cierra (el fragmento no lo vuelve a
+    abrir). Si la escritura falla, el catálogo lo avisa en su siguiente
+    ejecución.
+    """
+    nuevo_estado = st.session_state.get(f"catalogo_estado_{libro['id']}")
+    if not nuevo_estado or nuevo_estado == libro["estado_lectura"]:
+        st.toast("El estado no ha cambiado.")
+        return  # el diálogo sigue abierto
+    escrituras = st.session_state.setdefault("catalogo_escrituras", {})
+    try:
+        escrituras[libro["id"]] = actualizar_estado_optimista(libro, nuevo_estado)
+    except SesionExpirada as e:
+        st.toast(str(e))
+        st.rerun()  # sin usuario: la página completa lleva al login
+    st.rerun(CLAVE_CATALOGO)
+
+def mostrar_escrituras_pendientes():
+    """Avisa de los cambios de estado guardados en segundo plano que terminaron mal."""
+    escrituras = st.session_state.get("catalogo_escrituras", {})
+    for libro_id, escritura in list(escrituras.items()):
+        if not escritura.done():
+            continue
+        del escrituras[libro_id]
+        if escritura.exception() is not None:
+            st.error(f"No se pudo guardar el estado; se restauró el anterior. ({escritura.exception()})")
+
+# Sin `streamlit-keyup` (no está en requirements.txt) se avisa en el campo
+AYUDA_SIN_KEYUP = (
+    "Presiona Enter para filtrar. Instalando `streamlit-keyup` "
+    "se filtra mientras se escribe (ver README)."
+)
+
+def campo_busqueda(label, key):
+    """Campo de texto que filtra mientras se escribe (con debounce) si está
+    instalado `streamlit-keyup`; si no, se usa un `st.text_input` normal que
+    filtra al presionar Enter y lo indica en su ayuda."""
+    if st_keyup is not None:
+        return st_keyup(label, key=key, debounce=DEBOUNCE_BUSQUEDA_MS)
+    return st.text_input(label, key=key, help=AYUDA_SIN_KEYUP)
+
+def _cambiar_pagina(delta):
+    """Callback de los botones de navegación del catálogo."""
+    st.session_state["catalogo_pagina"] = st.session_state.get("catalogo_pagina", 0) + delta
+
+def _reiniciar_pagina():
+    """Al cambiar el tamaño de página se vuelve a la primera."""
+    st.session_state["catalogo_pagina"] = 0
 
 #================ FILTROS Y LIBROS ====================
-# --- Cargar libros ---
-data = supabase.table("vista_libros").select("*").execute()
-libros = data.data or []
+# Tamaños de página disponibles (múltiplos de 4 para llenar filas completas)
+TAMANOS_PAGINA = [12, 24, 48, 96]
+ESTADOS = ["Leído", "Por leer", "En proceso", "No leído", "Abandonado"]
+# Clave del fragmento del catálogo, para volver a correrlo desde un callback
+CLAVE_CATALOGO = "catalogo"
 
 # --- Función auxiliar para obtener tipos únicos ---
-def get_unique_types(libros):
-    """Extrae todos los tipos únicos de la lista de libros."""
-    tipos_unicos = set()
-    for libro in libros:
-        tipos_str = libro["tipos"]
-        if tipos_str:
-            # Dividir la cadena por coma y añadir cada tipo único al set
-            for tipo in tipos_str.split(','):
-                tipo_limpio = tipo.strip()
-                if tipo_limpio:
-                    tipos_unicos.add(tipo_limpio)
-    
-    # Devolvemos una lista, asegurando que "Todos" sea la primera opción
-    return ["Todos"] + sorted(list(tipos_unicos))
-
-# Obtener la lista de tipos únicos una sola vez al cargar la app
-tipos_disponibles = get_unique_types(libros)
+def get_unique_types(tipos_data):
+    """Devuelve los nombres de tipo para el filtro, con "Todos" como primera opción."""
+    return ["Todos"] + sorted(t["nombre"] for t in tipos_data)
+
+# Los tipos salen de la tabla `tipos` (cacheada) para no tener que descargar
+# toda la biblioteca solo para armar el filtro.
+tipos_disponibles = get_unique_types(obtener_tipos())
 
 # --- Filtros ---
 col1, col2, col3, col4 = st.columns([2, 1.5, 1.5, 1.5]) # Añadimos una columna para la búsqueda general
 
-# 1. Campo de Búsqueda General
-busqueda_filtro = col1.text_input("🔍 Buscar (Título/Autor/Tipo)")
+# 1. Campo de Búsqueda General (filtra mientras se escribe, o con Enter sin streamlit-keyup)
+with col1:
+    busqueda_filtro = campo_busqueda(
+        "🔍 Buscar (Título/Autor/Tipo/Descripción)" if BUSQUEDA_EN_SERVIDOR else "🔍 Buscar (Título/Autor/Tipo)",
+        key="catalogo_busqueda",
+    )
 
 # 2. Filtro por Tipo (Selectbox)
 tipo_filtro = col2.selectbox(
     "🏷️ Tipo",
-    tipos_disponibles 
+    tipos_disponibles
 )
 
-# 3. Filtro por Autor (manteniendo el text_input para búsquedas parciales)
-autor_filtro = col3.text_input("👤 Autor")
+# 3. Filtro por Autor (búsqueda parcial, también mientras se escribe)
+with col3:
+    autor_filtro = campo_busqueda("👤 Autor", key="catalogo_autor")
 
 # 4. Filtro por Estado (Selectbox)
 estado_filtro = col4.selectbox(
     "📖 Estado",
-    ["Todos", "Leído", "Por leer", "En proceso", "No leído", "Abandonado"]
+    ["Todos"] + ESTADOS
 )
 
+# --- Estado de la paginación (sobrevive a los reruns) ---
+filtros_actuales = (busqueda_filtro, tipo_filtro, autor_filtro, estado_filtro)
+if st.session_state.get("catalogo_filtros") != filtros_actuales:
+    # Si cambian los filtros se vuelve a la primera página
+    st.session_state["catalogo_filtros"] = filtros_actuales
+    st.session_state["catalogo_pagina"] = 0
+
+tam_pagina = st.session_state.get("catalogo_tam_pagina", TAMANOS_PAGINA[0])
+pagina = st.session_state.get("catalogo_pagina", 0)
+
+filtros = {
+    "busqueda": busqueda_filtro,
+    "autor": autor_filtro,
+    "tipo": None if tipo_filtro == "Todos" else tipo_filtro,
+    "estado": None if estado_filtro == "Todos" else estado_filtro,
+}
+hay_filtros = any(filtros.values())
 
 # --- Aplicar filtros ---
-libros_filtrados = []
-busqueda_lower = busqueda_filtro.lower()
-
-for libro in libros:
-    # 1. Filtro de Búsqueda General (Título o Autor o Tipos)
-    texto_libro = f"{libro.get('nombre', '')} {libro.get('autor', '')} {libro.get('tipos', '')}".lower()
-    match_busqueda = busqueda_lower in texto_libro
-    
-    # 2. Filtro por Autor
-    match_autor = autor_filtro.lower() in (libro.get("autor") or "").lower()
-    
-    # 3. Filtro por Tipo (Selectbox)
-    tipos_del_libro = (libro.get("tipos") or "").lower()
-    match_tipo = (
-        tipo_filtro == "Todos" 
-        or tipo_filtro.lower() in tipos_del_libro # Verifica si el tipo seleccionado está en los tipos del libro
+def cargar_ventana(offset):
+    """Devuelve ``(libros, total)`` para la página que empieza en ``offset``."""
+    if not hay_filtros:
+        # Sin filtros solo se pide a Supabase la ventana visible
+        return obtener_pagina_libros(offset, tam_pagina)
+    if BUSQUEDA_EN_SERVIDOR and filtros["busqueda"]:
+        # Texto completo: los mejores resultados primero, no por nombre
+        return obtener_busqueda(filtros, offset, tam_pagina)
+    if FILTROS_EN_SERVIDOR:
+        # Los filtros viajan como cláusulas de PostgREST
+        return obtener_pagina_filtrada(filtros, offset, tam_pagina)
+    # El índice se construye una vez por versión de los datos y resuelve los
+    # filtros combinados por intersección de conjuntos.
+    libros_filtrados = obtener_indice_catalogo().filtrar(**filtros)
+    return libros_filtrados[offset:offset + tam_pagina], len(libros_filtrados)
+
+libros_visibles, total_libros = cargar_ventana(pagina * tam_pagina)
+total_paginas = max(1, math.ceil(total_libros / tam_pagina))
+if pagina >= total_paginas:
+    # Hay menos libros que en la última visita
+    pagina = total_paginas - 1
+    libros_visibles, total_libros = cargar_ventana(pagina * tam_pagina)
+
+st.session_state["catalogo_pagina"] = pagina
+
+st.divider()
+
+# Con la caché de portadas activa, las de esta página se bajan en paralelo
+precargar_portadas(libros_visibles)
+
+@st.dialog("Detalles", width="large")
+def detalles_libro(libro):
+    """Detalles de un libro y cambio de estado. La descripción no viaja con el
+    catálogo: se pide al abrir el diálogo y queda en la caché por libro."""
+    detalle = obtener_detalle_libro(libro["id"])
+    st.markdown(detalle_html(libro, detalle.get("descripcion")), unsafe_allow_html=True)
+
+    estado_col, boton_col = st.columns([3, 1], vertical_alignment="bottom")
+    estado_col.selectbox(
+        "Cambiar estado",
+        ESTADOS,
+        index=ESTADOS.index(libro["estado_lectura"]) if libro["estado_lectura"] in ESTADOS else 0,
+        key=f"catalogo_estado_{libro['id']}",
     )
-    
-    # 4. Filtro por Estado
-    match_estado = (
-        estado_filtro == "Todos" 
-        or libro["estado_lectura"] == estado_filtro
+    # El cambio se aplica en el callback, que redibuja solo el catálogo
+    boton_col.button(
+        "Guardar Estado", key="catalogo_btn_guardar", on_click=actualizar_estado, args=(libro,),
+        use_container_width=True,
     )
-    
-    # Combinar todos los filtros
-    if match_busqueda and match_autor and match_tipo and match_estado:
-        libros_filtrados.append(libro)
-        
-st.divider()
 
-# --- Mostrar libros en filas de 3 ---
-if not libros_filtrados:
+@st.fragment(key=CLAVE_CATALOGO)
+def catalogo(libros):
+    """Tarjetas de la página. Es un fragmento: abrir los detalles o guardar un
+    estado no vuelve a correr los filtros ni la carga de la página."""
+    mostrar_escrituras_pendientes()
+
+    # Toda la grilla es un solo elemento; cada tarjeta sale de la caché de
+    # tarjetas.py salvo que su fila haya cambiado
+    libro_id = grilla(libros, key="catalogo_grilla")
+    if libro_id is not None:
+        libros_por_id = {libro["id"]: libro for libro in libros}
+        if libro_id in libros_por_id:
+            detalles_libro(libros_por_id[libro_id])
+
+# --- Mostrar libros en filas de 4 ---
+if not libros_visibles:
     st.info("No hay libros que coincidan con los filtros.")
 else:
-    for i in range(0, len(libros_filtrados), 4):
-        cols = st.columns(4)
-        for j, col in enumerate(cols):
-            if i + j < len(libros_filtrados):
-                libro = libros_filtrados[i + j]
-                libro_id = libro['id'] # Obtener el ID para las claves y la actualización
-
-                with col.container(border=True):
-                    # Usamos columnas internas para la portada y los datos
-                    portada_col, datos_col = st.columns([1, 2]) 
-
-                    # --- Columna de la Portada ---
-                    with portada_col:
-                        portada_url = (
-                            f"https://osanryewvmaofxtfnzqk.supabase.co/storage/v1/object/public/"
-                            f"portadas_libros/{libro['portada_path']}"
-                        ) if libro["portada_path"] else "https://placehold.co/100x150?text=Sin+portada"
-                        # Usamos HTML para aplicar un ancho y alto fijo.
-                        # object-fit: cover asegura que la imagen cubra el área sin distorsionarse si su proporción es diferente.
-                        st.markdown(
-                            f"""
-                            <img src="{portada_url}" 
-                                style="width: 150px; height: 140px; object-fit: cover;" 
-                                alt="Portada del libro">
-                            """, 
-                            unsafe_allow_html=True
-                        ) 
-
-                    # --- Columna de Datos Simplificados (Panel Principal) ---
-                    with datos_col:
-                        # Título del libro (Agrandado con H3)
-                        st.markdown(
-                            f"""
-                            <p style='
-                                margin: 0 0 3px 0; /* Margen de 5px debajo de la línea */
-                                padding-bottom: 1px; /* Pequeño espacio entre el texto y la línea */
-                                font-size: 28px; 
-                                text-align: center; 
-                                line-height: 1; 
-                                border-bottom: 1px solid #F0F0F0; /* Línea gris muy delgada */
-                            '>
-                                <b>{libro['nombre'] or 'Título Desconocido'}</b>
-                            </p>
-                            <p style='
-                                margin: 0 0 6px 0; 
-                                padding: 0; 
-                                font-size: 20px; 
-                                text-align: center; 
-                                line-height: 1;
-                            '>
-                                {libro['autor'] or 'Desconocido'}
-                            </p>
-                            """,
-                            unsafe_allow_html=True
-                        )
-
-                        # Datos ultra compactos (Solo nombre, autor, tipo, estado y kindle)
-
-                        tipos_cadena = libro['tipos'] or ""
-                        tipos_lista = [t.strip() for t in tipos_cadena.split(',') if t.strip()]
-                        tipos_badges_markdown = ""
-                        if tipos_lista:
-                            tipos_badges_markdown = " ".join([f":violet-badge[:material/star: {tipo}]" for tipo in tipos_lista])
-                        else:
-                            tipos_badges_markdown = ":gray-badge[-]"
-
-                        badge_estado = obtener_badge_estado(libro['estado_lectura'])
-
-                        st.markdown(tipos_badges_markdown)
-                        estado_col, kindle_col = st.columns([3, 2])
-
-                        with estado_col:
-                            st.markdown(badge_estado)
-
-                        with kindle_col:
-                            st.markdown(
-                                f"""
-                                <p style='padding: 0; line-height: 1; font-size: 14px; text-align: center;'>
-                                    Kindle {'✅' if libro['en_kindle'] else '❌'}
-                                </p>
-                                """,
-                                unsafe_allow_html=True,
-                            )
-
-                    # --- Modal (Pop-up) para Ver Detalles y Cambiar Estado ---
-                    with st.popover("Ver Detalles", use_container_width=True):
-
-                        #st.header(libro['nombre'])
-
-                        pop_col1, pop_col2 = st.columns([3, 1]) 
-                        
-
-                        with pop_col1:
-                            # Título del libro (Agrandado con H3)
-                            st.markdown(
-                                f"""
-                                <p style='
-                                    margin: 0 0 3px 0; /* Margen de 5px debajo de la línea */
-                                    padding-bottom: 1px; /* Pequeño espacio entre el texto y la línea */
-                                    font-size: 28px; 
-                                    text-align: center; 
-                                    line-height: 1; 
-                                    border-bottom: 1px solid #F0F0F0; /* Línea gris muy delgada */
-                                '>
-                                    <b>{libro['nombre'] or 'Título Desconocido'}</b>
-                                </p>
-                                <p style='
-                                    margin: 0 0 6px 0; 
-                                    padding: 0; 
-                                    font-size: 20px; 
-                                    text-align: center; 
-                                    line-height: 1;
-                                '>
-                                    {libro['autor'] or 'Desconocido'}
-                                </p>
-                                """,
-                                unsafe_allow_html=True
-                            )
-
-                            tipos_cadena = libro['tipos'] or ""
-                            tipos_lista = [t.strip() for t in tipos_cadena.split(',') if t.strip()]
-                            tipos_badges_markdown = ""
-                            if tipos_lista:
-                                tipos_badges_markdown = " ".join([f":violet-badge[:material/star: {tipo}]" for tipo in tipos_lista])
-                            else:
-                                tipos_badges_markdown = ":gray-badge[-]"
-
-                            badge_estado = obtener_badge_estado(libro['estado_lectura'])
-
-                            st.markdown(tipos_badges_markdown)
-                            estado_col, kindle_col, espacio_blanco = st.columns([1, 1, 3])
-
-                            with estado_col:
-                                st.markdown(badge_estado)
-
-                            with kindle_col:
-                                st.markdown(
-                                    f"""
-                                    <p style='margin-top: 6px; padding: 0; line-height: 1; font-size: 14px; text-align: left;'>
-                                        Kindle {'✅' if libro['en_kindle'] else '❌'}
-                                    </p>
-                                    """,
-                                    unsafe_allow_html=True,
-                                )
-                            with espacio_blanco:
-                                st.markdown("")
-
-                            st.write(libro.get('descripcion', 'No hay descripción disponible.')) 
-                            
-                        # --- Columna 2: Portada Grande (Derecha) ---
-                        with pop_col2:
-                            # La URL de la portada ya debe estar definida arriba
-                            #st.image(portada_url, width=700)
-                            st.markdown(
-                                f"""
-                                <img src="{portada_url}" 
-                                    style="width: 410px; height: 210px; object-fit: cover; border-radius: 10px;" 
-                                    alt="Portada del libro">
-                                """, 
-                                unsafe_allow_html=True
-                            ) 
-                            nuevo_estado = st.selectbox(
-                                    "Cambiar estado", 
-                                ["Leído", "Por leer", "En proceso", "No leído", "Abandonado"],
-                                index=[
-                                    "Leído", "Por leer", "En proceso", "No leído", "Abandonado"
-                                ].index(libro["estado_lectura"]),
-                                key=f"popover_estado_{libro_id}",
-                                # 2. Agrega este parámetro para ocultar la etiqueta y su espacio.
-                                label_visibility="collapsed" 
-                            )
-                            
-                            if st.button("Guardar Estado", key=f"btn_guardar_{libro_id}"):
-                                # Llama a la función de actualización si el estado cambió
-                                if nuevo_estado != libro["estado_lectura"]:
-                                    actualizar_estado(libro_id, nuevo_estado)
-                                else:
-                                    st.info("El estado no ha cambiado.")
-                            
-
-                        
\ No newline at end of file
+    catalogo(libros_visibles)
+
+# --- Navegación entre páginas ---
+st.divider()
+nav_anterior, nav_info, nav_siguiente, nav_tam = st.columns([1, 2, 1, 1])
+with nav_anterior:
+    st.button(
+        "◀ Anterior",
+        on_click=_cambiar_pagina,
+        args=(-1,),
+        disabled=pagina <= 0,
+        use_container_width=True,
+        key="catalogo_btn_anterior",
+    )
+with nav_info:
+    st.markdown(
+        f"<p style='text-align: center; margin-top: 6px;'>Página {pagina + 1} de {total_paginas} "
+        f"· {total_libros} libros</p>",
+        unsafe_allow_html=True,
+    )
+with nav_siguiente:
+    st.button(
+        "Siguiente ▶",
+        on_click=_cambiar_pagina,
+        args=(1,),
+        disabled=pagina >= total_paginas - 1,
+        use_container_width=True,
+        key="catalogo_btn_siguiente",
+    )
+with nav_tam:
+    st.selectbox(
+        "Libros por página",
+        TAMANOS_PAGINA,
+        key="catalogo_tam_pagina",
+        on_change=_reiniciar_pagina,
+        label_visibility="collapsed",
+    )
+
+# --- Contadores de la caché de portadas ---
+if cache_activa():
+    stats_portadas = get_cache_portadas(BUCKET).estadisticas()
+    st.sidebar.caption(
+        f"🖼️ Caché de portadas: {stats_portadas['aciertos']} aciertos · "
+        f"{stats_portadas['fallos']} fallos · {stats_portadas['entradas']} archivos "
+        f"({stats_portadas['bytes'] / 1_048_576:.1f} MB)"
+    )
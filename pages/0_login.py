@@ -1,13 +1,15 @@
 import streamlit as st
-from supabase_client import get_supabase_client 
+from instrumentacion import panel_desarrollo
+from configuracion import backend_local
+from sesiones import iniciar_sesion, registrar_usuario
 
-supabase = get_supabase_client()
-st.set_page_config(page_title="NBooks", page_icon="📚", layout="wide")
-# --- Redirección si no hay usuario ---
-if "user" not in st.session_state:
-    st.switch_page("pages/0_login.py")
+# --- Backend local (SQLite): un solo usuario, sin autenticación ---
+if backend_local():
+    st.session_state["user"] = {"local": True}
+    st.switch_page("main.py")
 
 st.set_page_config(page_title="Inicio de Sesión", page_icon="📚", layout="centered")
+panel_desarrollo()
 
 st.title("📚 NBooks - Iniciar Sesión")
 
@@ -20,7 +22,8 @@ password = st.text_input("Contraseña", type="password")
 if choice == "Iniciar sesión":
     if st.button("Entrar"):
         try:
-            user = supabase.auth.sign_in_with_password({"email": email, "password": password})
+            # Cada sesión tiene su propio cliente autenticado (ver sesiones.py)
+            user = iniciar_sesion(email, password)
             if user:
                 st.session_state["user"] = user
                 st.success("Inicio de sesión exitoso ✅")
@@ -31,7 +34,7 @@ if choice == "Iniciar sesión":
 elif choice == "Registrarse":
     if st.button("Crear cuenta"):
         try:
-            supabase.auth.sign_up({"email": email, "password": password})
+            registrar_usuario(email, password)
             st.success("Cuenta creada. Revisa tu correo para confirmar.")
         except Exception as e:
             st.error(f"Error al registrar: {e}")
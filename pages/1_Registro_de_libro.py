@@ -1,10 +1,13 @@
 import streamlit as st
-import datetime
-import pandas as pd
-from supabase_client import get_supabase_client 
+from instrumentacion import panel_desarrollo
+from entidades import IndiceEntidades
+from utils import (
+    obtener_libros, obtener_indice_entidades,
+    crear_autor, crear_tipo, registrar_libro, subir_portada,
+)
 
-supabase = get_supabase_client()
 st.set_page_config(page_title="Libros", page_icon="📚", layout="wide")
+panel_desarrollo()
 # --- Redirección si no hay usuario ---
 if "user" not in st.session_state:
     st.switch_page("pages/0_login.py")
@@ -15,9 +18,9 @@ def create_autor(nombre_autor: str) -> dict:
     """Crea un nuevo autor en la base de datos."""
     if nombre_autor:
         try:
-            result = supabase.table("autores").insert({"nombre": nombre_autor}).execute()
+            autor = crear_autor(nombre_autor)
             st.success(f"Autor '{nombre_autor}' registrado.")
-            return result.data[0]
+            return autor
         except Exception as e:
             st.error(f"Error al registrar autor: {e}")
             return None
@@ -27,16 +30,16 @@ def create_tipo(nombre_tipo: str) -> dict:
     """Crea un nuevo tipo de novela en la base de datos."""
     if nombre_tipo:
         try:
-            result = supabase.table("tipos").insert({"nombre": nombre_tipo}).execute()
+            tipo = crear_tipo(nombre_tipo)
             st.success(f"Tipo '{nombre_tipo}' registrado.")
-            return result.data[0]
+            return tipo
         except Exception as e:
             st.error(f"Error al registrar tipo: {e}")
             return None
     return None
 
 def _selector_entidad_libro(
-    datos: list,
+    indice: IndiceEntidades,
     label: str,
     key: str,
     btn_nuevo_label: str,
@@ -45,7 +48,7 @@ def _selector_entidad_libro(
     funcion_creacion: callable,
     multiselect: bool = False
 ) -> any:
-    opciones = [d["nombre"] for d in datos]
+    opciones = indice.opciones()
     nueva_entidad_creada = False
 
     # --- CASO 1: SELECTBOX (AUTOR) ---
@@ -109,10 +112,10 @@ def _selector_entidad_libro(
 st.set_page_config(layout="wide")
 st.title("➕ Registrar nuevo libro")
 st.markdown("<div style='height: 35px;'></div>", unsafe_allow_html=True)
-# --- Obtener datos (se mantiene igual) ---
-autores_data = supabase.table("autores").select("*").execute().data or []
-tipos_data = supabase.table("tipos").select("*").execute().data or []
-libros_registrados_data = supabase.table("vista_libros").select("nombre, autor").execute().data or []
+# --- Obtener datos (desde la caché compartida) ---
+indice_autores = obtener_indice_entidades("autores")
+indice_tipos = obtener_indice_entidades("tipos")
+libros_registrados_data = [{"nombre": l["nombre"], "autor": l["autor"]} for l in obtener_libros()]
 
 # --- Dividir la página en dos columnas principales ---
 col_registro, col_tabla = st.columns([2, 1]) 
@@ -128,7 +131,7 @@ with col_registro:
         with col_autor:
             # --- Selector para Autor ---
             autor_seleccionado_nombre = _selector_entidad_libro(
-                datos=autores_data,
+                indice=indice_autores,
                 label="Autor",
                 key="autor_libro",
                 btn_nuevo_label="➕ Nuevo Autor",
@@ -140,7 +143,7 @@ with col_registro:
         with col_tipos:
             # --- Selector para Tipos de Novela (Multiselect) ---
             tipos_seleccionados_nombres = _selector_entidad_libro(
-                datos=tipos_data,
+                indice=indice_tipos,
                 label="Tipos de novela",
                 key="tipos_novela_libro",
                 btn_nuevo_label="➕ Nuevo Tipo",
@@ -159,7 +162,7 @@ with col_registro:
             st.markdown("<div style='height: 35px;'></div>", unsafe_allow_html=True)
             en_kindle = st.checkbox("¿Lo tengo en Mi Kindle?")
 
-        portada = st.file_uploader("Subir portada", type=["jpg", "png", "jpeg"])
+        portada = st.file_uploader("Subir portada", type=["jpg", "png", "jpeg", "webp"])
         
     if st.button("Registrar libro", use_container_width=True):
         if not nombre:
@@ -172,42 +175,32 @@ with col_registro:
             # --- Lógica de Inserción ---
             
             # Obtener el autor_id
-            autor_id = next((a["id"] for a in autores_data if a["nombre"] == autor_seleccionado_nombre), None)
+            autor_id = indice_autores.id_de(autor_seleccionado_nombre)
             
-            # Subir portada (se mantiene igual)
+            # Subir portada (se generan las versiones tarjeta/popover/completa)
             portada_path = None
             if portada:
-                file_name = f"{nombre.replace(' ', '_')}_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}.jpg"
-                portada_path = file_name
                 try:
-                    supabase.storage.from_("portadas_libros").upload(file_name, portada.read())
+                    portada_path = subir_portada(portada.read(), nombre)
                 except Exception as e:
                     st.error(f"Error al subir portada: {e}")
                     portada_path = None
 
-            # Insertar libro
-            libro_insert = supabase.table("libros").insert({
-                "nombre": nombre,
-                "autor_id": autor_id,
-                "portada_path": portada_path,
-                "estado_lectura": estado,
-                "en_kindle": en_kindle,
-            }).execute()
-
-            libro_id = libro_insert.data[0]["id"]
-
-            # Vincular tipos
-            # Recargar tipos_data por si se creó uno nuevo en otro lado
-            tipos_data_actualizados_para_vinculacion = supabase.table("tipos").select("*").execute().data or []
-            
-            for tipo_nombre in tipos_seleccionados_nombres:
-                tipo = next((t for t in tipos_data_actualizados_para_vinculacion if t["nombre"] == tipo_nombre), None)
-                if tipo:
-                    supabase.table("libro_tipos").insert({"libro_id": libro_id, "tipo_id": tipo["id"]}).execute()
-
-            st.success("Libro registrado exitosamente ✅")
-            st.balloons()
-            st.rerun() 
+            # Insertar libro y vincular tipos en una sola transacción (RPC)
+            try:
+                registrar_libro({
+                    "nombre": nombre,
+                    "autor_id": autor_id,
+                    "portada_path": portada_path,
+                    "estado_lectura": estado,
+                    "en_kindle": en_kindle,
+                }, tipos_seleccionados_nombres)
+            except Exception as e:
+                st.error(f"Error al registrar libro: {e}")
+            else:
+                st.success("Libro registrado exitosamente ✅")
+                st.balloons()
+                st.rerun() 
 
 # ==============================================================================
 #                      COLUMNA DERECHA: TABLA DE LIBROS (Se mantiene igual)
@@ -216,6 +209,8 @@ with col_tabla:
     st.header("Libros Registrados")
 
     if libros_registrados_data:
+        import pandas as pd  # solo cuando hay tabla que dibujar
+
         df = pd.DataFrame(libros_registrados_data)
         df = df.rename(columns={"nombre": "Título del Libro", "autor": "Autor"})
 
@@ -1,10 +1,16 @@
 import streamlit as st
+from instrumentacion import panel_desarrollo
 import datetime
-import pandas as pd
-from supabase_client import get_supabase_client 
+from entidades import IndiceEntidades
+from utils import (
+    obtener_libros, obtener_detalle_libro, obtener_indice_entidades,
+    crear_autor, crear_tipo, actualizar_libro, sincronizar_tipos, subir_portada,
+)
+from portadas import imagen_portada
+from tipos_libro import nombres_tipos
 
-supabase = get_supabase_client()
 st.set_page_config(page_title="Editar", page_icon="📚", layout="wide")
+panel_desarrollo()
 # --- Redirección si no hay usuario ---
 if "user" not in st.session_state:
     st.switch_page("pages/0_login.py")
@@ -17,9 +23,9 @@ def create_autor(nombre_autor: str) -> dict:
     # ... (código de tu función create_autor) ...
     if nombre_autor:
         try:
-            result = supabase.table("autores").insert({"nombre": nombre_autor}).execute()
+            autor = crear_autor(nombre_autor)
             st.success(f"Autor '{nombre_autor}' registrado.")
-            return result.data[0]
+            return autor
         except Exception as e:
             st.error(f"Error al registrar autor: {e}")
             return None
@@ -29,16 +35,16 @@ def create_tipo(nombre_tipo: str) -> dict:
     # ... (código de tu función create_tipo) ...
     if nombre_tipo:
         try:
-            result = supabase.table("tipos").insert({"nombre": nombre_tipo}).execute()
+            tipo = crear_tipo(nombre_tipo)
             st.success(f"Tipo '{nombre_tipo}' registrado.")
-            return result.data[0]
+            return tipo
         except Exception as e:
             st.error(f"Error al registrar tipo: {e}")
             return None
     return None
 
 def _selector_entidad_libro(
-    datos: list,
+    indice: IndiceEntidades,
     label: str,
     key: str,
     btn_nuevo_label: str,
@@ -49,7 +55,7 @@ def _selector_entidad_libro(
     default_value: any = None
 ) -> any:
     """Función selector de entidades con soporte para valor inicial."""
-    opciones = [d["nombre"] for d in datos]
+    opciones = indice.opciones()
     nueva_entidad_creada = False
 
     # --- CASO 1: SELECTBOX (AUTOR) ---
@@ -115,14 +121,12 @@ st.title("✏️ Editar Libro")
 
 # --- 1. Cargar todos los datos necesarios ---
 try:
-    # Cargar todos los libros para el selector (incluyendo las nuevas columnas)
-    libros_all_data = supabase.table("vista_libros").select(
-        "*, fecha_inicio, fecha_leido, descripcion" 
-    ).order("nombre").execute().data or []
+    # Cargar todos los libros para el selector (ordenados por nombre)
+    libros_all_data = obtener_libros()
 
     # Cargar datos para selectores de Autor y Tipos
-    autores_data = supabase.table("autores").select("*").execute().data or []
-    tipos_data = supabase.table("tipos").select("*").execute().data or []
+    indice_autores = obtener_indice_entidades("autores")
+    indice_tipos = obtener_indice_entidades("tipos")
 
 except Exception as e:
     st.error(f"Error al cargar datos: {e}")
@@ -180,7 +184,7 @@ if libro_actual and libro_id:
 
         with col_autor:
             autor_seleccionado_nombre = _selector_entidad_libro(
-                datos=autores_data,
+                indice=indice_autores,
                 label="Autor",
                 key=f"edit_autor_libro_{libro_id}",
                 btn_nuevo_label="➕ Nuevo Autor",
@@ -191,10 +195,9 @@ if libro_actual and libro_id:
             )
         
         with col_tipos:
-            # Corrección: Agregamos 'or '' ' para asegurar que siempre haya una cadena de texto
-            tipos_actuales_lista = [t.strip() for t in (libro_actual.get('tipos') or '').split(',') if t.strip()]
+            tipos_actuales_lista = nombres_tipos(libro_actual)
             tipos_seleccionados_nombres = _selector_entidad_libro(
-                datos=tipos_data,
+                indice=indice_tipos,
                 label="Tipos de novela",
                 key=f"edit_tipos_novela_libro_{libro_id}",
                 btn_nuevo_label="➕ Nuevo Tipo",
@@ -220,7 +223,8 @@ if libro_actual and libro_id:
         # Descripción (Columna: descripcion)
         descripcion = st.text_area(
             "Descripción del libro", 
-            value=libro_actual.get('descripcion', ''), 
+            # No viaja con la lista de libros: se pide por id
+            value=obtener_detalle_libro(libro_id).get('descripcion') or '', 
             height=150, 
             key=f"edit_descripcion_{libro_id}"
         )
@@ -249,14 +253,9 @@ if libro_actual and libro_id:
         st.markdown("---")
         st.markdown("### Portada")
 
-        portada_url_base = "https://osanryewvmaofxtfnzqk.supabase.co/storage/v1/object/public/portadas_libros"
-        portada_url_actual = (
-            f"{portada_url_base}/{libro_actual['portada_path']}"
-        ) if libro_actual["portada_path"] else "https://placehold.co/200x300?text=Sin+portada"
-        
-        st.image(portada_url_actual, width=200, caption="Portada actual")
+        st.image(imagen_portada(libro_actual["portada_path"], "popover"), width=200, caption="Portada actual")
 
-        nueva_portada = st.file_uploader("Cambiar portada", type=["jpg", "png", "jpeg"], key="edit_portada_uploader_{libro_id}")
+        nueva_portada = st.file_uploader("Cambiar portada", type=["jpg", "png", "jpeg", "webp"], key="edit_portada_uploader_{libro_id}")
         mantener_portada = st.checkbox("Mantener portada actual", value=True, key="edit_mantener_portada_{libro_id}")
 
     st.markdown("---")
@@ -270,17 +269,21 @@ if libro_actual and libro_id:
             else:
                 # --- Lógica de Actualización de Datos y Portada ---
                 
-                autor_id = next((a["id"] for a in autores_data if a["nombre"] == autor_seleccionado_nombre), None)
+                autor_id = indice_autores.id_de(autor_seleccionado_nombre)
                 portada_path_final = libro_actual['portada_path']
-                
-                # [OMITIDO: Lógica de manejo de portada (subida y eliminación) para mantener concisión, 
-                # utiliza la lógica que ya tienes de los pensamientos anteriores]
+
+                # Nueva portada: se procesa y se suben sus versiones
+                if nueva_portada and not mantener_portada:
+                    try:
+                        portada_path_final = subir_portada(nueva_portada.read(), nombre_libro)
+                    except Exception as e:
+                        st.error(f"Error al subir portada: {e}")
                 
                 # Actualizar libro en la tabla 'libros'
                 update_data = {
                     "nombre": nombre_libro,
                     "autor_id": autor_id,
-                    "portada_path": portada_path_final, # Asumiendo que esta variable se actualiza con la lógica omitida
+                    "portada_path": portada_path_final,
                     "estado_lectura": estado_lectura,
                     "en_kindle": en_kindle,
                     "descripcion": descripcion,
@@ -288,17 +291,10 @@ if libro_actual and libro_id:
                     "fecha_leido": fecha_fin_lectura.isoformat() if fecha_fin_lectura else None,
                 }
                 
-                supabase.table("libros").update(update_data).eq("id", libro_id).execute()
+                actualizar_libro(libro_id, update_data)
 
-                # Actualizar los tipos de novela (borrar y añadir)
-                supabase.table("libro_tipos").delete().eq("libro_id", libro_id).execute()
-                
-                if tipos_seleccionados_nombres:
-                    tipos_data_actualizados_para_vinculacion = supabase.table("tipos").select("*").execute().data or []
-                    for tipo_nombre in tipos_seleccionados_nombres:
-                        tipo = next((t for t in tipos_data_actualizados_para_vinculacion if t["nombre"] == tipo_nombre), None)
-                        if tipo:
-                            supabase.table("libro_tipos").insert({"libro_id": libro_id, "tipo_id": tipo["id"]}).execute()
+                # Actualizar los tipos de novela (solo los que cambiaron)
+                sincronizar_tipos(libro_id, tipos_actuales_lista, tipos_seleccionados_nombres)
 
                 st.success("Libro actualizado exitosamente ✅")
                 st.balloons()
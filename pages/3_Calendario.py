@@ -1,28 +1,103 @@
+import datetime
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-from supabase_client import get_supabase_client 
+from instrumentacion import panel_desarrollo
+from utils import obtener_lecturas_en_ventana
+from calendario import conteos_por_dia, conteos_por_semana, matriz_heatmap, tramos, ventana_anual
 
-supabase = get_supabase_client()
 st.set_page_config(page_title="Calendario", page_icon="📚", layout="wide")
+panel_desarrollo()
 # --- Redirección si no hay usuario ---
 if "user" not in st.session_state:
     st.switch_page("pages/0_login.py")
 
 st.title("📅 Calendario de lectura")
 
-libros = supabase.table("libros").select("nombre, estado_lectura, fecha_leido, fecha_inicio").execute().data or []
+#================== VENTANA DE FECHAS =========================
 
-# Convertir a DataFrame
-df = pd.DataFrame(libros)
+hoy = datetime.date.today()
+col_modo, col_periodo = st.columns([1, 3])
+modo = col_modo.radio("Período", ["Año", "Rango"], horizontal=True, key="calendario_modo")
 
-if not df.empty:
-    df["fecha"] = df["fecha_leido"].fillna(df["fecha_inicio"])
-    df = df.dropna(subset=["fecha"])
-    df["fecha"] = pd.to_datetime(df["fecha"])
-
-    st.write("Libros marcados como 'leídos' o 'en progreso'")
-    fig = px.timeline(df, x_start="fecha", x_end="fecha", y="nombre", color="estado_lectura")
-    st.plotly_chart(fig, use_container_width=True)
+if modo == "Año":
+    anio = col_periodo.selectbox("Año", list(range(hoy.year, hoy.year - 15, -1)), key="calendario_anio")
+    desde, hasta = ventana_anual(anio)
 else:
-    st.info("Aún no hay libros con fechas registradas.")
+    rango = col_periodo.date_input(
+        "Desde / hasta",
+        value=(hoy - datetime.timedelta(days=90), hoy),
+        key="calendario_rango",
+    )
+    if len(rango) != 2:
+        st.stop()
+    desde, hasta = rango
+
+# Solo viajan los libros de la ventana
+libros = obtener_lecturas_en_ventana(desde, hasta)
+
+if not libros:
+    st.info("No hay lecturas registradas en este período.")
+    st.stop()
+
+# pandas y plotly tardan en importarse: solo cuando hay gráficos que dibujar
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+#================== HEATMAP =========================
+
+conteos = conteos_por_dia(libros, desde, hasta)
+st.subheader("🟩 Libros terminados por día")
+st.caption(f"{sum(conteos.values())} libros terminados entre {desde:%d/%m/%Y} y {hasta:%d/%m/%Y}")
+
+z, semanas, fechas = matriz_heatmap(conteos, desde, hasta)
+fig_heatmap = go.Figure(go.Heatmap(
+    z=z,
+    x=semanas,
+    y=["Lun", "Mar", "Mié", "Jue", "Vie", "Sáb", "Dom"],
+    text=fechas,
+    hovertemplate="%{text}: %{z} libro(s)<extra></extra>",
+    colorscale="Greens",
+    xgap=2,
+    ygap=2,
+    showscale=False,
+))
+fig_heatmap.update_yaxes(autorange="reversed")
+fig_heatmap.update_layout(height=230, margin=dict(l=0, r=0, t=10, b=0))
+st.plotly_chart(fig_heatmap, use_container_width=True)
+
+por_semana = conteos_por_semana(conteos)
+if por_semana:
+    fig_semanas = px.bar(
+        x=list(por_semana.keys()),
+        y=list(por_semana.values()),
+        labels={"x": "Semana", "y": "Terminados"},
+    )
+    fig_semanas.update_layout(height=220, margin=dict(l=0, r=0, t=10, b=0))
+    st.plotly_chart(fig_semanas, use_container_width=True)
+
+#================== LECTURAS (INICIO → FIN) =========================
+
+st.subheader("📖 Lecturas del período")
+df = pd.DataFrame(tramos(libros, desde, hasta, hoy))
+if df.empty:
+    st.write("No hay lecturas con fechas en este período.")
+    st.stop()
+
+# Un carril por lectura simultánea: la altura depende del período, no de la biblioteca
+carriles = int(df["carril"].max()) + 1
+df["carril"] = df["carril"].astype(str)
+fig = px.timeline(
+    df,
+    x_start="inicio",
+    x_end="fin",
+    y="carril",
+    color="estado_lectura",
+    text="nombre",
+    hover_name="nombre",
+    hover_data={"carril": False, "inicio": True, "fin": True},
+)
+fig.update_yaxes(visible=False, categoryorder="array", categoryarray=[str(c) for c in range(carriles)])
+fig.update_xaxes(range=[desde, hasta + datetime.timedelta(days=1)])
+fig.update_traces(textposition="inside", insidetextanchor="start")
+fig.update_layout(height=120 + 28 * carriles, margin=dict(l=0, r=0, t=10, b=0))
+st.plotly_chart(fig, use_container_width=True)
@@ -1,34 +1,31 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-from supabase_client import get_supabase_client 
+from instrumentacion import panel_desarrollo
+from utils import obtener_estadisticas
+from estadisticas import por_dimension
 
-supabase = get_supabase_client()
 st.set_page_config(page_title="NBooks", page_icon="📚", layout="wide")
+panel_desarrollo()
 # --- Redirección si no hay usuario ---
 if "user" not in st.session_state:
     st.switch_page("pages/0_login.py")
 
 st.title("📊 Estadísticas de lectura")
 
-# Obtener datos
-data = supabase.table("vista_libros").select("*").execute()
-libros = data.data or []
+# Obtener agregados (unas decenas de filas, sin importar el tamaño de la biblioteca)
+conteos = por_dimension(obtener_estadisticas())
 
-if not libros:
+if not conteos["estado"]:
     st.info("Aún no hay libros registrados.")
     st.stop()
 
-df = pd.DataFrame(libros)
+# pandas y plotly tardan en importarse: solo cuando hay gráficos que dibujar
+import pandas as pd
+import plotly.express as px
 
 # --- Libros leídos por mes ---
-df["fecha_leido"] = pd.to_datetime(df["fecha_leido"], errors="coerce")
-leidos = df.dropna(subset=["fecha_leido"])
-leidos["Mes"] = leidos["fecha_leido"].dt.to_period("M").astype(str)
-
 st.subheader("📅 Libros leídos por mes")
-if not leidos.empty:
-    conteo_mes = leidos["Mes"].value_counts().sort_index()
+if conteos["mes"]:
+    conteo_mes = pd.Series(conteos["mes"]).sort_index()
     fig_mes = px.bar(
         conteo_mes,
         x=conteo_mes.index,
@@ -42,10 +39,8 @@ else:
 
 # --- Libros por tipo ---
 st.subheader("🏷️ Libros por tipo de novela")
-if "tipos" in df.columns and df["tipos"].notna().any():
-    tipos_list = df["tipos"].dropna().str.split(", ")
-    tipos_exploded = tipos_list.explode()
-    conteo_tipos = tipos_exploded.value_counts()
+if conteos["tipo"]:
+    conteo_tipos = pd.Series(conteos["tipo"]).sort_values(ascending=False)
     fig_tipos = px.pie(
         values=conteo_tipos.values,
         names=conteo_tipos.index,
@@ -57,7 +52,7 @@ else:
 
 # --- Libros por estado ---
 st.subheader("📖 Estado de lectura")
-conteo_estado = df["estado_lectura"].value_counts()
+conteo_estado = pd.Series(conteos["estado"]).sort_values(ascending=False)
 fig_estado = px.bar(
     conteo_estado,
     x=conteo_estado.index,
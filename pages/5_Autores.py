@@ -1,28 +1,87 @@
+import math
 import streamlit as st
-from supabase_client import get_supabase_client
-import pandas as pd 
+from instrumentacion import panel_desarrollo
+from utils import obtener_pagina_autores, crear_autor
 
-supabase = get_supabase_client()
 st.set_page_config(page_title="Autores", page_icon="📚", layout="wide")
+panel_desarrollo()
 # --- Redirección si no hay usuario ---
 if "user" not in st.session_state:
     st.switch_page("pages/0_login.py")
 
 st.title("👩‍💼 Autores registrados")
 
-autores = supabase.table("autores").select("*").order("nombre").execute().data or []
+AUTORES_POR_PAGINA = 50
+ORDENES = {
+    "Nombre (A-Z)": "nombre",
+    "Más libros": "libros",
+    "Más leídos": "leidos",
+    "Lectura más reciente": "ultima_lectura",
+}
 
-df = pd.DataFrame(autores)
+def _cambiar_pagina(delta):
+    """Callback de los botones de navegación."""
+    st.session_state["autores_pagina"] = st.session_state.get("autores_pagina", 0) + delta
 
-# Agregar emoji como columna
-df.insert(0, " ", "📖")
-st.dataframe(df)
+def _reiniciar_pagina():
+    """Al cambiar la búsqueda o el orden se vuelve a la primera página."""
+    st.session_state["autores_pagina"] = 0
+
+# --- Búsqueda y orden (se resuelven en Supabase) ---
+col_busqueda, col_orden = st.columns([3, 1])
+busqueda = col_busqueda.text_input(
+    "🔍 Buscar autor (empieza con...)", key="autores_busqueda", on_change=_reiniciar_pagina
+)
+orden = col_orden.selectbox("Ordenar por", list(ORDENES), key="autores_orden", on_change=_reiniciar_pagina)
+
+pagina = st.session_state.get("autores_pagina", 0)
+autores, total = obtener_pagina_autores(busqueda, ORDENES[orden], pagina * AUTORES_POR_PAGINA, AUTORES_POR_PAGINA)
+
+total_paginas = max(1, math.ceil(total / AUTORES_POR_PAGINA))
+if pagina >= total_paginas:
+    # La búsqueda achicó el resultado: se vuelve a la última página válida
+    pagina = st.session_state["autores_pagina"] = total_paginas - 1
+    autores, total = obtener_pagina_autores(busqueda, ORDENES[orden], pagina * AUTORES_POR_PAGINA, AUTORES_POR_PAGINA)
+
+if autores:
+    import pandas as pd  # solo cuando hay tabla que dibujar
+
+    df = pd.DataFrame(autores)
+    st.dataframe(
+        df,
+        hide_index=True,
+        use_container_width=True,
+        column_order=["nombre", "libros", "leidos", "ultima_lectura"],
+        column_config={
+            "nombre": st.column_config.TextColumn("📖 Autor"),
+            "libros": st.column_config.NumberColumn("Libros"),
+            "leidos": st.column_config.NumberColumn("Leídos"),
+            "ultima_lectura": st.column_config.DateColumn("Última lectura", format="DD/MM/YYYY"),
+        },
+    )
+else:
+    st.info("No hay autores que coincidan con la búsqueda.")
+
+# --- Navegación entre páginas ---
+nav_anterior, nav_info, nav_siguiente = st.columns([1, 2, 1])
+nav_anterior.button(
+    "◀ Anterior", on_click=_cambiar_pagina, args=(-1,), disabled=pagina <= 0,
+    use_container_width=True, key="autores_btn_anterior",
+)
+nav_info.markdown(
+    f"<p style='text-align: center; margin-top: 6px;'>Página {pagina + 1} de {total_paginas} · {total} autores</p>",
+    unsafe_allow_html=True,
+)
+nav_siguiente.button(
+    "Siguiente ▶", on_click=_cambiar_pagina, args=(1,), disabled=pagina >= total_paginas - 1,
+    use_container_width=True, key="autores_btn_siguiente",
+)
 
 st.divider()
 nuevo = st.text_input("Agregar nuevo autor")
 if st.button("Agregar"):
     if nuevo:
-        supabase.table("autores").insert({"nombre": nuevo}).execute()
+        crear_autor(nuevo)
         st.success(f"Autor '{nuevo}' agregado.")
         st.rerun()
     else:
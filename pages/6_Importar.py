@@ -0,0 +1,68 @@
+import io
+import streamlit as st
+from instrumentacion import panel_desarrollo
+from importacion import formato_de, leer_filas, MAX_BYTES_PORTADA, SEGUNDOS_PORTADA, TAMANO_LOTE
+from utils import importar_libros
+
+st.set_page_config(page_title="Importar", page_icon="📚", layout="wide")
+panel_desarrollo()
+# --- Redirección si no hay usuario ---
+if "user" not in st.session_state:
+    st.switch_page("pages/0_login.py")
+
+st.title("📥 Importar biblioteca")
+st.markdown(
+    "Sube un archivo **CSV**, **JSON** o **JSON Lines** con una fila por libro. "
+    "Columnas: `nombre` (obligatoria), `autor`, `tipos` (separados por coma), "
+    "`estado_lectura`, `en_kindle`, `descripcion`, `fecha_inicio`, `fecha_leido` "
+    "y `portada` (URL de la imagen)."
+)
+st.caption(
+    f"Las portadas se descargan solo por http(s) desde direcciones públicas, "
+    f"hasta {MAX_BYTES_PORTADA // 1_048_576} MB y {SEGUNDOS_PORTADA} s cada una."
+)
+st.caption("Los libros se identifican por nombre y autor: reimportar un archivo actualiza en lugar de duplicar.")
+
+archivo = st.file_uploader("Archivo a importar", type=["csv", "json", "jsonl", "ndjson"])
+
+col1, col2 = st.columns(2)
+with col1:
+    tamano_lote = st.number_input("Filas por lote", min_value=10, max_value=1000, value=TAMANO_LOTE, step=10)
+with col2:
+    hilos = st.number_input("Portadas en paralelo", min_value=1, max_value=32, value=8)
+
+if archivo and st.button("Importar", use_container_width=True):
+    barra = st.progress(0.0, text="Importando...")
+    tamano_archivo = max(archivo.size, 1)
+    texto = io.TextIOWrapper(archivo, encoding="utf-8-sig", newline="")
+
+    def al_progresar(resumen):
+        # El avance se estima por la posición de lectura dentro del archivo
+        avance = min(archivo.tell() / tamano_archivo, 1.0)
+        barra.progress(
+            avance,
+            text=f"{resumen['procesadas']} filas · {resumen['importadas']} importadas · "
+                 f"{len(resumen['errores'])} errores",
+        )
+
+    try:
+        resumen = importar_libros(
+            leer_filas(texto, formato_de(archivo.name)),
+            al_progresar=al_progresar,
+            tamano_lote=int(tamano_lote),
+            hilos=int(hilos),
+        )
+    except Exception as e:
+        st.error(f"Error al leer el archivo: {e}")
+    else:
+        barra.progress(1.0, text="Importación terminada")
+        st.success(f"{resumen['importadas']} de {resumen['procesadas']} filas importadas ✅")
+        if resumen["errores"]:
+            st.warning(f"{len(resumen['errores'])} filas con problemas:")
+            import pandas as pd  # solo cuando hay errores que listar
+
+            st.dataframe(
+                pd.DataFrame(resumen["errores"], columns=["Fila", "Error"]),
+                use_container_width=True,
+                hide_index=True,
+            )
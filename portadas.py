@@ -0,0 +1,181 @@
+import datetime
+import functools
+import html
+import io
+import logging
+import re
+
+import streamlit as st
+
+from cache_portadas import cache_activa, get_cache_portadas, precargar, url_local
+from indice_busqueda import normalizar
+
+logger = logging.getLogger("nbooks.portadas")
+
+BUCKET = "portadas_libros"
+PLACEHOLDER_URL = "https://placehold.co/200x300?text=Sin+portada"
+
+# Versiones que se generan de cada portada: nombre -> (ancho, alto).
+# Las de tamaño fijo son el doble de lo que se muestra para pantallas HiDPI;
+# la completa conserva la proporción original (alto None).
+RENDICIONES = {
+    "tarjeta": (300, 280),
+    "popover": (820, 420),
+    "completa": (1600, None),
+}
+# Versiones que se ofrecen en el srcset del catálogo (ningún hueco supera 820 px)
+RENDICIONES_GRID = ("tarjeta", "popover")
+
+CALIDAD = 82
+
+@functools.cache
+def formato_salida() -> tuple:
+    """``(formato, extension, content_type)``: WebP si Pillow lo soporta; si no, JPEG.
+
+    Pillow se importa recién al procesar una portada: mostrarlas no lo necesita.
+    """
+    from PIL import features
+
+    return ("WEBP", "webp", "image/webp") if features.check("webp") else ("JPEG", "jpg", "image/jpeg")
+
+#================== PROCESAMIENTO =========================
+
+def procesar_portada(datos: bytes) -> dict:
+    """Decodifica la imagen subida y devuelve ``{rendicion: bytes}``.
+
+    Se aplica la orientación EXIF y se descartan los metadatos (no se copia el
+    EXIF al guardar). Las versiones de tamaño fijo se recortan al centro.
+    """
+    from PIL import Image, ImageOps
+
+    formato = formato_salida()[0]
+    with Image.open(io.BytesIO(datos)) as original:
+        imagen = ImageOps.exif_transpose(original)
+        if imagen.mode in ("RGBA", "LA", "P"):
+            # Las transparencias se aplanan sobre blanco
+            imagen = imagen.convert("RGBA")
+            fondo = Image.new("RGB", imagen.size, "white")
+            fondo.paste(imagen, mask=imagen.getchannel("A"))
+            imagen = fondo
+        else:
+            imagen = imagen.convert("RGB")
+
+    rendiciones = {}
+    for nombre, (ancho, alto) in RENDICIONES.items():
+        if alto:
+            version = ImageOps.fit(imagen, (ancho, alto), Image.Resampling.LANCZOS)
+        else:
+            version = imagen.copy()
+            version.thumbnail((ancho, ancho * 2), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        version.save(buffer, formato, quality=CALIDAD, optimize=True)
+        rendiciones[nombre] = buffer.getvalue()
+    return rendiciones
+
+def carpeta_portada(nombre_libro: str, marca_tiempo: str) -> str:
+    """Carpeta (dentro del bucket) donde se guardan las versiones de una portada."""
+    slug = re.sub(r"[^a-z0-9]+", "_", normalizar(nombre_libro)).strip("_") or "libro"
+    return f"{slug}_{marca_tiempo}"
+
+def preparar_rendiciones(datos: bytes, nombre_libro: str) -> tuple:
+    """Procesa la portada y devuelve ``(portada_path, {ruta_en_el_bucket: bytes})``."""
+    carpeta = carpeta_portada(nombre_libro, datetime.datetime.now().strftime("%Y%m%d%H%M%S%f"))
+    extension = formato_salida()[1]
+    archivos = {
+        f"{carpeta}/{rendicion}.{extension}": contenido
+        for rendicion, contenido in procesar_portada(datos).items()
+    }
+    return f"{carpeta}/completa.{extension}", archivos
+
+def subir_rendiciones(supabase, datos: bytes, nombre_libro: str) -> str:
+    """Genera las versiones de la portada, las sube al bucket y devuelve el ``portada_path``."""
+    portada_path, archivos = preparar_rendiciones(datos, nombre_libro)
+    bucket = supabase.storage.from_(BUCKET)
+    content_type = formato_salida()[2]
+    for ruta, contenido in archivos.items():
+        # Las rutas no se reutilizan, así que el navegador puede cachearlas un año
+        bucket.upload(ruta, contenido, {"content-type": content_type, "cache-control": "31536000"})
+    return portada_path
+
+def ruta_rendicion(portada_path: str, rendicion: str) -> str:
+    """Ruta en el bucket de una versión concreta de la portada.
+
+    Las portadas nuevas se guardan como ``<carpeta>/completa.<ext>`` y las
+    demás versiones viven al lado. Las portadas antiguas (un único archivo)
+    se devuelven tal cual para cualquier versión.
+    """
+    carpeta, separador, archivo = portada_path.rpartition("/")
+    if separador and archivo.startswith("completa."):
+        return f"{carpeta}/{rendicion}.{archivo.split('.', 1)[1]}"
+    return portada_path
+
+def tiene_rendiciones(portada_path: str) -> bool:
+    """Indica si la portada se subió con el pipeline de versiones."""
+    return ruta_rendicion(portada_path, "tarjeta") != portada_path
+
+#================== URLS Y HTML =========================
+
+def url_publica(ruta: str) -> str:
+    """URL pública de un archivo del bucket de portadas.
+
+    Sin ``[supabase]`` en los secrets (backend local) no hay bucket público:
+    se devuelve el placeholder.
+    """
+    try:
+        base = st.secrets["supabase"]["url"].rstrip("/")
+    except (KeyError, FileNotFoundError):
+        return PLACEHOLDER_URL
+    return f"{base}/storage/v1/object/public/{BUCKET}/{ruta}"
+
+def url_portada(portada_path: str, rendicion: str = "completa") -> str:
+    """URL de una versión de la portada, o el placeholder si el libro no tiene.
+
+    Con la caché de portadas activa se sirve la copia local por la ruta
+    estática de Streamlit; si falla la descarga se usa la URL pública.
+    """
+    if not portada_path:
+        return PLACEHOLDER_URL
+    ruta = ruta_rendicion(portada_path, rendicion)
+    if cache_activa():
+        try:
+            return url_local(BUCKET, ruta)
+        except Exception:
+            logger.exception("No se pudo cachear la portada %s", ruta)
+    return url_publica(ruta)
+
+def imagen_portada(portada_path: str, rendicion: str = "completa") -> any:
+    """Portada lista para ``st.image``: bytes desde la caché local o una URL."""
+    if portada_path and cache_activa():
+        try:
+            return get_cache_portadas(BUCKET).obtener(ruta_rendicion(portada_path, rendicion))
+        except Exception:
+            logger.exception("No se pudo cachear la portada %s", portada_path)
+    return url_portada(portada_path, rendicion)
+
+def precargar_portadas(libros: list) -> None:
+    """Con la caché activa, descarga en paralelo las portadas que se van a mostrar."""
+    if cache_activa():
+        precargar(BUCKET, [
+            ruta_rendicion(libro["portada_path"], rendicion)
+            for libro in libros if libro.get("portada_path")
+            for rendicion in RENDICIONES_GRID
+        ])
+
+def img_portada_html(portada_path: str, ancho: int, alto: int, estilo: str = "") -> str:
+    """Etiqueta ``<img>`` de tamaño fijo con ``srcset`` y carga diferida.
+
+    El navegador elige la versión más chica que cubre ``ancho`` px con la
+    densidad de la pantalla.
+    """
+    atributos = f'src="{html.escape(url_portada(portada_path, "tarjeta"))}"'
+    if portada_path and tiene_rendiciones(portada_path):
+        srcset = ", ".join(
+            f"{html.escape(url_portada(portada_path, nombre))} {RENDICIONES[nombre][0]}w"
+            for nombre in RENDICIONES_GRID
+        )
+        atributos += f' srcset="{srcset}" sizes="{ancho}px"'
+    return (
+        f'<img {atributos} loading="lazy" decoding="async" width="{ancho}" height="{alto}" '
+        f'style="width: {ancho}px; height: {alto}px; object-fit: cover; {estilo}" '
+        f'alt="Portada del libro">'
+    )
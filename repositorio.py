@@ -0,0 +1,703 @@
+"""Acceso a los datos de la biblioteca detrás de una interfaz común.
+
+``RepositorioSupabase`` usa Supabase (PostgREST + Storage) y
+``RepositorioSQLite`` una base SQLite con las portadas en una carpeta local,
+para instalaciones de un solo usuario, pruebas reproducibles y para comparar
+costos de consultas. Se elige con ``backend = "supabase" | "sqlite"`` en la
+sección ``[nbooks]`` de los secrets.
+
+Las lecturas devuelven filas con el formato de la API (dicts, fechas como
+texto ISO); la caché y el resto de la lógica viven en utils.py.
+"""
+import contextlib
+import datetime
+import json
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import streamlit as st
+
+import calendario
+from configuracion import SQLITE_PORTADAS, SQLITE_RUTA, backend_local, config
+from indice_busqueda import normalizar
+from portadas import BUCKET, preparar_rendiciones, subir_rendiciones
+from sesiones import cliente_de_sesion
+from supabase_client import get_supabase_client, initialize_supabase_client
+
+TABLAS_LISTABLES = ("vista_libros", "autores", "tipos")
+COLUMNAS_LIBRO = (
+    "nombre", "autor_id", "portada_path", "estado_lectura", "en_kindle",
+    "descripcion", "fecha_inicio", "fecha_leido",
+)
+COLUMNAS_AUTORES = ("nombre", "libros", "leidos", "ultima_lectura")
+# Columnas de vista_libros que viajan en cada lectura. La descripción, que
+# puede ser larga, no va en ningún listado: se pide por id (detalle_libro).
+COLUMNAS_TARJETA = ("id", "nombre", "autor", "tipos", "tipos_lista", "estado_lectura", "en_kindle", "portada_path")
+COLUMNAS_LISTADO = (*COLUMNAS_TARJETA, "autor_id", "fecha_inicio", "fecha_leido")
+COLUMNAS_SINCRONIZADAS = (*COLUMNAS_LISTADO, "updated_at")  # sql/007
+COLUMNAS_DETALLE = ("id", "descripcion")
+# Peso de cada campo en el rango de la búsqueda (los de ts_rank_cd en sql/008)
+PESOS_BUSQUEDA = {"nombre": 1.0, "autor": 0.4, "tipos": 0.2, "descripcion": 0.1}
+
+#================== INTERFAZ =========================
+
+class Repositorio(ABC):
+    """Operaciones de lectura y escritura que usa la app sobre libros, autores, tipos, vínculos y portadas."""
+
+    # --- Lecturas ---
+
+    @abstractmethod
+    def listar(self, tabla: str) -> list:
+        """Todas las filas de ``vista_libros``, ``autores`` o ``tipos`` ordenadas por nombre."""
+
+    @abstractmethod
+    def listar_libros(self, columnas: tuple) -> list:
+        """Todos los libros de ``vista_libros``, solo con ``columnas``, ordenados por nombre."""
+
+    @abstractmethod
+    def detalle_libro(self, libro_id: int) -> dict:
+        """Las columnas de ``COLUMNAS_DETALLE`` de un libro, o ``None`` si no existe."""
+
+    @abstractmethod
+    def cambios_libros(self, desde: datetime.datetime, limite: int, usuario: str = None) -> tuple:
+        """``(libros, lapidas)`` de ``vista_libros`` modificados o borrados desde ``desde``.
+
+        Los libros traen ``COLUMNAS_SINCRONIZADAS`` y vienen ordenados por
+        ``updated_at`` (a lo sumo ``limite``); las lápidas son
+        ``{"libro_id", "eliminado_en"}``, solo las de ``usuario`` si se indica.
+        """
+
+    @abstractmethod
+    def pagina_libros(self, offset: int, limite: int) -> tuple:
+        """``(libros, total)`` de una ventana de ``vista_libros`` ordenada por nombre.
+
+        Las ventanas del catálogo traen solo ``COLUMNAS_TARJETA``.
+        """
+
+    @abstractmethod
+    def pagina_filtrada(self, filtros: dict, offset: int, limite: int) -> tuple:
+        """Como ``pagina_libros`` pero aplicando los filtros del catálogo."""
+
+    @abstractmethod
+    def buscar_libros(self, filtros: dict, offset: int, limite: int) -> tuple:
+        """Como ``pagina_filtrada``, pero ``filtros["busqueda"]`` también busca en la
+        descripción y los libros vienen ordenados por relevancia (``rango``)."""
+
+    @abstractmethod
+    def pagina_autores(self, prefijo: str, columna: str, descendente: bool, offset: int, limite: int) -> tuple:
+        """``(autores, total)`` con sus conteos; ``prefijo`` ya viene normalizado."""
+
+    @abstractmethod
+    def estadisticas(self) -> list:
+        """Agregados ``{"dimension", "clave", "cantidad"}`` (ver ``estadisticas.py``)."""
+
+    @abstractmethod
+    def lecturas_en_ventana(self, desde, hasta) -> list:
+        """Libros que pueden tocar la ventana; se afina con ``calendario.en_ventana``."""
+
+    @abstractmethod
+    def descargar_portada(self, ruta: str) -> bytes:
+        """Contenido de un archivo de portada."""
+
+    # --- Escrituras ---
+
+    @abstractmethod
+    def resolver_nombres(self, tabla: str, nombres) -> dict:
+        """``{nombre: id}`` de ``autores`` o ``tipos``, creando en bloque los que falten.
+
+        Los nombres se comparan normalizados (``nombre_busqueda``): cada uno de
+        los pedidos, con la grafía que traiga, sale con el id de la fila que ya
+        tenía esa clave o de la que se crea con la primera grafía del lote.
+        """
+
+    @abstractmethod
+    def registrar_libro(self, datos: dict, tipos_nombres: list) -> dict:
+        """Inserta un libro con sus tipos de forma atómica y devuelve la fila."""
+
+    @abstractmethod
+    def actualizar_libro(self, libro_id: int, datos: dict) -> None:
+        """Actualiza las columnas indicadas de un libro."""
+
+    @abstractmethod
+    def guardar_libros(self, libros: list) -> list:
+        """Inserta o actualiza libros por (nombre, autor_id) y devuelve las filas con su id."""
+
+    @abstractmethod
+    def vincular_tipos(self, pares) -> None:
+        """Agrega vínculos ``(libro_id, tipo_id)``; los existentes se ignoran."""
+
+    @abstractmethod
+    def desvincular_tipos(self, libro_id: int, tipo_ids: list) -> None:
+        """Quita de un libro los tipos indicados."""
+
+    @abstractmethod
+    def subir_portada(self, datos: bytes, nombre_libro: str) -> str:
+        """Guarda las versiones de la portada y devuelve el ``portada_path``."""
+
+#================== SUPABASE =========================
+
+def _escapar_like(texto: str) -> str:
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _patron_ilike(texto: str) -> str:
+    """Devuelve ``%texto%`` con los comodines de LIKE escapados."""
+    return f"%{_escapar_like(texto)}%"
+
+def _patron_prefijo(texto: str) -> str:
+    """Devuelve ``texto%`` con los comodines de LIKE escapados."""
+    return f"{_escapar_like(texto)}%"
+
+def _claves_nombres(nombres) -> tuple:
+    """``(nombres, {clave normalizada: primer nombre con esa clave})`` sin los vacíos."""
+    nombres = [n for n in nombres if normalizar(n)]
+    claves = {}
+    for nombre in nombres:
+        claves.setdefault(normalizar(nombre), nombre.strip())
+    return nombres, claves
+
+class RepositorioSupabase(Repositorio):
+    """Repositorio sobre PostgREST y Supabase Storage (requiere los scripts de sql/)."""
+
+    def __init__(self, supabase):
+        self.supabase = supabase
+
+    def listar(self, tabla: str) -> list:
+        return self.supabase.table(tabla).select("*").order("nombre").execute().data or []
+
+    def listar_libros(self, columnas: tuple) -> list:
+        return self.supabase.table("vista_libros").select(", ".join(columnas)).order("nombre").execute().data or []
+
+    def detalle_libro(self, libro_id: int) -> dict:
+        # Directo de libros: no hace falta armar autor y tipos
+        filas = (
+            self.supabase.table("libros")
+            .select(", ".join(COLUMNAS_DETALLE))
+            .eq("id", libro_id)
+            .limit(1)
+            .execute()
+            .data
+        )
+        return filas[0] if filas else None
+
+    def cambios_libros(self, desde: datetime.datetime, limite: int, usuario: str = None) -> tuple:
+        # updated_at y libros_eliminados de sql/007_sincronizacion.sql
+        libros = (
+            self.supabase.table("vista_libros")
+            .select(", ".join(COLUMNAS_SINCRONIZADAS))
+            .gte("updated_at", desde.isoformat())
+            .order("updated_at")
+            .limit(limite)
+            .execute()
+            .data or []
+        )
+        consulta = (
+            self.supabase.table("libros_eliminados")
+            .select("libro_id, eliminado_en")
+            .gte("eliminado_en", desde.isoformat())
+        )
+        if usuario:
+            # Dueño de sql/011_lapidas_por_usuario.sql; RLS ya lo exige y así usa el índice
+            consulta = consulta.eq("user_id", usuario)
+        lapidas = consulta.execute().data or []
+        return libros, lapidas
+
+    def pagina_libros(self, offset: int, limite: int) -> tuple:
+        result = (
+            self.supabase.table("vista_libros")
+            .select(", ".join(COLUMNAS_TARJETA), count="exact")
+            .order("nombre")
+            .range(offset, offset + limite - 1)
+            .execute()
+        )
+        return result.data or [], result.count or 0
+
+    def _consulta_filtrada(self, filtros: dict, count: str = None):
+        """Traduce los filtros del catálogo a una consulta de PostgREST."""
+        # vista_libros_busqueda (sql/001) agrega columnas sin tildes para que el
+        # filtro de texto se comporte igual que el índice local.
+        consulta = self.supabase.table("vista_libros_busqueda").select(", ".join(COLUMNAS_TARJETA), count=count)
+
+        if filtros.get("estado"):
+            consulta = consulta.eq("estado_lectura", filtros["estado"])
+        if filtros.get("autor"):
+            consulta = consulta.ilike("autor_busqueda", _patron_ilike(normalizar(filtros["autor"])))
+        if filtros.get("busqueda"):
+            consulta = consulta.ilike("texto_busqueda", _patron_ilike(normalizar(filtros["busqueda"])))
+        if filtros.get("tipo"):
+            # Pertenencia exacta sobre el JSON de tipos (sql/005): tipos_lista @> [{"nombre": ...}]
+            consulta = consulta.contains("tipos_lista", json.dumps([{"nombre": filtros["tipo"]}]))
+
+        return consulta.order("nombre")
+
+    def pagina_filtrada(self, filtros: dict, offset: int, limite: int) -> tuple:
+        result = self._consulta_filtrada(filtros, count="exact").range(offset, offset + limite - 1).execute()
+        return result.data or [], result.count or 0
+
+    def buscar_libros(self, filtros: dict, offset: int, limite: int) -> tuple:
+        # Función buscar_libros de sql/008_busqueda_texto.sql: tsvector + pg_trgm
+        # (desde sql/009 devuelve solo COLUMNAS_TARJETA)
+        resultado = self.supabase.rpc("buscar_libros", {
+            "p_texto": filtros.get("busqueda") or "",
+            "p_estado": filtros.get("estado") or None,
+            "p_autor": filtros.get("autor") or None,
+            "p_tipo": filtros.get("tipo") or None,
+            "p_desplazamiento": offset,
+            "p_limite": limite,
+        }).execute().data or {}
+        return resultado.get("libros") or [], resultado.get("total") or 0
+
+    def pagina_autores(self, prefijo: str, columna: str, descendente: bool, offset: int, limite: int) -> tuple:
+        # vista_autores (sql/006) trae los conteos y nombre_busqueda indexado
+        consulta = self.supabase.table("vista_autores").select("id, nombre, libros, leidos, ultima_lectura", count="exact")
+        if prefijo:
+            consulta = consulta.like("nombre_busqueda", _patron_prefijo(prefijo))
+        result = (
+            consulta.order(columna, desc=descendente, nullsfirst=False)
+            .order("nombre")
+            .order("id")
+            .range(offset, offset + limite - 1)
+            .execute()
+        )
+        return result.data or [], result.count or 0
+
+    def estadisticas(self) -> list:
+        # vista_estadisticas (sql/004), mantenida por triggers
+        return self.supabase.table("vista_estadisticas").select("*").execute().data or []
+
+    def lecturas_en_ventana(self, desde, hasta) -> list:
+        return (
+            self.supabase.table("vista_libros")
+            .select("id, nombre, estado_lectura, fecha_inicio, fecha_leido")
+            .or_(calendario.filtro_ventana(desde, hasta))
+            .execute()
+            .data or []
+        )
+
+    def descargar_portada(self, ruta: str) -> bytes:
+        return self.supabase.storage.from_(BUCKET).download(ruta)
+
+    def resolver_nombres(self, tabla: str, nombres) -> dict:
+        # Requiere la clave única sobre `nombre_busqueda` de sql/010_nombres_normalizados.sql
+        nombres, claves = _claves_nombres(nombres)
+        if not claves:
+            return {}
+        # Las claves que ya existen no se tocan: el nombre guardado conserva su grafía
+        self.supabase.table(tabla).upsert(
+            [{"nombre": n, "nombre_busqueda": c} for c, n in claves.items()],
+            on_conflict="nombre_busqueda", ignore_duplicates=True,
+        ).execute()
+        filas = (
+            self.supabase.table(tabla).select("id, nombre_busqueda")
+            .in_("nombre_busqueda", list(claves)).execute().data or []
+        )
+        ids = {f["nombre_busqueda"]: f["id"] for f in filas}
+        return {n: ids[normalizar(n)] for n in nombres if normalizar(n) in ids}
+
+    def registrar_libro(self, datos: dict, tipos_nombres: list) -> dict:
+        # Función registrar_libro de sql/002_registrar_libro.sql
+        result = self.supabase.rpc("registrar_libro", {
+            "p_nombre": datos["nombre"],
+            "p_autor_id": datos.get("autor_id"),
+            "p_portada_path": datos.get("portada_path"),
+            "p_estado_lectura": datos.get("estado_lectura"),
+            "p_en_kindle": datos.get("en_kindle", False),
+            "p_tipos": list(tipos_nombres),
+        }).execute()
+        return result.data[0] if isinstance(result.data, list) else result.data
+
+    def actualizar_libro(self, libro_id: int, datos: dict) -> None:
+        self.supabase.table("libros").update(datos).eq("id", libro_id).execute()
+
+    def guardar_libros(self, libros: list) -> list:
+        if not libros:
+            return []
+        return self.supabase.table("libros").upsert(libros, on_conflict="nombre,autor_id").execute().data or []
+
+    def vincular_tipos(self, pares) -> None:
+        filas = [{"libro_id": libro_id, "tipo_id": tipo_id} for libro_id, tipo_id in pares]
+        if filas:
+            self.supabase.table("libro_tipos").upsert(
+                filas, on_conflict="libro_id,tipo_id", ignore_duplicates=True
+            ).execute()
+
+    def desvincular_tipos(self, libro_id: int, tipo_ids: list) -> None:
+        if tipo_ids:
+            self.supabase.table("libro_tipos").delete().eq("libro_id", libro_id).in_("tipo_id", list(tipo_ids)).execute()
+
+    def subir_portada(self, datos: bytes, nombre_libro: str) -> str:
+        return subir_rendiciones(self.supabase, datos, nombre_libro)
+
+#================== SQLITE =========================
+
+ESQUEMA_SQLITE = Path(__file__).parent / "sql" / "sqlite" / "esquema.sql"
+COLUMNAS_VISTA_LIBROS = (*COLUMNAS_SINCRONIZADAS, "descripcion")
+# Mayor que cualquier texto que empiece con el prefijo (búsqueda por rango indexada)
+_FIN_PREFIJO = "\U0010ffff"
+
+def _marca_sqlite(instante: datetime.datetime) -> str:
+    """Formato de ``updated_at`` en SQLite (UTC con milisegundos), comparable como texto."""
+    return instante.astimezone(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+def _migrar(conexion: sqlite3.Connection) -> None:
+    """Pone al día una base creada con una versión anterior de esquema.sql."""
+    columnas = {fila[1] for fila in conexion.execute("pragma table_info(libros)")}
+    if columnas and "updated_at" not in columnas:
+        conexion.execute("alter table libros add column updated_at text")
+        conexion.execute("drop view if exists vista_libros")
+    columnas = {fila[1] for fila in conexion.execute("pragma table_info(tipos)")}
+    if columnas and "nombre_busqueda" not in columnas:
+        # Como sql/010: los tipos también son únicos por nombre normalizado
+        with conexion:
+            conexion.execute("alter table tipos add column nombre_busqueda text")
+            conexion.execute("update tipos set nombre_busqueda = normalizar(nombre)")
+
+def _fila_libro(fila: sqlite3.Row) -> dict:
+    libro = dict(fila)
+    if "en_kindle" in libro:
+        libro["en_kindle"] = bool(libro["en_kindle"])
+    if isinstance(libro.get("tipos_lista"), str):
+        libro["tipos_lista"] = json.loads(libro["tipos_lista"])
+    return libro
+
+class RepositorioSQLite(Repositorio):
+    """Repositorio sobre una base SQLite local y una carpeta con las portadas.
+
+    Cada hilo usa su propia conexión. Con ``":memory:"`` cada conexión sería
+    una base distinta (el hilo que refresca la caché o el de las escrituras
+    no verían los datos), así que todos los hilos comparten una sola y se
+    turnan con un lock. Los filtros de texto usan la función ``normalizar``
+    registrada en SQLite, así que coinciden con el índice local.
+    """
+
+    def __init__(self, ruta: str, carpeta_portadas: str):
+        self.ruta = str(ruta)
+        self.carpeta_portadas = Path(carpeta_portadas)
+        self._local = threading.local()
+        self._compartida = None
+        self._bloqueo = contextlib.nullcontext()
+        if self.ruta == ":memory:":
+            self._compartida = self._conectar(check_same_thread=False)
+            self._bloqueo = threading.RLock()
+        else:
+            Path(self.ruta).parent.mkdir(parents=True, exist_ok=True)
+        self.carpeta_portadas.mkdir(parents=True, exist_ok=True)
+        with self._bloqueo:
+            conexion = self._conexion()
+            _migrar(conexion)
+            conexion.executescript(ESQUEMA_SQLITE.read_text(encoding="utf-8"))
+
+    def _conectar(self, **opciones) -> sqlite3.Connection:
+        conexion = sqlite3.connect(self.ruta, **opciones)
+        conexion.row_factory = sqlite3.Row
+        conexion.execute("pragma foreign_keys = on")
+        if self.ruta != ":memory:":
+            conexion.execute("pragma journal_mode = wal")
+        conexion.create_function("normalizar", 1, normalizar, deterministic=True)
+        return conexion
+
+    def _conexion(self) -> sqlite3.Connection:
+        if self._compartida is not None:
+            return self._compartida
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            conexion = self._local.conexion = self._conectar()
+        return conexion
+
+    @contextlib.contextmanager
+    def _transaccion(self):
+        """Conexión en una transacción: commit al salir, rollback si algo falla."""
+        with self._bloqueo:
+            conexion = self._conexion()
+            with conexion:
+                yield conexion
+
+    def _consultar(self, sql: str, parametros=()) -> list:
+        with self._bloqueo:
+            return self._conexion().execute(sql, parametros).fetchall()
+
+    # --- Lecturas ---
+
+    def listar(self, tabla: str) -> list:
+        if tabla not in TABLAS_LISTABLES:
+            raise ValueError(f"Tabla desconocida: {tabla}")
+        return [_fila_libro(f) for f in self._consultar(f"select * from {tabla} order by nombre")]
+
+    def listar_libros(self, columnas: tuple) -> list:
+        desconocidas = set(columnas) - set(COLUMNAS_VISTA_LIBROS)
+        if desconocidas:
+            raise ValueError(f"Columnas desconocidas: {', '.join(sorted(desconocidas))}")
+        return [_fila_libro(f) for f in self._consultar(f"select {', '.join(columnas)} from vista_libros order by nombre")]
+
+    def detalle_libro(self, libro_id: int) -> dict:
+        filas = self._consultar(f"select {', '.join(COLUMNAS_DETALLE)} from libros where id = ?", [libro_id])
+        return dict(filas[0]) if filas else None
+
+    def _pagina(self, donde: str, parametros: list, offset: int, limite: int,
+                orden: str = "v.nombre", parametros_orden: list = ()) -> tuple:
+        total = self._consultar(f"select count(*) from vista_libros v {donde}", parametros)[0][0]
+        columnas = ", ".join(f"v.{c}" for c in COLUMNAS_TARJETA)
+        filas = self._consultar(
+            f"select {columnas} from vista_libros v {donde} order by {orden} limit ? offset ?",
+            [*parametros, *parametros_orden, limite, offset],
+        )
+        return [_fila_libro(f) for f in filas], total
+
+    def cambios_libros(self, desde: datetime.datetime, limite: int, usuario: str = None) -> tuple:
+        # Un solo usuario local: las lápidas no tienen dueño
+        marca = _marca_sqlite(desde)
+        libros = self._consultar(
+            f"select {', '.join(COLUMNAS_SINCRONIZADAS)} from vista_libros where updated_at >= ? order by updated_at limit ?",
+            [marca, limite],
+        )
+        lapidas = self._consultar(
+            "select libro_id, eliminado_en from libros_eliminados where eliminado_en >= ?", [marca]
+        )
+        return [_fila_libro(f) for f in libros], [dict(f) for f in lapidas]
+
+    def pagina_libros(self, offset: int, limite: int) -> tuple:
+        return self._pagina("", [], offset, limite)
+
+    def _condiciones(self, filtros: dict) -> tuple:
+        condiciones, parametros = [], []
+        if filtros.get("estado"):
+            condiciones.append("v.estado_lectura = ?")
+            parametros.append(filtros["estado"])
+        if filtros.get("autor"):
+            condiciones.append("normalizar(v.autor) like ? escape '\\'")
+            parametros.append(_patron_ilike(normalizar(filtros["autor"])))
+        if filtros.get("busqueda"):
+            # Mismo texto que indexa IndiceCatalogo: "titulo autor tipos"
+            condiciones.append(
+                "normalizar(ifnull(v.nombre, '') || ' ' || ifnull(v.autor, '') || ' ' || ifnull(v.tipos, '')) "
+                "like ? escape '\\'"
+            )
+            parametros.append(_patron_ilike(normalizar(filtros["busqueda"])))
+        if filtros.get("tipo"):
+            condiciones.append(
+                "exists (select 1 from libro_tipos lt join tipos t on t.id = lt.tipo_id "
+                "where lt.libro_id = v.id and t.nombre = ?)"
+            )
+            parametros.append(filtros["tipo"])
+        return condiciones, parametros
+
+    def pagina_filtrada(self, filtros: dict, offset: int, limite: int) -> tuple:
+        condiciones, parametros = self._condiciones(filtros)
+        donde = f"where {' and '.join(condiciones)}" if condiciones else ""
+        return self._pagina(donde, parametros, offset, limite)
+
+    def buscar_libros(self, filtros: dict, offset: int, limite: int) -> tuple:
+        # Sin índice de texto completo: cada palabra tiene que aparecer en algún
+        # campo y el rango suma dónde aparece, con los pesos de sql/008 (sin
+        # tolerancia a errores de tipeo)
+        palabras = normalizar(filtros.get("busqueda") or "").split()
+        if not palabras:
+            return self.pagina_filtrada(filtros, offset, limite)
+        condiciones, parametros = self._condiciones({**filtros, "busqueda": None})
+        rango, parametros_rango = [], []
+        for palabra in palabras:
+            patron = _patron_ilike(palabra)
+            condiciones.append(
+                "normalizar(" + " || ' ' || ".join(f"ifnull(v.{c}, '')" for c in PESOS_BUSQUEDA) + ") like ? escape '\\'"
+            )
+            parametros.append(patron)
+            for columna, peso in PESOS_BUSQUEDA.items():
+                rango.append(f"{peso} * (normalizar(ifnull(v.{columna}, '')) like ? escape '\\')")
+                parametros_rango.append(patron)
+        orden = f"({' + '.join(rango)}) desc, v.nombre, v.id"
+        return self._pagina(f"where {' and '.join(condiciones)}", parametros, offset, limite, orden, parametros_rango)
+
+    def pagina_autores(self, prefijo: str, columna: str, descendente: bool, offset: int, limite: int) -> tuple:
+        if columna not in COLUMNAS_AUTORES:
+            raise ValueError(f"Orden desconocido: {columna}")
+        donde, parametros = "", []
+        if prefijo:
+            donde = "where a.nombre_busqueda >= ? and a.nombre_busqueda < ?"
+            parametros = [prefijo, prefijo + _FIN_PREFIJO]
+        total = self._consultar(f"select count(*) from autores a {donde}", parametros)[0][0]
+        filas = self._consultar(
+            f"""
+            select * from (
+                select a.id, a.nombre, count(l.id) as libros,
+                       count(case when l.estado_lectura = 'Leído' then 1 end) as leidos,
+                       max(l.fecha_leido) as ultima_lectura
+                from autores a left join libros l on l.autor_id = a.id
+                {donde}
+                group by a.id
+            )
+            order by {columna} {'desc' if descendente else 'asc'} nulls last, nombre, id
+            limit ? offset ?
+            """,
+            [*parametros, limite, offset],
+        )
+        return [dict(f) for f in filas], total
+
+    def estadisticas(self) -> list:
+        filas = self._consultar(
+            """
+            select 'mes' as dimension, substr(fecha_leido, 1, 7) as clave, count(*) as cantidad
+            from libros where fecha_leido is not null group by 2
+            union all
+            select 'estado', estado_lectura, count(*)
+            from libros where estado_lectura is not null group by 2
+            union all
+            select 'tipo', t.nombre, count(*)
+            from libro_tipos lt join tipos t on t.id = lt.tipo_id group by t.id
+            """
+        )
+        return [dict(f) for f in filas]
+
+    def lecturas_en_ventana(self, desde, hasta) -> list:
+        # Las mismas condiciones que calendario.filtro_ventana
+        filas = self._consultar(
+            """
+            select id, nombre, estado_lectura, fecha_inicio, fecha_leido from libros
+            where (fecha_inicio <= :hasta and fecha_leido >= :desde)
+               or (fecha_leido <= :hasta and fecha_inicio >= :desde)
+               or (fecha_inicio is null and fecha_leido between :desde and :hasta)
+               or (fecha_leido is null and fecha_inicio between :desde and :hasta)
+               or (fecha_leido is null and fecha_inicio <= :hasta and estado_lectura = :en_proceso)
+            """,
+            {"desde": desde.isoformat(), "hasta": hasta.isoformat(), "en_proceso": calendario.EN_PROCESO},
+        )
+        return [dict(f) for f in filas]
+
+    def _archivo_portada(self, ruta: str) -> Path:
+        archivo = (self.carpeta_portadas / ruta).resolve()
+        if self.carpeta_portadas.resolve() not in archivo.parents:
+            raise ValueError(f"Ruta de portada inválida: {ruta}")
+        return archivo
+
+    def descargar_portada(self, ruta: str) -> bytes:
+        return self._archivo_portada(ruta).read_bytes()
+
+    # --- Escrituras ---
+
+    def resolver_nombres(self, tabla: str, nombres) -> dict:
+        if tabla not in ("autores", "tipos"):
+            raise ValueError(f"Tabla desconocida: {tabla}")
+        nombres, claves = _claves_nombres(nombres)
+        if not claves:
+            return {}
+        with self._transaccion() as conexion:
+            conexion.executemany(
+                f"insert into {tabla} (nombre, nombre_busqueda) values (?, ?) on conflict do nothing",
+                [(n, c) for c, n in claves.items()],
+            )
+        marcadores = ", ".join("?" * len(claves))
+        filas = self._consultar(
+            f"select id, nombre_busqueda from {tabla} where nombre_busqueda in ({marcadores})", list(claves)
+        )
+        ids = {f["nombre_busqueda"]: f["id"] for f in filas}
+        return {n: ids[normalizar(n)] for n in nombres if normalizar(n) in ids}
+
+    def _fila(self, libro_id: int) -> dict:
+        return _fila_libro(self._consultar("select * from libros where id = ?", [libro_id])[0])
+
+    def registrar_libro(self, datos: dict, tipos_nombres: list) -> dict:
+        tipos_nombres = list(tipos_nombres)
+        with self._transaccion() as conexion:
+            marcadores = ", ".join("?" * len(tipos_nombres))
+            tipos = {
+                f["nombre"]: f["id"]
+                for f in (self._consultar(f"select id, nombre from tipos where nombre in ({marcadores})", tipos_nombres)
+                          if tipos_nombres else [])
+            }
+            faltantes = [n for n in tipos_nombres if n not in tipos]
+            if faltantes:
+                raise ValueError(f"Tipos inexistentes: {', '.join(faltantes)}")
+            cursor = conexion.execute(
+                "insert into libros (nombre, autor_id, portada_path, estado_lectura, en_kindle) values (?, ?, ?, ?, ?)",
+                [datos["nombre"], datos.get("autor_id"), datos.get("portada_path"),
+                 datos.get("estado_lectura"), datos.get("en_kindle", False)],
+            )
+            conexion.executemany(
+                "insert into libro_tipos (libro_id, tipo_id) values (?, ?)",
+                [(cursor.lastrowid, tipo_id) for tipo_id in tipos.values()],
+            )
+        return self._fila(cursor.lastrowid)
+
+    def actualizar_libro(self, libro_id: int, datos: dict) -> None:
+        columnas = [c for c in datos if c in COLUMNAS_LIBRO]
+        if not columnas:
+            return
+        with self._transaccion() as conexion:
+            conexion.execute(
+                f"update libros set {', '.join(f'{c} = ?' for c in columnas)} where id = ?",
+                [*(datos[c] for c in columnas), libro_id],
+            )
+
+    def guardar_libros(self, libros: list) -> list:
+        guardados = []
+        with self._transaccion() as conexion:
+            for libro in libros:
+                columnas = [c for c in libro if c in COLUMNAS_LIBRO]
+                existente = conexion.execute(
+                    "select id from libros where nombre = ? and autor_id is ?",
+                    [libro["nombre"], libro.get("autor_id")],
+                ).fetchone()
+                if existente:
+                    libro_id = existente["id"]
+                    conexion.execute(
+                        f"update libros set {', '.join(f'{c} = ?' for c in columnas)} where id = ?",
+                        [*(libro[c] for c in columnas), libro_id],
+                    )
+                else:
+                    libro_id = conexion.execute(
+                        f"insert into libros ({', '.join(columnas)}) values ({', '.join('?' * len(columnas))})",
+                        [libro[c] for c in columnas],
+                    ).lastrowid
+                guardados.append({**libro, "id": libro_id})
+        return guardados
+
+    def vincular_tipos(self, pares) -> None:
+        with self._transaccion() as conexion:
+            conexion.executemany("insert or ignore into libro_tipos (libro_id, tipo_id) values (?, ?)", list(pares))
+
+    def desvincular_tipos(self, libro_id: int, tipo_ids: list) -> None:
+        tipo_ids = list(tipo_ids)
+        if tipo_ids:
+            with self._transaccion() as conexion:
+                conexion.execute(
+                    f"delete from libro_tipos where libro_id = ? and tipo_id in ({', '.join('?' * len(tipo_ids))})",
+                    [libro_id, *tipo_ids],
+                )
+
+    def subir_portada(self, datos: bytes, nombre_libro: str) -> str:
+        portada_path, archivos = preparar_rendiciones(datos, nombre_libro)
+        for ruta, contenido in archivos.items():
+            archivo = self._archivo_portada(ruta)
+            archivo.parent.mkdir(parents=True, exist_ok=True)
+            archivo.write_bytes(contenido)
+        return portada_path
+
+#================== ACCESO =========================
+
+@st.cache_resource
+def get_repositorio() -> Repositorio:
+    """Devuelve el repositorio configurado, compartido globalmente."""
+    if backend_local():
+        return RepositorioSQLite(config("sqlite_ruta", SQLITE_RUTA), config("sqlite_portadas", SQLITE_PORTADAS))
+    return RepositorioSupabase(get_supabase_client())
+
+def repositorio_de_sesion() -> Repositorio:
+    """Repositorio de la sesión: en Supabase, con su cliente autenticado (lecturas y escrituras).
+
+    Sin sesión de Supabase (backend local, scripts, benchmarks) es el mismo
+    que ``get_repositorio()``. Puede lanzar ``sesiones.SesionExpirada``.
+    """
+    repositorio = get_repositorio()
+    cliente = cliente_de_sesion() if isinstance(repositorio, RepositorioSupabase) else None
+    return RepositorioSupabase(cliente) if cliente is not None else repositorio
+
+def repositorio_desde_archivo(ruta: str = ".streamlit/secrets.toml") -> Repositorio:
+    """Crea el repositorio configurado en un archivo de secrets (para los scripts de terminal)."""
+    import tomllib
+
+    with open(ruta, "rb") as f:
+        secrets = tomllib.load(f)
+    opciones = secrets.get("nbooks", {})
+    if opciones.get("backend", "supabase") == "sqlite":
+        return RepositorioSQLite(opciones.get("sqlite_ruta", SQLITE_RUTA), opciones.get("sqlite_portadas", SQLITE_PORTADAS))
+    return RepositorioSupabase(initialize_supabase_client(secrets))
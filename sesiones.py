@@ -0,0 +1,220 @@
+"""Clientes de Supabase autenticados, uno por sesión de Streamlit.
+
+El cliente global (``get_supabase_client``) nunca inicia sesión. Cada usuario
+que entra recibe su propio cliente con su token, así dos sesiones no se pisan
+el estado de auth y las lecturas y escrituras corren con la identidad del
+usuario (RLS). Las lecturas se cachean por usuario (``usuario_de_sesion``).
+Todos comparten el pool de conexiones de supabase_client.py: un cliente nuevo
+es solo un objeto, no abre conexiones.
+
+``PoolSesiones`` lleva las sesiones con cliente vivo. Un hilo en segundo plano
+renueva los tokens antes de que venzan y desaloja los clientes que llevan
+``INACTIVIDAD`` segundos sin usarse; los tokens quedan en ``st.session_state``
+y el cliente se recrea en el próximo uso.
+"""
+import logging
+import threading
+import time
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from instrumentacion import instrumentar
+from supabase_client import initialize_supabase_client
+
+logger = logging.getLogger("nbooks.sesiones")
+
+CLAVE_SESION = "_sesion_supabase"
+# Segundos sin uso tras los que se desaloja el cliente (los tokens se conservan)
+INACTIVIDAD = 15 * 60
+# Los tokens se renuevan cuando les queda menos que esto (segundos)
+MARGEN_RENOVACION = 5 * 60
+INTERVALO_BARRIDO = 60
+
+class SesionExpirada(Exception):
+    """Los tokens de la sesión ya no sirven: hay que volver a iniciar sesión."""
+
+class _Sesion:
+    """Tokens de una sesión y su cliente (``None`` mientras está desalojada)."""
+
+    def __init__(self, sesion_auth, usuario: str = None):
+        self.lock = threading.Lock()
+        self.cliente = None
+        self.usuario = usuario  # id del usuario en Supabase
+        self.ultimo_uso = time.monotonic()
+        self.guardar_tokens(sesion_auth)
+
+    def guardar_tokens(self, sesion_auth) -> None:
+        self.access_token = sesion_auth.access_token
+        self.refresh_token = sesion_auth.refresh_token
+        self.expira = sesion_auth.expires_at or 0  # epoch, en segundos
+
+class PoolSesiones:
+    """Clientes autenticados por sesión, con renovación y desalojo en segundo plano."""
+
+    def __init__(self, crear_cliente: callable, inactividad: float = INACTIVIDAD,
+                 margen: float = MARGEN_RENOVACION, intervalo: float = INTERVALO_BARRIDO):
+        self._crear_cliente = crear_cliente
+        self.inactividad = inactividad
+        self.margen = margen
+        self._lock = threading.Lock()
+        self._activas = {}  # id de la sesión de Streamlit -> _Sesion con cliente
+        if intervalo:
+            threading.Thread(target=self._barrer_cada, args=(intervalo,), daemon=True, name="nbooks-sesiones").start()
+
+    def iniciar(self, id_sesion: str, email: str, password: str, anterior: _Sesion = None) -> tuple:
+        """Inicia sesión con un cliente nuevo; devuelve ``(respuesta_auth, sesion)``.
+
+        Si la sesión de Streamlit ya tenía una (viva en el pool o ``anterior``,
+        aunque esté desalojada), se cierra en Supabase y se suelta su cliente.
+        """
+        cliente = self._crear_cliente()
+        respuesta = cliente.auth.sign_in_with_password({"email": email, "password": password})
+        sesion = _Sesion(respuesta.session, getattr(respuesta.user, "id", None))
+        sesion.cliente = cliente
+        with self._lock:
+            reemplazada = self._activas.get(id_sesion) or anterior
+            self._activas[id_sesion] = sesion
+        if reemplazada is not None and reemplazada is not sesion:
+            self._cerrar_auth(reemplazada)
+        return respuesta, sesion
+
+    def registrar(self, email: str, password: str):
+        """Crea la cuenta con un cliente descartable (la sesión empieza al iniciarla)."""
+        return self._crear_cliente().auth.sign_up({"email": email, "password": password})
+
+    def cliente(self, id_sesion: str, sesion: _Sesion):
+        """Cliente de la sesión, recreándolo con sus tokens si fue desalojado."""
+        with sesion.lock:
+            sesion.ultimo_uso = time.monotonic()
+            if sesion.cliente is None:
+                from supabase_auth.errors import AuthError, AuthRetryableError
+
+                cliente = self._crear_cliente()
+                try:
+                    # Si el access token venció, set_session lo renueva
+                    respuesta = cliente.auth.set_session(sesion.access_token, sesion.refresh_token)
+                except AuthRetryableError:
+                    raise  # falla de red: los tokens pueden seguir sirviendo
+                except AuthError as e:
+                    raise SesionExpirada("La sesión expiró: vuelve a iniciar sesión.") from e
+                sesion.guardar_tokens(respuesta.session)
+                sesion.cliente = cliente
+            cliente = sesion.cliente
+        with self._lock:
+            self._activas[id_sesion] = sesion
+        return cliente
+
+    def cerrar(self, id_sesion: str, sesion: _Sesion) -> None:
+        """Cierra la sesión en Supabase (solo esta, no las otras del usuario) y suelta el cliente."""
+        with self._lock:
+            if self._activas.get(id_sesion) is sesion:
+                del self._activas[id_sesion]
+        self._cerrar_auth(sesion)
+
+    def _cerrar_auth(self, sesion: _Sesion) -> None:
+        try:
+            with sesion.lock:
+                cliente, sesion.cliente = sesion.cliente, None
+                if cliente is None:
+                    # Desalojada: hace falta un cliente con sus tokens para revocarlos
+                    cliente = self._crear_cliente()
+                    cliente.auth.set_session(sesion.access_token, sesion.refresh_token)
+            cliente.auth.sign_out({"scope": "local"})
+        except Exception:
+            logger.warning("No se pudo cerrar la sesión en Supabase", exc_info=True)
+
+    def activas(self) -> int:
+        with self._lock:
+            return len(self._activas)
+
+    def barrer(self) -> dict:
+        """Desaloja los clientes inactivos y renueva los tokens por vencer."""
+        with self._lock:
+            sesiones = list(self._activas.items())
+        ahora, resumen = time.monotonic(), {"desalojadas": 0, "renovadas": 0}
+        for id_sesion, sesion in sesiones:
+            with sesion.lock:
+                if sesion.cliente is not None and ahora - sesion.ultimo_uso > self.inactividad:
+                    sesion.cliente = None
+                    resumen["desalojadas"] += 1
+                elif sesion.cliente is not None and sesion.expira - time.time() < self.margen:
+                    resumen["renovadas" if self._renovar(sesion) else "desalojadas"] += 1
+            if sesion.cliente is None:
+                with self._lock:
+                    if self._activas.get(id_sesion) is sesion:
+                        del self._activas[id_sesion]
+        return resumen
+
+    def _renovar(self, sesion: _Sesion) -> bool:
+        try:
+            sesion.guardar_tokens(sesion.cliente.auth.refresh_session().session)
+            return True
+        except Exception:
+            # Se reintenta en el próximo uso, con set_session
+            logger.warning("No se pudo renovar el token de una sesión", exc_info=True)
+            sesion.cliente = None
+            return False
+
+    def _barrer_cada(self, intervalo: float) -> None:
+        while True:
+            time.sleep(intervalo)
+            try:
+                self.barrer()
+            except Exception:
+                logger.exception("Falló el barrido de sesiones")
+
+@st.cache_resource
+def get_pool_sesiones() -> PoolSesiones:
+    """Devuelve el pool de sesiones, compartido globalmente."""
+    secrets = st.secrets.to_dict()
+    return PoolSesiones(lambda: instrumentar(initialize_supabase_client(secrets)))
+
+#================== SESIÓN ACTUAL =========================
+
+def _id_sesion() -> str:
+    return get_script_run_ctx().session_id
+
+def iniciar_sesion(email: str, password: str):
+    """Inicia sesión con un cliente propio de esta sesión y devuelve la respuesta de auth."""
+    anterior = st.session_state.get(CLAVE_SESION)
+    respuesta, sesion = get_pool_sesiones().iniciar(_id_sesion(), email, password, anterior)
+    st.session_state[CLAVE_SESION] = sesion
+    return respuesta
+
+def registrar_usuario(email: str, password: str):
+    """Crea una cuenta (no inicia sesión: hay que confirmar el correo)."""
+    return get_pool_sesiones().registrar(email, password)
+
+def cerrar_sesion() -> None:
+    """Cierra la sesión de Supabase de esta sesión de Streamlit, si la hay."""
+    sesion = st.session_state.pop(CLAVE_SESION, None)
+    if sesion is not None:
+        get_pool_sesiones().cerrar(_id_sesion(), sesion)
+
+def usuario_de_sesion() -> str:
+    """Id del usuario de Supabase de esta sesión, o ``None`` si no hay sesión
+    (backend local, hilos en segundo plano, scripts). Separa la caché de lecturas."""
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    sesion = st.session_state.get(CLAVE_SESION)
+    return sesion.usuario if sesion is not None else None
+
+def cliente_de_sesion():
+    """Cliente autenticado de esta sesión, o ``None`` si no hay sesión de Supabase
+    (backend local, hilos en segundo plano, scripts).
+
+    Si los tokens ya no sirven, olvida al usuario y lanza ``SesionExpirada``:
+    en el siguiente rerun la página lo manda al login.
+    """
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    sesion = st.session_state.get(CLAVE_SESION)
+    if sesion is None:
+        return None
+    try:
+        return get_pool_sesiones().cliente(_id_sesion(), sesion)
+    except SesionExpirada:
+        st.session_state.pop(CLAVE_SESION, None)
+        st.session_state.pop("user", None)
+        raise
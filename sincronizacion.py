@@ -0,0 +1,65 @@
+"""Sincronización incremental de ``vista_libros`` con una marca de agua.
+
+``ReplicaLibros`` guarda una copia local de la vista indexada por id. La
+primera vez la descarga entera; después pide al repositorio solo los libros
+con ``updated_at`` posterior a su marca y las lápidas de los borrados
+(sql/007_sincronizacion.sql), y los fusiona. El costo de refrescar depende
+de cuánto cambió la biblioteca y no de su tamaño.
+"""
+import datetime
+import threading
+
+from repositorio import COLUMNAS_SINCRONIZADAS
+from tipos_libro import preparar_libros
+
+# Se vuelve a pedir un poco antes de la marca: una transacción que empezó
+# antes pero terminó después de la última lectura trae marcas anteriores.
+# Repetir filas es inofensivo, la fusión es idempotente.
+MARGEN = datetime.timedelta(seconds=60)
+# Con más cambios que esto es más barato descargar la vista completa.
+LIMITE_CAMBIOS = 1000
+
+def _marca(valor) -> datetime.datetime:
+    if not valor:
+        return None
+    marca = datetime.datetime.fromisoformat(str(valor))
+    return marca if marca.tzinfo else marca.replace(tzinfo=datetime.timezone.utc)
+
+class ReplicaLibros:
+    """Copia local de ``vista_libros`` que se pone al día con los cambios desde la última marca."""
+
+    def __init__(self, usuario: str = None):
+        self.usuario = usuario  # dueño de las lápidas que se piden (sql/011)
+        self._lock = threading.Lock()
+        self._por_id = {}   # id -> fila preparada
+        self.marca = None   # updated_at / eliminado_en más reciente visto
+
+    def sincronizar(self, repositorio) -> list:
+        """Trae los cambios y devuelve los libros ordenados por nombre (lista nueva)."""
+        with self._lock:
+            if self.marca is None:
+                self._reemplazar(repositorio.listar_libros(COLUMNAS_SINCRONIZADAS))
+            else:
+                cambiados, eliminados = repositorio.cambios_libros(self.marca - MARGEN, LIMITE_CAMBIOS, self.usuario)
+                if len(cambiados) >= LIMITE_CAMBIOS:
+                    self._reemplazar(repositorio.listar_libros(COLUMNAS_SINCRONIZADAS))
+                else:
+                    self._fusionar(cambiados, eliminados)
+            return self._ordenados()
+
+    def _reemplazar(self, filas: list) -> None:
+        self._por_id = {f["id"]: f for f in preparar_libros(filas)}
+        self.marca = max(filter(None, (_marca(f.get("updated_at")) for f in filas)), default=None)
+
+    def _fusionar(self, cambiados: list, eliminados: list) -> None:
+        for fila in preparar_libros(cambiados):
+            self._por_id[fila["id"]] = fila
+        for lapida in eliminados:
+            self._por_id.pop(lapida["libro_id"], None)
+        marcas = [_marca(f.get("updated_at")) for f in cambiados]
+        marcas += [_marca(l.get("eliminado_en")) for l in eliminados]
+        self.marca = max([self.marca, *filter(None, marcas)])
+
+    def _ordenados(self) -> list:
+        # Mismo orden que la consulta completa: por nombre, nulls al final
+        return sorted(self._por_id.values(), key=lambda f: (f.get("nombre") is None, f.get("nombre") or ""))
@@ -0,0 +1,206 @@
+"""Snapshots columnar (Parquet) de la biblioteca.
+
+Uso como script::
+
+    python snapshot.py exportar --email yo@ejemplo.com [--destino snapshots]
+    python snapshot.py exportar --service-key <clave service_role>
+    python snapshot.py info snapshots/20240101T120000
+
+Con RLS, la clave anónima no ve los libros de nadie: se exporta con la
+sesión de un usuario (``--email``; la contraseña se pide o se lee de
+``NBOOKS_PASSWORD``) o con una clave de servicio indicada explícitamente.
+
+Un snapshot es una carpeta con un ``.parquet`` por tabla y un
+``manifest.json``. Para abrir la app sobre un snapshot (solo lectura) se
+configura ``snapshot = "<carpeta>"`` en la sección ``[nbooks]`` de los secrets.
+"""
+import argparse
+import datetime
+import getpass
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from supabase_client import create_client, initialize_supabase_client
+
+TAMANO_PAGINA = 1000  # máximo de filas por respuesta de PostgREST por defecto
+COMPRESION = "zstd"
+
+# Esquemas explícitos: las columnas y tipos no dependen de lo que venga en la
+# primera página (p. ej. una columna toda en null).
+ESQUEMAS = {
+    "vista_libros": pa.schema([
+        ("id", pa.int64()),
+        ("nombre", pa.string()),
+        ("autor", pa.string()),
+        ("tipos", pa.string()),
+        ("tipos_lista", pa.list_(pa.struct([("id", pa.int64()), ("nombre", pa.string())]))),
+        ("estado_lectura", pa.string()),
+        ("en_kindle", pa.bool_()),
+        ("portada_path", pa.string()),
+        ("descripcion", pa.string()),
+        ("fecha_inicio", pa.date32()),
+        ("fecha_leido", pa.date32()),
+    ]),
+    "autores": pa.schema([("id", pa.int64()), ("nombre", pa.string())]),
+    "tipos": pa.schema([("id", pa.int64()), ("nombre", pa.string())]),
+    "libro_tipos": pa.schema([("libro_id", pa.int64()), ("tipo_id", pa.int64())]),
+}
+ORDEN = {"vista_libros": "id", "autores": "id", "tipos": "id", "libro_tipos": "libro_id,tipo_id"}
+
+#================== EXPORTAR =========================
+
+def _a_fecha(valor):
+    if valor is None or isinstance(valor, datetime.date):
+        return valor
+    return datetime.date.fromisoformat(str(valor)[:10])
+
+def _tabla_arrow(filas: list, esquema: pa.Schema) -> pa.Table:
+    columnas = {}
+    for campo in esquema:
+        valores = [fila.get(campo.name) for fila in filas]
+        if pa.types.is_date(campo.type):
+            valores = [_a_fecha(v) for v in valores]
+        columnas[campo.name] = pa.array(valores, type=campo.type)
+    return pa.table(columnas, schema=esquema)
+
+def _paginas(supabase, tabla: str, columnas: list):
+    consulta_base = lambda: supabase.table(tabla).select(",".join(columnas))
+    inicio = 0
+    while True:
+        consulta = consulta_base()
+        for columna in ORDEN[tabla].split(","):
+            consulta = consulta.order(columna)
+        filas = consulta.range(inicio, inicio + TAMANO_PAGINA - 1).execute().data or []
+        if filas:
+            yield filas
+        if len(filas) < TAMANO_PAGINA:
+            return
+        inicio += TAMANO_PAGINA
+
+def _libros_anteriores(destino: Path) -> int:
+    """Libros del último snapshot de ``destino`` (0 si no hay ninguno)."""
+    manifests = sorted(Path(destino).glob("*/manifest.json"))
+    if not manifests:
+        return 0
+    manifest = json.loads(manifests[-1].read_text(encoding="utf-8"))
+    return manifest["tablas"].get("vista_libros", {}).get("filas", 0)
+
+def _motivo_incompleto(manifest: dict, destino: Path) -> str:
+    """Por qué un snapshot sin libros parece cortado por RLS (``None`` si no lo parece)."""
+    filas = {tabla: datos["filas"] for tabla, datos in manifest["tablas"].items()}
+    if filas["vista_libros"]:
+        return None
+    otras = [tabla for tabla, n in filas.items() if n]
+    if otras:
+        return f"vista_libros vino vacía pero {', '.join(otras)} no"
+    anteriores = _libros_anteriores(destino)
+    if anteriores:
+        return f"vista_libros vino vacía y el snapshot anterior tenía {anteriores} libros"
+    return None
+
+def exportar_snapshot(supabase, destino: Path, permitir_vacio: bool = False) -> Path:
+    """Pagina cada tabla con ``range()`` y la escribe como Parquet comprimido.
+
+    Devuelve la carpeta creada (``destino/<fecha>``). Si no llegó ningún libro
+    pero la biblioteca no parece vacía (hay autores, tipos o vínculos, o el
+    snapshot anterior tenía libros), lo más probable es que RLS haya filtrado
+    las filas: se borra la carpeta y se lanza ``RuntimeError``, salvo con
+    ``permitir_vacio``.
+    """
+    carpeta = Path(destino) / datetime.datetime.now().strftime("%Y%m%dT%H%M%S")
+    carpeta.mkdir(parents=True)
+    manifest = {"creado": datetime.datetime.now().isoformat(timespec="seconds"), "tablas": {}}
+
+    for tabla, esquema in ESQUEMAS.items():
+        filas_escritas = 0
+        with pq.ParquetWriter(carpeta / f"{tabla}.parquet", esquema, compression=COMPRESION) as escritor:
+            for filas in _paginas(supabase, tabla, esquema.names):
+                escritor.write_table(_tabla_arrow(filas, esquema))
+                filas_escritas += len(filas)
+        manifest["tablas"][tabla] = {"filas": filas_escritas}
+
+    motivo = None if permitir_vacio else _motivo_incompleto(manifest, destino)
+    if motivo:
+        shutil.rmtree(carpeta)
+        raise RuntimeError(
+            f"Snapshot incompleto: {motivo}. ¿El cliente no tiene permiso (RLS) para leer los libros? "
+            "Exportá con --email o --service-key."
+        )
+
+    (carpeta / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return carpeta
+
+def cliente_exportacion(ruta_secrets: Path, email: str = None, clave_servicio: str = None):
+    """Cliente para exportar: con la sesión de ``email`` o con ``clave_servicio``.
+
+    La clave de los secrets es la anónima: sin una de las dos, RLS no deja
+    leer los libros y el snapshot saldría vacío.
+    """
+    import tomllib
+
+    with open(ruta_secrets, "rb") as f:
+        secrets = tomllib.load(f)
+    if clave_servicio:
+        return create_client(secrets["supabase"]["url"], clave_servicio)
+    if not email:
+        raise ValueError("Hace falta --email o --service-key: con la clave anónima RLS no deja leer los libros.")
+    supabase = initialize_supabase_client(secrets)
+    password = os.environ.get("NBOOKS_PASSWORD") or getpass.getpass(f"Contraseña de {email}: ")
+    supabase.auth.sign_in_with_password({"email": email, "password": password})
+    return supabase
+
+#================== CARGAR =========================
+
+def cargar_snapshot(carpeta: Path) -> dict:
+    """Lee un snapshot y devuelve ``{tabla: [filas]}`` con el mismo formato que la API.
+
+    Las fechas vuelven como texto ISO, igual que las devuelve PostgREST.
+    """
+    datos = {}
+    for tabla in ESQUEMAS:
+        filas = pq.read_table(Path(carpeta) / f"{tabla}.parquet").to_pylist()
+        for fila in filas:
+            for columna, valor in fila.items():
+                if isinstance(valor, datetime.date):
+                    fila[columna] = valor.isoformat()
+        datos[tabla] = filas
+    return datos
+
+#================== CLI =========================
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Snapshots Parquet de la biblioteca de NBooks.")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    exportar = subcomandos.add_parser("exportar", help="descarga todas las tablas a un snapshot nuevo")
+    exportar.add_argument("--destino", type=Path, default=Path("snapshots"))
+    exportar.add_argument("--secrets", type=Path, default=Path(".streamlit/secrets.toml"))
+    credenciales = exportar.add_mutually_exclusive_group(required=True)
+    credenciales.add_argument("--email", help="exporta con la sesión de este usuario (contraseña: NBOOKS_PASSWORD o se pide)")
+    credenciales.add_argument("--service-key", help="clave service_role de Supabase (ignora RLS)")
+    exportar.add_argument("--permitir-vacio", action="store_true", help="acepta un snapshot sin libros")
+
+    info = subcomandos.add_parser("info", help="muestra el manifest de un snapshot")
+    info.add_argument("carpeta", type=Path)
+
+    args = parser.parse_args(argv)
+    if args.comando == "exportar":
+        try:
+            supabase = cliente_exportacion(args.secrets, args.email, args.service_key)
+            carpeta = exportar_snapshot(supabase, args.destino, args.permitir_vacio)
+        except (ValueError, RuntimeError) as e:
+            print(e, file=sys.stderr)
+            return 1
+        print(carpeta)
+    else:
+        print((args.carpeta / "manifest.json").read_text(encoding="utf-8"))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
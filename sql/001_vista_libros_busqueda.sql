@@ -0,0 +1,11 @@
+-- Columnas normalizadas (minúsculas y sin tildes) para filtrar el catálogo en
+-- el servidor. La usa main.py cuando `filtros_en_servidor = true`.
+create extension if not exists unaccent;
+
+create or replace view vista_libros_busqueda
+with (security_invoker = true) as
+select
+    v.*,
+    unaccent(lower(concat_ws(' ', v.nombre, v.autor, v.tipos))) as texto_busqueda,
+    unaccent(lower(coalesce(v.autor, ''))) as autor_busqueda
+from vista_libros v;
@@ -0,0 +1,37 @@
+-- Registra un libro y lo vincula con sus tipos en una sola llamada. Todo corre
+-- dentro de la transacción de la RPC: si algo falla no queda un libro a medias.
+create or replace function registrar_libro(
+    p_nombre text,
+    p_autor_id bigint,
+    p_portada_path text,
+    p_estado_lectura text,
+    p_en_kindle boolean,
+    p_tipos text[]
+) returns libros
+language plpgsql
+security invoker
+as $$
+declare
+    v_libro libros;
+    v_faltantes text[];
+begin
+    select array_agg(n) into v_faltantes
+    from unnest(coalesce(p_tipos, '{}')) as n
+    where not exists (select 1 from tipos t where t.nombre = n);
+
+    if v_faltantes is not null then
+        raise exception 'Tipos inexistentes: %', array_to_string(v_faltantes, ', ');
+    end if;
+
+    insert into libros (nombre, autor_id, portada_path, estado_lectura, en_kindle)
+    values (p_nombre, p_autor_id, p_portada_path, p_estado_lectura, p_en_kindle)
+    returning * into v_libro;
+
+    insert into libro_tipos (libro_id, tipo_id)
+    select v_libro.id, t.id
+    from tipos t
+    where t.nombre = any(p_tipos);
+
+    return v_libro;
+end;
+$$;
@@ -0,0 +1,15 @@
+-- Claves naturales para la importación masiva (importacion.py): permiten
+-- resolver autores/tipos y reimportar libros con upsert en lugar de duplicar.
+-- Si ya hay duplicados, hay que unificarlos antes de aplicar este script.
+alter table autores
+    add constraint autores_nombre_key unique (nombre);
+
+alter table tipos
+    add constraint tipos_nombre_key unique (nombre);
+
+alter table libros
+    add constraint libros_nombre_autor_key unique nulls not distinct (nombre, autor_id);
+
+-- Un mismo tipo no se vincula dos veces al mismo libro
+alter table libro_tipos
+    add constraint libro_tipos_libro_tipo_key unique (libro_id, tipo_id);
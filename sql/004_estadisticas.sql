@@ -0,0 +1,106 @@
+-- Contadores de la página de Estadísticas, mantenidos por triggers: libros
+-- leídos por mes (según fecha_leido), libros por estado y libros por tipo.
+-- La página lee `vista_estadisticas` (unas decenas de filas) en lugar de
+-- todos los libros. La usa utils.obtener_estadisticas.
+create table if not exists estadisticas_resumen (
+    dimension text not null check (dimension in ('mes', 'estado', 'tipo')),
+    clave text not null,  -- 'AAAA-MM', el estado o el id del tipo
+    cantidad bigint not null default 0,
+    primary key (dimension, clave)
+);
+
+create or replace function ajustar_estadistica(p_dimension text, p_clave text, p_delta int)
+returns void
+language sql
+as $$
+    insert into estadisticas_resumen (dimension, clave, cantidad)
+    values (p_dimension, p_clave, p_delta)
+    on conflict (dimension, clave)
+    do update set cantidad = estadisticas_resumen.cantidad + excluded.cantidad;
+$$;
+
+-- --- libros: estado y mes de lectura ---
+create or replace function estadisticas_libros_trigger()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        perform ajustar_estadistica('estado', old.estado_lectura, -1)
+        where old.estado_lectura is not null;
+        perform ajustar_estadistica('mes', to_char(old.fecha_leido, 'YYYY-MM'), -1)
+        where old.fecha_leido is not null;
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        perform ajustar_estadistica('estado', new.estado_lectura, 1)
+        where new.estado_lectura is not null;
+        perform ajustar_estadistica('mes', to_char(new.fecha_leido, 'YYYY-MM'), 1)
+        where new.fecha_leido is not null;
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists estadisticas_libros on libros;
+create trigger estadisticas_libros
+after insert or delete or update of estado_lectura, fecha_leido on libros
+for each row execute function estadisticas_libros_trigger();
+
+-- --- libro_tipos: libros por tipo ---
+create or replace function estadisticas_libro_tipos_trigger()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    if tg_op = 'DELETE' then
+        perform ajustar_estadistica('tipo', old.tipo_id::text, -1);
+    else
+        perform ajustar_estadistica('tipo', new.tipo_id::text, 1);
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists estadisticas_libro_tipos on libro_tipos;
+create trigger estadisticas_libro_tipos
+after insert or delete on libro_tipos
+for each row execute function estadisticas_libro_tipos_trigger();
+
+-- --- Recalcular desde cero (carga inicial o si los contadores se desvían) ---
+create or replace function recalcular_estadisticas()
+returns void
+language sql
+security definer
+set search_path = public
+as $$
+    delete from estadisticas_resumen;
+
+    insert into estadisticas_resumen (dimension, clave, cantidad)
+    select 'estado', estado_lectura, count(*)
+    from libros where estado_lectura is not null
+    group by estado_lectura
+    union all
+    select 'mes', to_char(fecha_leido, 'YYYY-MM'), count(*)
+    from libros where fecha_leido is not null
+    group by to_char(fecha_leido, 'YYYY-MM')
+    union all
+    select 'tipo', tipo_id::text, count(*)
+    from libro_tipos
+    group by tipo_id;
+$$;
+
+select recalcular_estadisticas();
+
+-- Los tipos se muestran por nombre (un tipo renombrado no pierde su cuenta)
+create or replace view vista_estadisticas as
+select
+    e.dimension,
+    case when e.dimension = 'tipo' then t.nombre else e.clave end as clave,
+    e.cantidad
+from estadisticas_resumen e
+left join tipos t on e.dimension = 'tipo' and t.id::text = e.clave
+where e.cantidad > 0;
@@ -0,0 +1,30 @@
+-- Agrega a vista_libros los tipos como lista JSON [{"id", "nombre"}] ordenada
+-- por nombre (`tipos_lista`), para no tener que partir el texto `tipos`.
+-- `tipos` se conserva para la búsqueda de texto. Recrear la vista borra
+-- vista_libros_busqueda, que se vuelve a crear igual que en sql/001.
+drop view if exists vista_libros cascade;
+
+create view vista_libros
+with (security_invoker = true) as
+select
+    l.*,
+    a.nombre as autor,
+    string_agg(t.nombre, ', ' order by t.nombre) as tipos,
+    coalesce(
+        jsonb_agg(jsonb_build_object('id', t.id, 'nombre', t.nombre) order by t.nombre)
+            filter (where t.id is not null),
+        '[]'::jsonb
+    ) as tipos_lista
+from libros l
+left join autores a on a.id = l.autor_id
+left join libro_tipos lt on lt.libro_id = l.id
+left join tipos t on t.id = lt.tipo_id
+group by l.id, a.nombre;
+
+create or replace view vista_libros_busqueda
+with (security_invoker = true) as
+select
+    v.*,
+    unaccent(lower(concat_ws(' ', v.nombre, v.autor, v.tipos))) as texto_busqueda,
+    unaccent(lower(coalesce(v.autor, ''))) as autor_busqueda
+from vista_libros v;
@@ -0,0 +1,36 @@
+-- Directorio de autores con sus conteos, para la página Autores: cuántos
+-- libros tiene cada autor, cuántos leídos y la última fecha de lectura.
+-- La búsqueda es por prefijo sobre `nombre_busqueda` (minúsculas y sin
+-- tildes), que usa el índice de abajo.
+create extension if not exists unaccent;
+
+-- unaccent no es immutable y no se puede indexar directamente
+create or replace function f_unaccent(text)
+returns text
+language sql
+immutable parallel safe strict
+as $$ select public.unaccent('public.unaccent'::regdictionary, $1) $$;
+
+create index if not exists autores_nombre_busqueda_idx
+    on autores (f_unaccent(lower(nombre)) text_pattern_ops);
+
+create index if not exists libros_autor_id_idx on libros (autor_id);
+
+create or replace view vista_autores
+with (security_invoker = true) as
+select
+    a.id,
+    a.nombre,
+    f_unaccent(lower(a.nombre)) as nombre_busqueda,
+    s.libros,
+    s.leidos,
+    s.ultima_lectura
+from autores a
+cross join lateral (
+    select
+        count(*) as libros,
+        count(*) filter (where l.estado_lectura = 'Leído') as leidos,
+        max(l.fecha_leido) as ultima_lectura
+    from libros l
+    where l.autor_id = a.id
+) s;
@@ -0,0 +1,144 @@
+-- Sincronización incremental de vista_libros (`sincronizacion_incremental = true`):
+-- `libros.updated_at` marca la última modificación de cada libro, también
+-- cuando cambian sus tipos o el nombre de su autor o de un tipo, y los libros
+-- borrados dejan una lápida en `libros_eliminados`. La app pide solo lo que
+-- cambió desde su última marca (ver sincronizacion.py).
+alter table libros
+    add column if not exists updated_at timestamptz not null default now();
+
+create index if not exists libros_updated_at_idx on libros (updated_at);
+
+-- --- libros: cualquier modificación actualiza la marca ---
+create or replace function libros_updated_at_trigger()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at := now();
+    return new;
+end;
+$$;
+
+drop trigger if exists libros_updated_at on libros;
+create trigger libros_updated_at
+before update on libros
+for each row execute function libros_updated_at_trigger();
+
+-- --- libro_tipos: vincular o desvincular toca el libro (una vez por sentencia) ---
+create or replace function libro_tipos_vinculados_trigger()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    update libros set updated_at = now()
+    where id in (select libro_id from vinculos);
+    return null;
+end;
+$$;
+
+-- Las tablas de transición admiten un solo evento por trigger
+drop trigger if exists libro_tipos_insertados on libro_tipos;
+create trigger libro_tipos_insertados
+after insert on libro_tipos
+referencing new table as vinculos
+for each statement execute function libro_tipos_vinculados_trigger();
+
+drop trigger if exists libro_tipos_borrados on libro_tipos;
+create trigger libro_tipos_borrados
+after delete on libro_tipos
+referencing old table as vinculos
+for each statement execute function libro_tipos_vinculados_trigger();
+
+-- --- autores y tipos: un renombre cambia las filas de vista_libros ---
+create or replace function autores_renombrados_trigger()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    update libros set updated_at = now() where autor_id = new.id;
+    return null;
+end;
+$$;
+
+drop trigger if exists autores_renombrados on autores;
+create trigger autores_renombrados
+after update of nombre on autores
+for each row when (old.nombre is distinct from new.nombre)
+execute function autores_renombrados_trigger();
+
+create or replace function tipos_renombrados_trigger()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    update libros set updated_at = now()
+    where id in (select libro_id from libro_tipos where tipo_id = new.id);
+    return null;
+end;
+$$;
+
+drop trigger if exists tipos_renombrados on tipos;
+create trigger tipos_renombrados
+after update of nombre on tipos
+for each row when (old.nombre is distinct from new.nombre)
+execute function tipos_renombrados_trigger();
+
+-- --- Lápidas de los libros borrados ---
+create table if not exists libros_eliminados (
+    libro_id bigint primary key,
+    eliminado_en timestamptz not null default now()
+);
+
+create index if not exists libros_eliminados_eliminado_en_idx on libros_eliminados (eliminado_en);
+
+create or replace function libros_lapida_trigger()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    insert into libros_eliminados (libro_id) values (old.id)
+    on conflict (libro_id) do update set eliminado_en = now();
+    return null;
+end;
+$$;
+
+drop trigger if exists libros_lapida on libros;
+create trigger libros_lapida
+after delete on libros
+for each row execute function libros_lapida_trigger();
+
+-- --- vista_libros expone updated_at (l.*): se recrea como en sql/005 ---
+drop view if exists vista_libros cascade;
+
+create view vista_libros
+with (security_invoker = true) as
+select
+    l.*,
+    a.nombre as autor,
+    string_agg(t.nombre, ', ' order by t.nombre) as tipos,
+    coalesce(
+        jsonb_agg(jsonb_build_object('id', t.id, 'nombre', t.nombre) order by t.nombre)
+            filter (where t.id is not null),
+        '[]'::jsonb
+    ) as tipos_lista
+from libros l
+left join autores a on a.id = l.autor_id
+left join libro_tipos lt on lt.libro_id = l.id
+left join tipos t on t.id = lt.tipo_id
+group by l.id, a.nombre;
+
+create or replace view vista_libros_busqueda
+with (security_invoker = true) as
+select
+    v.*,
+    unaccent(lower(concat_ws(' ', v.nombre, v.autor, v.tipos))) as texto_busqueda,
+    unaccent(lower(coalesce(v.autor, ''))) as autor_busqueda
+from vista_libros v;
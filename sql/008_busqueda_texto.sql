@@ -0,0 +1,134 @@
+-- Búsqueda de texto completo con ranking (`busqueda_en_servidor = true`).
+-- Cada libro guarda un tsvector con título (peso A), autor (B), tipos (C) y
+-- descripción (D), y el texto de título, autor y tipos para pg_trgm, que
+-- tolera errores de tipeo. `buscar_libros` devuelve una página de resultados,
+-- los mejores primero. Requiere sql/007: sus triggers tocan el libro cuando
+-- cambian sus tipos o el nombre de su autor o de un tipo, y eso recalcula
+-- estas columnas. vista_libros no las expone (se creó con las columnas de
+-- entonces), así que no viajan con el catálogo.
+create extension if not exists unaccent;
+create extension if not exists pg_trgm;
+
+-- unaccent no es immutable (depende del diccionario): esta versión fija el
+-- diccionario y se puede usar en índices.
+create or replace function nbooks_unaccent(texto text)
+returns text
+language sql
+immutable
+parallel safe
+strict
+as $$
+    select public.unaccent('public.unaccent'::regdictionary, texto);
+$$;
+
+alter table libros
+    add column if not exists busqueda tsvector,
+    add column if not exists busqueda_texto text;
+
+create index if not exists libros_busqueda_idx on libros using gin (busqueda);
+create index if not exists libros_busqueda_texto_idx on libros using gin (busqueda_texto gin_trgm_ops);
+
+-- --- libros: cualquier alta o modificación recalcula las columnas ---
+create or replace function libros_busqueda_trigger()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_autor text;
+    v_tipos text;
+begin
+    select a.nombre into v_autor from autores a where a.id = new.autor_id;
+    select string_agg(t.nombre, ' ' order by t.nombre) into v_tipos
+    from libro_tipos lt
+    join tipos t on t.id = lt.tipo_id
+    where lt.libro_id = new.id;
+
+    new.busqueda :=
+        setweight(to_tsvector('spanish', nbooks_unaccent(coalesce(new.nombre, ''))), 'A') ||
+        setweight(to_tsvector('spanish', nbooks_unaccent(coalesce(v_autor, ''))), 'B') ||
+        setweight(to_tsvector('spanish', nbooks_unaccent(coalesce(v_tipos, ''))), 'C') ||
+        setweight(to_tsvector('spanish', nbooks_unaccent(coalesce(new.descripcion, ''))), 'D');
+    new.busqueda_texto := lower(nbooks_unaccent(concat_ws(' ', new.nombre, v_autor, v_tipos)));
+    return new;
+end;
+$$;
+
+drop trigger if exists libros_busqueda on libros;
+create trigger libros_busqueda
+before insert or update on libros
+for each row execute function libros_busqueda_trigger();
+
+-- Completa los libros existentes sin mover updated_at (no es un cambio de
+-- datos: la sincronización incremental no tiene que volver a bajarlos)
+alter table libros disable trigger libros_updated_at;
+update libros set busqueda_texto = null;
+alter table libros enable trigger libros_updated_at;
+
+-- --- Búsqueda ---
+-- Cada palabra se busca como prefijo ("memor" encuentra "memorias") y todas
+-- tienen que aparecer; si no, alcanza con que el texto se parezca (pg_trgm).
+-- Devuelve {"total": n, "libros": [filas de vista_libros + "rango"]}.
+create or replace function buscar_libros(
+    p_texto text,
+    p_estado text default null,
+    p_autor text default null,
+    p_tipo text default null,
+    p_desplazamiento integer default 0,
+    p_limite integer default 24
+) returns jsonb
+language sql
+stable
+security invoker
+-- Umbral de parecido: 0.6 (el de pg_trgm) no tolera ni una letra cambiada en palabras cortas
+set pg_trgm.word_similarity_threshold = 0.45
+as $$
+    with consulta as (
+        select
+            texto,
+            (
+                select to_tsquery('spanish', string_agg(palabra || ':*', ' & '))
+                from regexp_split_to_table(texto, '[^[:alnum:]]+') as palabra
+                where palabra <> ''
+            ) as tsquery
+        from (select lower(nbooks_unaccent(trim(p_texto))) as texto) t
+    ),
+    aciertos as (
+        select
+            l.id,
+            l.nombre,
+            coalesce(ts_rank_cd(l.busqueda, c.tsquery, 1), 0)
+                + word_similarity(c.texto, l.busqueda_texto) as rango
+        from libros l, consulta c
+        where (l.busqueda @@ c.tsquery or c.texto <% l.busqueda_texto)
+          and (p_estado is null or l.estado_lectura = p_estado)
+          and (p_autor is null or exists (
+              select 1 from autores a
+              where a.id = l.autor_id
+                and strpos(lower(nbooks_unaccent(a.nombre)), lower(nbooks_unaccent(p_autor))) > 0
+          ))
+          and (p_tipo is null or exists (
+              select 1 from libro_tipos lt
+              join tipos t on t.id = lt.tipo_id
+              where lt.libro_id = l.id and t.nombre = p_tipo
+          ))
+    ),
+    pagina as (
+        select id, rango, nombre
+        from aciertos
+        order by rango desc, nombre, id
+        limit p_limite offset p_desplazamiento
+    )
+    select jsonb_build_object(
+        'total', (select count(*) from aciertos),
+        'libros', coalesce(
+            (
+                select jsonb_agg(to_jsonb(v) || jsonb_build_object('rango', p.rango) order by p.rango desc, p.nombre, p.id)
+                from pagina p
+                join vista_libros v on v.id = p.id
+            ),
+            '[]'::jsonb
+        )
+    );
+$$;
@@ -0,0 +1,79 @@
+-- Los listados solo traen las columnas que muestran (COLUMNAS_TARJETA en
+-- repositorio.py); la descripción se pide por id al abrir los detalles.
+-- buscar_libros (sql/008) devolvía la fila entera de vista_libros: esta
+-- versión arma cada resultado con las columnas de la tarjeta y el rango.
+create or replace function buscar_libros(
+    p_texto text,
+    p_estado text default null,
+    p_autor text default null,
+    p_tipo text default null,
+    p_desplazamiento integer default 0,
+    p_limite integer default 24
+) returns jsonb
+language sql
+stable
+security invoker
+-- Umbral de parecido: 0.6 (el de pg_trgm) no tolera ni una letra cambiada en palabras cortas
+set pg_trgm.word_similarity_threshold = 0.45
+as $$
+    with consulta as (
+        select
+            texto,
+            (
+                select to_tsquery('spanish', string_agg(palabra || ':*', ' & '))
+                from regexp_split_to_table(texto, '[^[:alnum:]]+') as palabra
+                where palabra <> ''
+            ) as tsquery
+        from (select lower(nbooks_unaccent(trim(p_texto))) as texto) t
+    ),
+    aciertos as (
+        select
+            l.id,
+            l.nombre,
+            coalesce(ts_rank_cd(l.busqueda, c.tsquery, 1), 0)
+                + word_similarity(c.texto, l.busqueda_texto) as rango
+        from libros l, consulta c
+        where (l.busqueda @@ c.tsquery or c.texto <% l.busqueda_texto)
+          and (p_estado is null or l.estado_lectura = p_estado)
+          and (p_autor is null or exists (
+              select 1 from autores a
+              where a.id = l.autor_id
+                and strpos(lower(nbooks_unaccent(a.nombre)), lower(nbooks_unaccent(p_autor))) > 0
+          ))
+          and (p_tipo is null or exists (
+              select 1 from libro_tipos lt
+              join tipos t on t.id = lt.tipo_id
+              where lt.libro_id = l.id and t.nombre = p_tipo
+          ))
+    ),
+    pagina as (
+        select id, rango, nombre
+        from aciertos
+        order by rango desc, nombre, id
+        limit p_limite offset p_desplazamiento
+    )
+    select jsonb_build_object(
+        'total', (select count(*) from aciertos),
+        'libros', coalesce(
+            (
+                select jsonb_agg(
+                    jsonb_build_object(
+                        'id', v.id,
+                        'nombre', v.nombre,
+                        'autor', v.autor,
+                        'tipos', v.tipos,
+                        'tipos_lista', v.tipos_lista,
+                        'estado_lectura', v.estado_lectura,
+                        'en_kindle', v.en_kindle,
+                        'portada_path', v.portada_path,
+                        'rango', p.rango
+                    )
+                    order by p.rango desc, p.nombre, p.id
+                )
+                from pagina p
+                join vista_libros v on v.id = p.id
+            ),
+            '[]'::jsonb
+        )
+    );
+$$;
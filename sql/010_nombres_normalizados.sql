@@ -0,0 +1,85 @@
+-- Autores y tipos únicos por nombre normalizado (minúsculas, sin tildes y con
+-- los espacios colapsados, como `normalizar` en indice_busqueda.py): "Garcia
+-- Marquez" es el mismo autor que "García Márquez". La app calcula la clave y
+-- `resolver_nombres` (repositorio.py) hace el upsert contra ella; el trigger
+-- la completa en las filas que lleguen sin clave (o se renombren) por otro
+-- camino. Requiere sql/006 y sql/008 (nbooks_unaccent). Si ya hay duplicados
+-- hay que unificarlos antes de aplicar este script; esta consulta los lista:
+--
+--   select nbooks_normalizar(nombre), array_agg(nombre) from autores
+--   group by 1 having count(*) > 1;
+create or replace function nbooks_normalizar(texto text)
+returns text
+language sql
+immutable
+parallel safe
+strict
+as $$
+    select lower(regexp_replace(btrim(nbooks_unaccent(texto)), '\s+', ' ', 'g'));
+$$;
+
+create or replace function nombre_busqueda_trigger()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op = 'INSERT' and new.nombre_busqueda is not null then
+        return new;
+    end if;
+    new.nombre_busqueda := nbooks_normalizar(new.nombre);
+    return new;
+end;
+$$;
+
+-- --- autores ---
+alter table autores add column if not exists nombre_busqueda text;
+update autores set nombre_busqueda = nbooks_normalizar(nombre) where nombre_busqueda is null;
+alter table autores alter column nombre_busqueda set not null;
+
+drop trigger if exists autores_nombre_busqueda on autores;
+create trigger autores_nombre_busqueda
+before insert or update of nombre on autores
+for each row execute function nombre_busqueda_trigger();
+
+-- La clave normalizada reemplaza a la de sql/003: el mismo nombre da la misma clave
+alter table autores drop constraint if exists autores_nombre_key;
+alter table autores
+    add constraint autores_nombre_busqueda_key unique (nombre_busqueda);
+
+-- --- tipos ---
+alter table tipos add column if not exists nombre_busqueda text;
+update tipos set nombre_busqueda = nbooks_normalizar(nombre) where nombre_busqueda is null;
+alter table tipos alter column nombre_busqueda set not null;
+
+drop trigger if exists tipos_nombre_busqueda on tipos;
+create trigger tipos_nombre_busqueda
+before insert or update of nombre on tipos
+for each row execute function nombre_busqueda_trigger();
+
+alter table tipos drop constraint if exists tipos_nombre_key;
+alter table tipos
+    add constraint tipos_nombre_busqueda_key unique (nombre_busqueda);
+
+-- --- vista_autores (sql/006): busca por prefijo sobre la columna ---
+drop index if exists autores_nombre_busqueda_idx;
+create index if not exists autores_nombre_busqueda_idx
+    on autores (nombre_busqueda text_pattern_ops);
+
+create or replace view vista_autores
+with (security_invoker = true) as
+select
+    a.id,
+    a.nombre,
+    a.nombre_busqueda,
+    s.libros,
+    s.leidos,
+    s.ultima_lectura
+from autores a
+cross join lateral (
+    select
+        count(*) as libros,
+        count(*) filter (where l.estado_lectura = 'Leído') as leidos,
+        max(l.fecha_leido) as ultima_lectura
+    from libros l
+    where l.autor_id = a.id
+) s;
@@ -0,0 +1,39 @@
+-- Lápidas por usuario (corrige sql/007): `libros_eliminados` no tenía dueño
+-- ni RLS, así que cualquier usuario autenticado leía los ids borrados de los
+-- demás. Cada lápida guarda ahora el `user_id` del libro borrado y la misma
+-- regla que `libros` (cada uno ve lo suyo) decide quién la lee.
+alter table libros_eliminados
+    add column if not exists user_id uuid;
+
+-- La réplica pide "mis lápidas desde la marca"
+drop index if exists libros_eliminados_eliminado_en_idx;
+create index if not exists libros_eliminados_user_id_eliminado_en_idx
+    on libros_eliminados (user_id, eliminado_en);
+
+-- El dueño sale de la fila borrada; si `libros` no tuviera `user_id`, del
+-- usuario que borra. to_jsonb evita depender de que la columna exista.
+create or replace function libros_lapida_trigger()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    insert into libros_eliminados (libro_id, user_id)
+    values (old.id, coalesce((to_jsonb(old) ->> 'user_id')::uuid, auth.uid()))
+    on conflict (libro_id) do update
+        set eliminado_en = now(), user_id = excluded.user_id;
+    return null;
+end;
+$$;
+
+-- Solo lectura para la app: las lápidas las escribe el trigger (security
+-- definer, dueño de la tabla). Las anteriores a esta migración quedan sin
+-- dueño y no las ve nadie; solo le faltan a una réplica abierta durante la
+-- migración, que se corrige al recargar la vista completa.
+alter table libros_eliminados enable row level security;
+
+drop policy if exists "lapidas_propias" on libros_eliminados;
+create policy "lapidas_propias" on libros_eliminados
+for select to authenticated
+using (user_id = auth.uid());
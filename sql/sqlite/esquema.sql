@@ -0,0 +1,127 @@
+-- Esquema del backend local (`backend = "sqlite"`). Equivale a las tablas de
+-- Supabase más lo que agregan los scripts de sql/: claves naturales,
+-- vista_libros con `tipos` y `tipos_lista`, y los índices de los filtros.
+-- RepositorioSQLite lo aplica al abrir la base; es idempotente.
+pragma foreign_keys = on;
+
+create table if not exists autores (
+    id integer primary key,
+    nombre text not null unique,
+    nombre_busqueda text not null  -- minúsculas y sin tildes, para buscar por prefijo
+);
+-- Únicos por nombre normalizado, como sql/010 (también sirve para el prefijo)
+drop index if exists autores_nombre_busqueda_idx;
+create unique index if not exists autores_nombre_busqueda_key on autores (nombre_busqueda);
+
+create table if not exists tipos (
+    id integer primary key,
+    nombre text not null unique,
+    nombre_busqueda text not null
+);
+create unique index if not exists tipos_nombre_busqueda_key on tipos (nombre_busqueda);
+
+create table if not exists libros (
+    id integer primary key,
+    nombre text not null,
+    autor_id integer references autores (id),
+    portada_path text,
+    estado_lectura text,
+    en_kindle integer not null default 0,
+    descripcion text,
+    fecha_inicio text,  -- AAAA-MM-DD
+    fecha_leido text,
+    updated_at text  -- AAAA-MM-DDTHH:MM:SS.SSSZ, la ponen los triggers de abajo
+);
+-- (nombre, autor) único también cuando no hay autor, como en sql/003
+create unique index if not exists libros_nombre_autor_idx on libros (nombre, ifnull(autor_id, 0));
+create index if not exists libros_autor_id_idx on libros (autor_id);
+create index if not exists libros_estado_idx on libros (estado_lectura);
+create index if not exists libros_fecha_inicio_idx on libros (fecha_inicio);
+create index if not exists libros_fecha_leido_idx on libros (fecha_leido);
+create index if not exists libros_updated_at_idx on libros (updated_at);
+
+create table if not exists libro_tipos (
+    libro_id integer not null references libros (id) on delete cascade,
+    tipo_id integer not null references tipos (id) on delete cascade,
+    primary key (libro_id, tipo_id)
+) without rowid;
+create index if not exists libro_tipos_tipo_id_idx on libro_tipos (tipo_id);
+
+-- Sincronización incremental, como sql/007: updated_at cambia con el libro,
+-- sus tipos o el nombre de su autor o de un tipo; los borrados dejan lápida.
+create trigger if not exists libros_insertados after insert on libros
+begin
+    update libros set updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now') where id = new.id;
+end;
+
+create trigger if not exists libros_updated_at after update on libros
+when new.updated_at is old.updated_at
+begin
+    update libros set updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now') where id = new.id;
+end;
+
+create trigger if not exists libro_tipos_insertados after insert on libro_tipos
+begin
+    update libros set updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now') where id = new.libro_id;
+end;
+
+create trigger if not exists libro_tipos_borrados after delete on libro_tipos
+begin
+    update libros set updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now') where id = old.libro_id;
+end;
+
+create trigger if not exists autores_renombrados after update of nombre on autores
+when new.nombre is not old.nombre
+begin
+    update libros set updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now') where autor_id = new.id;
+end;
+
+create trigger if not exists tipos_renombrados after update of nombre on tipos
+when new.nombre is not old.nombre
+begin
+    update libros set updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
+    where id in (select libro_id from libro_tipos where tipo_id = new.id);
+end;
+
+create table if not exists libros_eliminados (
+    libro_id integer primary key,
+    eliminado_en text not null
+);
+create index if not exists libros_eliminados_eliminado_en_idx on libros_eliminados (eliminado_en);
+
+create trigger if not exists libros_lapida after delete on libros
+begin
+    insert into libros_eliminados (libro_id, eliminado_en)
+    values (old.id, strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+    on conflict (libro_id) do update set eliminado_en = excluded.eliminado_en;
+end;
+
+create view if not exists vista_libros as
+select
+    l.id,
+    l.nombre,
+    l.autor_id,
+    a.nombre as autor,
+    (
+        select group_concat(nombre, ', ')
+        from (
+            select t.nombre from libro_tipos lt join tipos t on t.id = lt.tipo_id
+            where lt.libro_id = l.id order by t.nombre
+        )
+    ) as tipos,
+    (
+        select json_group_array(json_object('id', id, 'nombre', nombre))
+        from (
+            select t.id, t.nombre from libro_tipos lt join tipos t on t.id = lt.tipo_id
+            where lt.libro_id = l.id order by t.nombre
+        )
+    ) as tipos_lista,
+    l.estado_lectura,
+    l.en_kindle,
+    l.portada_path,
+    l.descripcion,
+    l.fecha_inicio,
+    l.fecha_leido,
+    l.updated_at
+from libros l
+left join autores a on a.id = l.autor_id;
@@ -1,7 +1,45 @@
+from typing import TYPE_CHECKING
+
 import streamlit as st
-from supabase import create_client, Client
+from instrumentacion import instrumentar
+
+if TYPE_CHECKING:
+    import httpx
+    from supabase import Client
+
+# Conexiones HTTP compartidas por todos los clientes (el global y los de cada
+# sesión, ver sesiones.py): un cliente nuevo no abre conexiones propias.
+MAX_CONEXIONES = 20
+MAX_CONEXIONES_LIBRES = 10
+SEGUNDOS_CONEXION_LIBRE = 60
+
+@st.cache_resource
+def _transporte() -> "httpx.Client":
+    """Pool de conexiones keep-alive acotado, compartido globalmente."""
+    import httpx
 
-def initialize_supabase_client(secrets: dict) -> Client:
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=MAX_CONEXIONES,
+            max_keepalive_connections=MAX_CONEXIONES_LIBRES,
+            keepalive_expiry=SEGUNDOS_CONEXION_LIBRE,
+        ),
+        timeout=httpx.Timeout(120, connect=10),
+        follow_redirects=True,
+    )
+
+def create_client(url: str, key: str) -> "Client":
+    """Crea un cliente sobre el transporte compartido. ``supabase`` tarda en
+    importarse (httpx, postgrest, auth, storage...): se importa recién al crear
+    el primer cliente, no al arrancar la app."""
+    from supabase import ClientOptions, create_client as crear
+
+    # Los tokens de las sesiones los renueva el pool de sesiones.py, no un
+    # temporizador por cliente
+    opciones = ClientOptions(httpx_client=_transporte(), auto_refresh_token=False, persist_session=False)
+    return crear(url, key, opciones)
+
+def initialize_supabase_client(secrets: dict) -> "Client":
     try:
         SUPABASE_URL = secrets["supabase"]["url"]
         SUPABASE_KEY = secrets["supabase"]["key"]
@@ -14,8 +52,14 @@ def initialize_supabase_client(secrets: dict) -> Client:
 
 # 🔑 Definimos la función de acceso con caché aquí para que todos la usen.
 @st.cache_resource 
-def get_supabase_client() -> Client:
-    """Devuelve la instancia del cliente Supabase, cacheada globalmente."""
-    return initialize_supabase_client(st.secrets)
+def get_supabase_client() -> "Client":
+    """Devuelve la instancia del cliente Supabase, cacheada globalmente.
+
+    Nunca inicia sesión: sirve lo que no depende de un usuario (scripts,
+    benchmarks, sesiones sin login). Las lecturas y escrituras de un usuario
+    usan ``sesiones.cliente_de_sesion()``.
+    El cliente mide cada llamada (ver instrumentacion.py).
+    """
+    return instrumentar(initialize_supabase_client(st.secrets))
 
 # No se define ninguna variable global 'supabase' aquí.
\ No newline at end of file
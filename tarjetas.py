@@ -0,0 +1,158 @@
+"""Tarjetas del catálogo como un único bloque de HTML.
+
+Cada tarjeta armada con columnas y varios ``st.markdown`` son una decena de
+elementos que Streamlit envía y el navegador acomoda en cada rerun. Acá la
+grilla visible es un solo componente (``st.components.v2``, HTML y JS en
+línea, sin compilar nada): el CSS va una vez y cada tarjeta es un fragmento
+de HTML que se cachea por versión de la fila. El botón "Ver Detalles" de
+cada tarjeta avisa a Python con el id del libro; los detalles (con la
+descripción, que no viaja en los listados) se arman aparte, al abrirlos.
+"""
+import functools
+import html
+
+from cache_portadas import cache_activa
+from portadas import img_portada_html
+from tipos_libro import nombres_tipos
+
+# Estado -> (color, ícono de Material Symbols), como los badges de Streamlit
+BADGES_ESTADO = {
+    "leído": ("green", "check_circle"),
+    "por leer": ("blue", "bookmark_add"),
+    "en proceso": ("orange", "hourglass_top"),
+    "no leído": ("gray", "visibility_off"),
+    "abandonado": ("red", "cancel"),
+}
+# Lo que se dibuja de cada libro: si algo de esto cambia, la tarjeta se rehace
+CAMPOS_TARJETA = ("id", "nombre", "autor", "tipos_lista", "estado_lectura", "en_kindle", "portada_path")
+MAX_TARJETAS_CACHEADAS = 2048
+
+# Sin líneas en blanco ni sangría: markdown cortaría el bloque de HTML.
+# La grilla los recibe como CSS del componente; los detalles, en un <style>.
+CSS = "".join("""
+.nb-grilla { display: grid; grid-template-columns: repeat(4, minmax(0, 1fr)); gap: 1rem; align-items: start; }
+@media (max-width: 640px) { .nb-grilla { grid-template-columns: minmax(0, 1fr); } }
+.nb-tarjeta { border: 1px solid var(--st-border-color, rgba(49, 51, 63, 0.2)); border-radius: 0.5rem; padding: 1rem; }
+.nb-ver { width: 100%; margin-top: 0.75rem; padding: 0.25rem 0.75rem; min-height: 2.5rem; font: inherit; color: inherit; background: transparent; border: 1px solid var(--st-border-color, rgba(49, 51, 63, 0.2)); border-radius: 0.5rem; cursor: pointer; }
+.nb-ver:hover { color: var(--st-primary-color, #ff4b4b); border-color: var(--st-primary-color, #ff4b4b); }
+.nb-cuerpo { display: flex; gap: 1rem; }
+.nb-portada { flex: 1 1 0; min-width: 0; }
+.nb-portada img { max-width: 100%; }
+.nb-datos { flex: 2 1 0; min-width: 0; }
+.nb-titulo { margin: 0 0 3px 0; padding-bottom: 1px; font-size: 28px; font-weight: bold; text-align: center; line-height: 1; border-bottom: 1px solid #F0F0F0; }
+.nb-autor { margin: 0 0 6px 0; padding: 0; font-size: 20px; text-align: center; line-height: 1; }
+.nb-badges { display: flex; flex-wrap: wrap; gap: 0.25rem; margin-bottom: 0.5rem; }
+.nb-pie { display: flex; align-items: center; }
+.nb-pie > :first-child { flex: 3 1 0; }
+.nb-kindle { flex: 2 1 0; margin: 0; padding: 0; line-height: 1; font-size: 14px; text-align: center; }
+.nb-badge { display: inline-flex; align-items: center; gap: 0.2rem; padding: 0 0.375rem; border-radius: 0.5rem; font-size: 0.875rem; line-height: 1.5; }
+.nb-icono { font-family: "Material Symbols Rounded"; font-size: 1rem; font-weight: normal; font-style: normal; }
+.nb-green { color: #177233; background: rgba(33, 195, 84, 0.1); }
+.nb-blue { color: #0054a3; background: rgba(28, 131, 225, 0.1); }
+.nb-orange { color: #e2660c; background: rgba(255, 164, 33, 0.1); }
+.nb-gray { color: rgba(49, 51, 63, 0.6); background: rgba(49, 51, 63, 0.1); }
+.nb-red { color: #bd4043; background: rgba(255, 43, 43, 0.09); }
+.nb-violet { color: #583f84; background: rgba(128, 61, 245, 0.1); }
+.nb-detalle { display: flex; gap: 1rem; }
+.nb-detalle > :first-child { flex: 3 1 0; min-width: 0; }
+.nb-detalle > :last-child { flex: 1 1 0; min-width: 0; }
+.nb-detalle img { max-width: 100%; }
+.nb-descripcion { margin: 0.75rem 0 0 0; }
+""".strip().splitlines())
+ESTILOS = f"<style>{CSS}</style>"
+
+# Vuelve a escribir la grilla solo si cambió el HTML (así las portadas no
+# parpadean) y manda el id del libro cuyo "Ver Detalles" se tocó
+JS = """
+export default function(component) {
+    const { data, parentElement, setTriggerValue } = component;
+    let raiz = parentElement.querySelector(".nb-raiz");
+    if (!raiz) {
+        raiz = document.createElement("div");
+        raiz.className = "nb-raiz";
+        raiz.addEventListener("click", (evento) => {
+            const boton = evento.target.closest("[data-libro]");
+            if (boton) raiz.avisar("detalles", Number(boton.dataset.libro));
+        });
+        parentElement.appendChild(raiz);
+    }
+    raiz.avisar = setTriggerValue;
+    if (raiz.html !== data) {
+        raiz.innerHTML = data;
+        raiz.html = data;
+    }
+}
+"""
+
+def badge(color: str, texto: str, icono: str = None) -> str:
+    """Badge con los colores de los de Streamlit (``:color-badge[...]``)."""
+    simbolo = f'<span class="nb-icono">{icono}</span>' if icono else ""
+    return f'<span class="nb-badge nb-{color}">{simbolo}{html.escape(texto)}</span>'
+
+def badge_estado(estado: str) -> str:
+    estado_limpio = estado.strip()
+    color, icono = BADGES_ESTADO.get(estado_limpio.lower(), ("gray", "help"))
+    return badge(color, estado_limpio, icono)
+
+def version_fila(libro: dict) -> tuple:
+    """Versión de la fila para la caché: los campos que se dibujan.
+
+    Incluye el estado aunque ``updated_at`` no cambie: el cambio optimista lo
+    pisa en la fila cacheada antes de que Supabase lo confirme.
+    """
+    # Con la caché de portadas las URLs son locales; los archivos no se pierden
+    # porque precargar_portadas los vuelve a asegurar en cada rerun
+    return tuple(libro.get(campo) for campo in CAMPOS_TARJETA) + (cache_activa(),)
+
+@functools.lru_cache(maxsize=MAX_TARJETAS_CACHEADAS)
+def _tarjeta_html(version: tuple) -> str:
+    libro = dict(zip(CAMPOS_TARJETA, version))
+    return (
+        '<div class="nb-tarjeta"><div class="nb-cuerpo">'
+        f'<div class="nb-portada">{img_portada_html(libro["portada_path"], 150, 140)}</div>'
+        f'<div class="nb-datos">{_datos_html(libro)}</div>'
+        f'</div><button class="nb-ver" data-libro="{int(libro["id"])}">Ver Detalles</button></div>'
+    )
+
+def _datos_html(libro: dict) -> str:
+    tipos = nombres_tipos(libro)
+    badges_tipos = "".join(badge("violet", tipo, "star") for tipo in tipos) if tipos else badge("gray", "-")
+    return (
+        f'<p class="nb-titulo">{html.escape(libro["nombre"] or "Título Desconocido")}</p>'
+        f'<p class="nb-autor">{html.escape(libro["autor"] or "Desconocido")}</p>'
+        f'<div class="nb-badges">{badges_tipos}</div>'
+        f'<div class="nb-pie"><div>{badge_estado(libro["estado_lectura"])}</div>'
+        f'<p class="nb-kindle">Kindle {"✅" if libro["en_kindle"] else "❌"}</p></div>'
+    )
+
+def tarjeta_html(libro: dict) -> str:
+    """HTML de la tarjeta de un libro, cacheado por versión de la fila."""
+    return _tarjeta_html(version_fila(libro))
+
+def grilla_html(libros: list) -> str:
+    """La grilla completa de tarjetas (sin el CSS, que lleva el componente)."""
+    return '<div class="nb-grilla">' + "".join(tarjeta_html(l) for l in libros) + "</div>"
+
+def _componente_grilla():
+    # El registro es del runtime (AppTest arma uno por app), así que se
+    # registra en cada dibujo; repetir la misma definición no cuesta nada
+    import streamlit as st
+
+    return st.components.v2.component("nbooks_grilla", css=CSS, js=JS)
+
+def grilla(libros: list, key: str) -> int:
+    """Dibuja la grilla como un solo elemento y devuelve el id del libro cuyo
+    "Ver Detalles" se tocó en esta ejecución, o ``None``."""
+    resultado = _componente_grilla()(data=grilla_html(libros), key=key, on_detalles_change=lambda: None)
+    return resultado.detalles
+
+def detalle_html(libro: dict, descripcion: str) -> str:
+    """Datos del libro, su descripción y la portada grande (el contenido de "Ver Detalles")."""
+    # Los saltos de línea van como <br>: una línea en blanco cerraría el bloque de HTML
+    texto = html.escape(descripcion or "No hay descripción disponible.").replace("\n", "<br>")
+    return (
+        ESTILOS + '<div class="nb-detalle">'
+        f'<div>{_datos_html(libro)}<p class="nb-descripcion">{texto}</p></div>'
+        f'<div>{img_portada_html(libro["portada_path"], 410, 210, "border-radius: 10px;")}</div>'
+        '</div>'
+    )
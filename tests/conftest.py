@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Los módulos de la app viven en la raíz del repositorio, sin paquete
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,32 @@
+"""Presupuestos de arranque de la puerta de entrada (``main.py`` sin sesión y el login).
+
+Cada página se importa en un proceso nuevo (``benchmarks.arranque``). Con
+``NBOOKS_HOLGURA_ARRANQUE`` (por ejemplo ``2`` en una CI lenta) se multiplica
+el presupuesto; las dependencias pesadas no tienen holgura.
+"""
+import os
+
+import pytest
+
+from benchmarks.arranque import PRESUPUESTOS, perfilar
+
+REPETICIONES = 3
+HOLGURA = float(os.environ.get("NBOOKS_HOLGURA_ARRANQUE", "1"))
+
+@pytest.fixture(scope="module")
+def perfiles():
+    return {p["pagina"]: p for p in perfilar(list(PRESUPUESTOS), REPETICIONES, con_sesion=False)}
+
+@pytest.mark.parametrize("pagina", list(PRESUPUESTOS))
+def test_corre_sin_errores(perfiles, pagina):
+    assert perfiles[pagina]["errores"] == []
+
+@pytest.mark.parametrize("pagina", list(PRESUPUESTOS))
+def test_no_importa_dependencias_pesadas(perfiles, pagina):
+    # Ninguna de PESADAS debe cargarse antes de iniciar sesión
+    assert not perfiles[pagina]["pesadas"], f"{pagina} importa {', '.join(perfiles[pagina]['pesadas'])}"
+
+@pytest.mark.parametrize("pagina", list(PRESUPUESTOS))
+def test_presupuesto(perfiles, pagina):
+    presupuesto = PRESUPUESTOS[pagina] * HOLGURA
+    assert perfiles[pagina]["total_ms"] <= presupuesto, perfiles[pagina]["por_paquete"]
@@ -0,0 +1,52 @@
+import pytest
+
+import importacion
+import utils
+from benchmarks.cliente_falso import ClienteFalso
+from benchmarks.generador import generar_biblioteca
+from repositorio import RepositorioSQLite, RepositorioSupabase
+
+FILAS = [
+    {"nombre": "Rayuela", "autor": "Julio Cortázar", "estado_lectura": "Leído", "fecha_leido": "2024-03-02"},
+    {"nombre": "Ficciones", "autor": "Jorge Luis Borges", "estado_lectura": "Leído", "fecha_leido": "2024-03-20"},
+    {"nombre": "El Aleph", "autor": "Jorge Luis Borges", "estado_lectura": "Por leer"},
+    {"nombre": "Bestiario", "autor": "Julio Cortázar", "estado_lectura": "Leído", "fecha_leido": "2023-11-05"},
+    {"nombre": "Pedro Páramo", "autor": "Juan Rulfo", "estado_lectura": "En proceso"},
+    {"nombre": "Cien años de soledad", "autor": "Gabriel García Márquez", "estado_lectura": "Por leer"},
+]
+
+@pytest.fixture
+def cliente(monkeypatch):
+    cliente = ClienteFalso(generar_biblioteca(300))
+    monkeypatch.setattr(utils, "_repositorio_lectura", lambda: RepositorioSupabase(cliente))
+    monkeypatch.setattr(utils, "get_cache", lambda cache=utils.CacheLibreria(): cache)
+    monkeypatch.setattr(utils, "modo_snapshot", lambda: False)
+    return cliente
+
+@pytest.mark.parametrize("orden", list(utils.ORDENES_AUTORES))
+def test_la_pagina_se_resuelve_en_el_servidor(cliente, orden):
+    autores, total = utils.obtener_pagina_autores("", orden, 10, 10)
+    # Una consulta a vista_autores, sin bajar los libros
+    assert [(l.tabla, l.operacion) for l in cliente.llamadas] == [("vista_autores", "select")]
+    assert len(autores) == 10
+    assert total == len(cliente.tablas["autores"])
+    assert (autores, total) == utils._pagina_autores_en_memoria("", *utils.ORDENES_AUTORES[orden], 10, 10)
+
+def test_busca_por_prefijo_sin_tildes(cliente):
+    autores, total = utils.obtener_pagina_autores("ALVAREZ", "nombre", 0, 100)
+    assert total == 0  # el prefijo es del nombre completo, no del apellido
+    autores, total = utils.obtener_pagina_autores("ELODIE", "nombre", 0, 100)
+    assert total == len(autores) > 0
+    assert all(a["nombre"].startswith("Élodie") for a in autores)
+
+@pytest.mark.parametrize("orden", list(utils.ORDENES_AUTORES))
+def test_sqlite_pagina_igual_que_supabase(tmp_path, orden):
+    supabase = RepositorioSupabase(ClienteFalso({}))
+    sqlite = RepositorioSQLite(":memory:", tmp_path / "portadas")
+    for repositorio in (supabase, sqlite):
+        importacion.importar(repositorio, FILAS)
+
+    columna, descendente = utils.ORDENES_AUTORES[orden]
+    for prefijo, offset in (("", 0), ("", 2), ("ju", 0)):
+        esperado = supabase.pagina_autores(prefijo, columna, descendente, offset, 2)
+        assert sqlite.pagina_autores(prefijo, columna, descendente, offset, 2) == esperado
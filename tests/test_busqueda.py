@@ -0,0 +1,67 @@
+import pytest
+
+import importacion
+import utils
+from benchmarks.cliente_falso import ClienteFalso
+from repositorio import COLUMNAS_TARJETA, RepositorioSQLite, RepositorioSupabase
+
+FILAS = [
+    {"nombre": "El mar", "autor": "John Banville", "tipos": "Novela", "estado_lectura": "Leído"},
+    {"nombre": "Rayuela", "autor": "Julio Cortázar", "tipos": "Novela", "estado_lectura": "Por leer",
+     "descripcion": "Un libro que se lee saltando capítulos, entre París y el mar de Buenos Aires."},
+    {"nombre": "Marina", "autor": "Carlos Ruiz Zafón", "tipos": "Juvenil, Misterio", "estado_lectura": "Leído"},
+    {"nombre": "Ficciones", "autor": "Jorge Luis Borges", "tipos": "Cuento", "estado_lectura": "Leído",
+     "descripcion": "Laberintos, espejos y bibliotecas."},
+    {"nombre": "Canción del mar", "autor": "María Márquez", "tipos": "Poesía", "estado_lectura": "Leído"},
+]
+
+@pytest.fixture(params=["supabase", "sqlite"])
+def repositorio(request, tmp_path):
+    if request.param == "supabase":
+        repositorio = RepositorioSupabase(ClienteFalso({}))
+    else:
+        repositorio = RepositorioSQLite(":memory:", tmp_path / "portadas")
+    importacion.importar(repositorio, FILAS)
+    return repositorio
+
+def nombres(libros):
+    return [l["nombre"] for l in libros]
+
+def test_el_titulo_pesa_mas_que_la_descripcion(repositorio):
+    libros, total = repositorio.buscar_libros({"busqueda": "mar"}, 0, 10)
+    # Título y autor (María Márquez) primero, después solo el título (a igual
+    # rango, por nombre) y al final solo la descripción
+    assert nombres(libros) == ["Canción del mar", "El mar", "Marina", "Rayuela"]
+    assert total == 4
+
+def test_busca_en_la_descripcion_sin_tildes(repositorio):
+    libros, _ = repositorio.buscar_libros({"busqueda": "PARIS capitulos"}, 0, 10)
+    assert nombres(libros) == ["Rayuela"]
+
+def test_todas_las_palabras_y_los_demas_filtros(repositorio):
+    assert nombres(repositorio.buscar_libros({"busqueda": "mar espejos"}, 0, 10)[0]) == []
+    libros, total = repositorio.buscar_libros({"busqueda": "mar", "estado": "Por leer"}, 0, 10)
+    assert (nombres(libros), total) == (["Rayuela"], 1)
+    libros, total = repositorio.buscar_libros({"busqueda": "mar", "tipo": "Novela"}, 1, 1)
+    assert (nombres(libros), total) == (["Rayuela"], 2)
+
+def test_los_resultados_no_traen_la_descripcion(repositorio):
+    libros, _ = repositorio.buscar_libros({"busqueda": "laberintos"}, 0, 10)
+    assert nombres(libros) == ["Ficciones"]
+    assert set(libros[0]) <= {*COLUMNAS_TARJETA, "rango"}
+
+def test_la_busqueda_se_cachea_por_filtros_y_pagina(monkeypatch):
+    cliente = ClienteFalso({})
+    importacion.importar(RepositorioSupabase(cliente), FILAS)
+    monkeypatch.setattr(utils, "_repositorio_lectura", lambda: RepositorioSupabase(cliente))
+    monkeypatch.setattr(utils, "get_cache", lambda cache=utils.CacheLibreria(): cache)
+    cliente.llamadas.clear()
+
+    filtros = {"busqueda": "mar", "autor": "", "tipo": None, "estado": None}
+    libros, total = utils.obtener_busqueda(filtros, 0, 2)
+    assert (nombres(libros), total) == (["Canción del mar", "El mar"], 4)
+    # Los tipos llegan preparados para las tarjetas
+    assert [t.nombre for t in libros[0]["tipos_lista"]] == ["Poesía"]
+    utils.obtener_busqueda(dict(filtros), 0, 2)
+    utils.obtener_busqueda(filtros, 2, 2)
+    assert [(l.tabla, l.operacion) for l in cliente.llamadas] == [("rpc:buscar_libros", "rpc")] * 2
@@ -0,0 +1,132 @@
+import threading
+import time
+
+from utils import CacheLibreria
+
+class Contador:
+    """Cargador que cuenta sus llamadas y devuelve una lista nueva cada vez."""
+
+    def __init__(self, filas=None):
+        self.llamadas = 0
+        self.filas = filas or [{"id": 1, "estado": "Por leer"}, {"id": 2, "estado": "Leído"}]
+
+    def __call__(self):
+        self.llamadas += 1
+        return [dict(f) for f in self.filas]
+
+def esperar(condicion, segundos=2.0):
+    limite = time.monotonic() + segundos
+    while not condicion():
+        assert time.monotonic() < limite, "no se cumplió a tiempo"
+        time.sleep(0.01)
+
+def test_dentro_del_ttl_no_vuelve_a_cargar():
+    cache, cargar = CacheLibreria(ttl=60), Contador()
+    assert cache.obtener(("libros",), cargar) == cargar.filas
+    assert cache.obtener(("libros",), cargar) == cargar.filas
+    assert cargar.llamadas == 1
+
+def test_vencida_sirve_la_copia_y_refresca_en_segundo_plano():
+    cache = CacheLibreria(ttl=0)
+    liberar = threading.Event()
+    versiones = iter(["vieja", "nueva"])
+
+    def cargar():
+        valor = next(versiones)
+        if valor == "nueva":
+            liberar.wait(2)
+        return valor
+
+    assert cache.obtener(("libros",), cargar) == "vieja"
+    # Vencida: se devuelve la copia sin esperar al refresco (que está bloqueado)
+    assert cache.obtener(("libros",), cargar) == "vieja"
+    liberar.set()
+    esperar(lambda: cache.obtener(("libros",), lambda: "otra") == "nueva")
+
+def test_un_solo_refresco_a_la_vez():
+    cache = CacheLibreria(ttl=0)
+    liberar, llamadas = threading.Event(), []
+
+    def cargar():
+        llamadas.append(1)
+        if len(llamadas) > 1:
+            liberar.wait(2)
+        return len(llamadas)
+
+    cache.obtener(("libros",), cargar)
+    for _ in range(5):
+        cache.obtener(("libros",), cargar)
+    liberar.set()
+    esperar(lambda: not cache._refrescando)
+    assert len(llamadas) == 2
+
+def test_si_el_refresco_falla_sigue_la_copia():
+    cache = CacheLibreria(ttl=0)
+    cache.obtener(("libros",), lambda: "copia")
+
+    def fallar():
+        raise RuntimeError("sin red")
+
+    cache.obtener(("libros",), fallar)
+    esperar(lambda: not cache._refrescando)
+    assert cache.obtener_con_version(("libros",), fallar)[0] == "copia"
+
+def test_invalidar_descarta_solo_la_tabla_y_sus_vistas():
+    cache = CacheLibreria(ttl=60)
+    libros, autores, tipos, vista = Contador(), Contador(), Contador(), Contador()
+    cache.obtener(("vista_libros", None), libros)
+    cache.obtener(("vista_libros", None, "pagina", 0, 12), libros)
+    cache.obtener(("autores", None), autores)
+    cache.obtener(("tipos", None), tipos)
+    cache.obtener(("vista_autores", None, "pagina"), vista)
+
+    cache.invalidar("autores")
+    for clave, cargar in [(("vista_libros", None), libros), (("autores", None), autores),
+                          (("tipos", None), tipos), (("vista_autores", None, "pagina"), vista)]:
+        cache.obtener(clave, cargar)
+    # autores y su vista derivada (vista_autores) se vuelven a leer; el resto no
+    assert (libros.llamadas, autores.llamadas, tipos.llamadas, vista.llamadas) == (2, 2, 1, 2)
+
+def test_lectura_invalidada_en_curso_no_se_guarda():
+    cache = CacheLibreria(ttl=60)
+
+    def cargar_mientras_escriben():
+        cache.invalidar("libros")
+        return "leido antes de la escritura"
+
+    assert cache.obtener(("libros",), cargar_mientras_escriben) == "leido antes de la escritura"
+    assert cache.obtener(("libros",), lambda: "fresco") == "fresco"
+
+def test_parchear_modifica_las_conservadas_y_cambia_la_version():
+    cache = CacheLibreria(ttl=60)
+    lista, version = cache.obtener_con_version(("vista_libros", None), Contador())
+    pagina, _ = cache.obtener_con_version(("vista_libros", None, "pagina"), lambda: (Contador()(), 2))
+    cache.obtener(("vista_libros", None, "filtrado"), Contador())
+
+    cache.parchear("vista_libros", 1, {"estado": "Leído"}, conservar=lambda c: c[2:3] != ("filtrado",))
+
+    nueva, nueva_version = cache.obtener_con_version(("vista_libros", None), Contador())
+    assert nueva is lista and nueva[0]["estado"] == "Leído" and nueva_version > version
+    assert pagina[0][0]["estado"] == "Leído"
+    # La no conservada se descartó: se vuelve a cargar
+    recargar = Contador()
+    cache.obtener(("vista_libros", None, "filtrado"), recargar)
+    assert recargar.llamadas == 1
+
+def test_parchear_de_vuelta_restaura_el_estado():
+    # Lo que hace actualizar_estado_optimista si la escritura falla
+    cache = CacheLibreria(ttl=60)
+    filas = cache.obtener(("vista_libros", None), Contador())
+    conservar = lambda clave: True
+    cache.parchear("vista_libros", 2, {"estado": "Abandonado"}, conservar)
+    cache.parchear("vista_libros", 2, {"estado": "Leído"}, conservar)
+    assert cache.obtener(("vista_libros", None), Contador()) is filas
+    assert [f["estado"] for f in filas] == ["Por leer", "Leído"]
+
+def test_parchear_descarta_las_vistas_derivadas():
+    cache = CacheLibreria(ttl=60)
+    cache.obtener(("vista_autores", None, "pagina"), Contador())
+    cache.parchear("vista_libros", 1, {"estado": "Leído"}, conservar=lambda c: True)
+    recargar = Contador()
+    cache.obtener(("vista_autores", None, "pagina"), recargar)
+    assert recargar.llamadas == 1
@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+
+import cache_portadas
+from cache_portadas import CachePortadas
+
+class Bucket:
+    """Fuente de descargas que registra qué rutas se pidieron y desde qué hilo."""
+
+    def __init__(self):
+        self.pedidas = []
+        self.hilos = {}
+
+    def __call__(self, ruta):
+        self.pedidas.append(ruta)
+        self.hilos[ruta] = threading.current_thread().name
+        return ruta.encode() * 10
+
+@pytest.fixture
+def bucket():
+    return Bucket()
+
+@pytest.fixture
+def cache(tmp_path, bucket):
+    return CachePortadas(tmp_path / "portadas", bucket, max_bytes=10_000, max_entradas=3)
+
+def test_asegurar_descarga_una_sola_vez(cache, bucket):
+    archivo = cache.asegurar("a/tarjeta.webp")
+    assert archivo.read_bytes() == b"a/tarjeta.webp" * 10
+    assert cache.asegurar("a/tarjeta.webp") == archivo
+    assert bucket.pedidas == ["a/tarjeta.webp"]
+    assert (cache.aciertos, cache.fallos) == (1, 1)
+
+def test_presente_no_descarga(cache, bucket):
+    assert not cache.presente("a/tarjeta.webp")
+    cache.asegurar("a/tarjeta.webp")
+    assert cache.presente("a/tarjeta.webp")
+    assert bucket.pedidas == ["a/tarjeta.webp"]
+
+def test_desaloja_las_menos_usadas(cache):
+    for ruta in ["a", "b", "c"]:
+        cache.asegurar(ruta)
+    cache.presente("a")  # "a" pasa a ser la más reciente
+    cache.asegurar("d")
+    assert [cache.presente(r) for r in ["a", "b", "c", "d"]] == [True, False, True, True]
+
+def test_ruta_fuera_de_la_carpeta(cache):
+    with pytest.raises(ValueError):
+        cache.asegurar("../secreto")
+
+def test_precargar_solo_encola_las_faltantes(cache, bucket, monkeypatch):
+    monkeypatch.setattr(cache_portadas, "get_cache_portadas", lambda _bucket: cache)
+    cache.asegurar("a")
+    cache_portadas.precargar("portadas_libros", ["a", "b", "c", "b", "../secreto"])
+    assert sorted(bucket.pedidas) == ["a", "b", "c"]
+    assert all(bucket.hilos[r].startswith("nbooks-portadas") for r in ["b", "c"])
+    # En la siguiente página ya están todas: no se descarga nada
+    cache_portadas.precargar("portadas_libros", ["a", "b", "c"])
+    assert sorted(bucket.pedidas) == ["a", "b", "c"]
+
+def test_el_pool_de_descargas_es_uno_solo():
+    assert cache_portadas._pool_descargas() is cache_portadas._pool_descargas()
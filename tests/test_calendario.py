@@ -0,0 +1,104 @@
+import datetime
+import itertools
+
+import pytest
+
+import calendario
+from benchmarks.cliente_falso import ClienteFalso
+from repositorio import RepositorioSQLite
+
+D = datetime.date
+HOY = D(2024, 6, 15)
+DESDE, HASTA = D(2024, 6, 1), D(2024, 6, 30)
+
+def lectura(inicio=None, fin=None, estado="Leído", nombre="L"):
+    return {"nombre": nombre, "fecha_inicio": inicio, "fecha_leido": fin, "estado_lectura": estado}
+
+#================== LECTURAS Y VENTANA =========================
+
+@pytest.mark.parametrize("libro, esperado", [
+    (lectura("2024-06-01", "2024-06-10"), (D(2024, 6, 1), D(2024, 6, 10))),
+    (lectura(None, "2024-06-10"), (D(2024, 6, 10), D(2024, 6, 10))),
+    (lectura("2024-06-01", None, "Abandonado"), (D(2024, 6, 1), D(2024, 6, 1))),
+    (lectura("2024-06-01", None, "En proceso"), (D(2024, 6, 1), HOY)),
+    (lectura("2024-07-01", None, "En proceso"), (D(2024, 7, 1), D(2024, 7, 1))),
+    (lectura("2024-06-10", "2024-06-01"), (D(2024, 6, 1), D(2024, 6, 10))),
+    (lectura("2024-06-01T10:00:00", D(2024, 6, 3)), (D(2024, 6, 1), D(2024, 6, 3))),
+    (lectura(), (None, None)),
+])
+def test_extremos(libro, esperado):
+    assert calendario.extremos(libro, HOY) == esperado
+
+@pytest.fixture(scope="module")
+def libros():
+    # Todas las combinaciones: una sola fecha, las dos, al revés (fin antes que inicio)
+    fechas = [None, "2024-05-20", "2024-06-01", "2024-06-15", "2024-06-30", "2024-07-05"]
+    combinaciones = itertools.product(fechas, fechas, ["Leído", "En proceso"])
+    return [{"id": i, **lectura(*c, nombre=f"L{i}")} for i, c in enumerate(combinaciones, start=1)]
+
+def esperados(libros):
+    return {l["id"] for l in libros if calendario.en_ventana(l, DESDE, HASTA, HOY)}
+
+def test_en_ventana_coincide_con_el_filtro_de_postgrest(libros):
+    cliente = ClienteFalso({"libros": libros})
+    filtradas = cliente.table("libros").select("id").or_(calendario.filtro_ventana(DESDE, HASTA)).execute().data
+    assert {f["id"] for f in filtradas} == esperados(libros)
+
+def test_en_ventana_coincide_con_la_consulta_de_sqlite(libros, tmp_path):
+    repositorio = RepositorioSQLite(":memory:", tmp_path / "portadas")
+    with repositorio._transaccion() as conexion:
+        conexion.executemany(
+            "insert into libros (id, nombre, estado_lectura, fecha_inicio, fecha_leido) values (?, ?, ?, ?, ?)",
+            [(l["id"], l["nombre"], l["estado_lectura"], l["fecha_inicio"], l["fecha_leido"]) for l in libros],
+        )
+    assert {f["id"] for f in repositorio.lecturas_en_ventana(DESDE, HASTA)} == esperados(libros)
+
+def test_lecturas_al_reves_o_solo_con_fin():
+    libros = [
+        {"id": 1, **lectura("2024-07-05", "2024-06-10")},  # al revés, el inicio después de la ventana
+        {"id": 2, **lectura("2024-06-10", "2024-05-20")},  # al revés, el fin antes de la ventana
+        {"id": 3, **lectura(None, "2024-06-12")},           # solo fecha de fin
+        {"id": 4, **lectura(None, "2024-06-12", "En proceso")},
+    ]
+    cliente = ClienteFalso({"libros": libros})
+    filtradas = cliente.table("libros").select("id").or_(calendario.filtro_ventana(DESDE, HASTA)).execute().data
+    assert {f["id"] for f in filtradas} == esperados(libros) == {1, 2, 3, 4}
+
+#================== AGREGADOS =========================
+
+def test_conteos_por_dia_y_semana():
+    libros = [
+        lectura(None, "2024-06-03"), lectura("2024-05-01", "2024-06-03"), lectura(None, "2024-06-09"),
+        lectura(None, "2024-06-10"), lectura(None, "2024-07-01"), lectura("2024-06-05", None, "En proceso"),
+    ]
+    dias = calendario.conteos_por_dia(libros, DESDE, HASTA)
+    assert dias == {D(2024, 6, 3): 2, D(2024, 6, 9): 1, D(2024, 6, 10): 1}
+    # 3 y 9 de junio caen en la semana del lunes 3; el 10 es el lunes siguiente
+    assert calendario.conteos_por_semana(dias) == {D(2024, 6, 3): 3, D(2024, 6, 10): 1}
+
+def test_matriz_heatmap():
+    z, semanas, fechas = calendario.matriz_heatmap({D(2024, 6, 3): 2}, DESDE, HASTA)
+    # El 1 de junio de 2024 es sábado: la grilla empieza el lunes 27 de mayo
+    assert semanas[0] == D(2024, 5, 27) and len(semanas) == 5
+    assert z[0][0] is None and fechas[0][0] == ""
+    assert z[5][0] == 0 and fechas[5][0] == "2024-06-01"
+    assert z[0][1] == 2
+    assert z[6][4] == 0 and fechas[6][4] == "2024-06-30"  # domingo, último día
+    assert sum(v for fila in z for v in fila if v is not None) == 2
+    assert sum(v is not None for fila in z for v in fila) == 30
+
+def test_tramos_recorta_y_reparte_en_carriles():
+    libros = [
+        lectura("2024-05-20", "2024-06-05", nombre="a"),
+        lectura("2024-06-03", "2024-06-08", nombre="b"),
+        lectura("2024-06-06", "2024-06-07", nombre="c"),
+        lectura("2024-06-10", None, "En proceso", nombre="d"),
+        lectura("2024-07-02", "2024-07-03", nombre="fuera"),
+    ]
+    tramos = {t["nombre"]: t for t in calendario.tramos(libros, DESDE, HASTA, HOY)}
+    assert set(tramos) == {"a", "b", "c", "d"}
+    assert (tramos["a"]["inicio"], tramos["a"]["fin"]) == (DESDE, D(2024, 6, 6))  # fin exclusivo
+    assert tramos["d"]["fin"] == D(2024, 6, 16)
+    # a y b se solapan; c empieza cuando a ya terminó y reusa su carril
+    assert (tramos["a"]["carril"], tramos["b"]["carril"], tramos["c"]["carril"]) == (0, 1, 0)
+    assert max(t["carril"] for t in tramos.values()) == 1
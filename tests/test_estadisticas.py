@@ -0,0 +1,50 @@
+import pytest
+
+import estadisticas
+import importacion
+import utils
+from benchmarks.cliente_falso import ClienteFalso
+from benchmarks.generador import generar_biblioteca
+from repositorio import RepositorioSQLite, RepositorioSupabase
+from tipos_libro import preparar_libros
+
+FILAS = [
+    {"nombre": "Rayuela", "autor": "Cortázar", "tipos": "Novela", "estado_lectura": "Leído", "fecha_leido": "2024-03-02"},
+    {"nombre": "Ficciones", "autor": "Borges", "tipos": "Cuento, Clásico", "estado_lectura": "Leído", "fecha_leido": "2024-03-20"},
+    {"nombre": "El Aleph", "autor": "Borges", "tipos": "Cuento", "estado_lectura": "Por leer"},
+    {"nombre": "Pedro Páramo", "autor": "Rulfo", "estado_lectura": "En proceso"},
+]
+
+def test_agregar():
+    libros = preparar_libros([
+        {"id": 1, "estado_lectura": "Leído", "fecha_leido": "2024-03-02", "tipos_lista": [{"id": 1, "nombre": "Novela"}]},
+        {"id": 2, "estado_lectura": "Leído", "fecha_leido": "2024-03-20", "tipos_lista": [{"id": 1, "nombre": "Novela"}]},
+        {"id": 3, "estado_lectura": "Por leer", "fecha_leido": None, "tipos_lista": []},
+    ])
+    assert estadisticas.por_dimension(estadisticas.agregar(libros)) == {
+        "mes": {"2024-03": 2},
+        "estado": {"Leído": 2, "Por leer": 1},
+        "tipo": {"Novela": 2},
+    }
+
+def test_sqlite_agrega_igual_que_en_memoria(tmp_path):
+    repositorio = RepositorioSQLite(":memory:", tmp_path / "portadas")
+    importacion.importar(repositorio, FILAS)
+    en_memoria = estadisticas.agregar(preparar_libros(repositorio.listar("vista_libros")))
+    assert estadisticas.por_dimension(repositorio.estadisticas()) == estadisticas.por_dimension(en_memoria)
+
+@pytest.fixture
+def cliente(monkeypatch):
+    cliente = ClienteFalso(generar_biblioteca(300))
+    monkeypatch.setattr(utils, "_repositorio_lectura", lambda: RepositorioSupabase(cliente))
+    monkeypatch.setattr(utils, "get_cache", lambda cache=utils.CacheLibreria(): cache)
+    monkeypatch.setattr(utils, "modo_snapshot", lambda: False)
+    return cliente
+
+def test_por_defecto_lee_los_agregados_del_servidor(cliente):
+    filas = utils.obtener_estadisticas()
+    # Sin bajar los libros: solo la vista de contadores, una vez
+    utils.obtener_estadisticas()
+    assert [(l.tabla, l.operacion) for l in cliente.llamadas] == [("vista_estadisticas", "select")]
+    libros = preparar_libros(cliente.filas("vista_libros"))
+    assert estadisticas.por_dimension(filas) == estadisticas.por_dimension(estadisticas.agregar(libros))
@@ -0,0 +1,72 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import utils
+
+class RepositorioLento:
+    """Guarda (o falla) recién cuando el test lo suelta."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.soltar = threading.Event()
+        self.guardados = []
+
+    def actualizar_libro(self, libro_id, datos):
+        self.soltar.wait(2)
+        if self.error:
+            raise self.error
+        self.guardados.append((libro_id, datos))
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = utils.CacheLibreria()
+    monkeypatch.setattr(utils, "get_cache", lambda: cache)
+    monkeypatch.setattr(utils, "modo_snapshot", lambda: False)
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(utils, "_pool_escrituras", lambda: pool)
+    yield cache
+    pool.shutdown()
+
+def cargar(cache, clave, filas):
+    return cache.obtener(clave, lambda: [dict(f) for f in filas])
+
+FILAS = [{"id": 1, "nombre": "Rayuela", "estado_lectura": "Por leer"}, {"id": 2, "nombre": "Ficciones", "estado_lectura": "Leído"}]
+LISTA, FILTRADA = ("vista_libros", None), ("vista_libros", None, "filtrada", "Por leer")
+
+def estados(cache, clave):
+    return [f["estado_lectura"] for f in cargar(cache, clave, FILAS)]
+
+def test_aplica_el_estado_antes_de_guardar(cache, monkeypatch):
+    repositorio = RepositorioLento()
+    monkeypatch.setattr(utils, "repositorio_de_sesion", lambda: repositorio)
+    libro = cargar(cache, LISTA, FILAS)[0]
+    cargar(cache, FILTRADA, FILAS[:1])
+
+    escritura = utils.actualizar_estado_optimista(libro, "Leído")
+    # Todavía sin guardar: la tarjeta y la lista ya tienen el estado nuevo y
+    # la página filtrada por el estado viejo se descartó
+    assert libro["estado_lectura"] == "Leído"
+    assert estados(cache, LISTA) == ["Leído", "Leído"]
+    assert FILTRADA not in cache._entradas
+
+    repositorio.soltar.set()
+    escritura.result(2)
+    assert repositorio.guardados == [(1, {"estado_lectura": "Leído"})]
+    assert estados(cache, LISTA) == ["Leído", "Leído"]
+
+def test_si_falla_restaura_el_estado_anterior(cache, monkeypatch):
+    repositorio = RepositorioLento(error=RuntimeError("sin conexión"))
+    monkeypatch.setattr(utils, "repositorio_de_sesion", lambda: repositorio)
+    cargar(cache, LISTA, FILAS)
+    # La tarjeta puede tener una copia de la fila (de una página ya descartada)
+    libro = dict(FILAS[0])
+
+    escritura = utils.actualizar_estado_optimista(libro, "Abandonado")
+    assert estados(cache, LISTA) == ["Abandonado", "Leído"]
+
+    repositorio.soltar.set()
+    assert isinstance(escritura.exception(2), RuntimeError)
+    assert libro["estado_lectura"] == "Por leer"
+    assert estados(cache, LISTA) == ["Por leer", "Leído"]
@@ -0,0 +1,169 @@
+import http.server
+import threading
+
+import pytest
+
+import importacion
+from benchmarks.cliente_falso import ClienteFalso
+from repositorio import RepositorioSQLite, RepositorioSupabase
+
+#================== NORMALIZACIÓN =========================
+
+def test_normalizar_fila_completa():
+    fila = importacion.normalizar_fila({
+        "nombre": "  Rayuela ",
+        "autor": " Julio Cortázar ",
+        "tipos": "Novela; Clásico, Novela ,",
+        "estado_lectura": "leído",
+        "en_kindle": "Sí",
+        "descripcion": "  ",
+        "fecha_inicio": "2024-01-05",
+        "fecha_leido": "",
+        "portada": "portadas/rayuela.jpg",
+    })
+    assert fila == {
+        "nombre": "Rayuela",
+        "autor": "Julio Cortázar",
+        "tipos": ["Novela", "Clásico"],
+        "estado_lectura": "Leído",
+        "en_kindle": True,
+        "descripcion": None,
+        "fecha_inicio": "2024-01-05",
+        "fecha_leido": None,
+        "portada": "portadas/rayuela.jpg",
+    }
+
+def test_normalizar_fila_valores_por_defecto():
+    fila = importacion.normalizar_fila({"nombre": "Ficciones"})
+    assert fila["estado_lectura"] == "Por leer"
+    assert (fila["autor"], fila["tipos"], fila["en_kindle"], fila["portada"]) == (None, [], False, None)
+
+def test_normalizar_fila_desde_json():
+    fila = importacion.normalizar_fila({"nombre": "El Aleph", "tipos": [" Cuento ", "", "Cuento"], "en_kindle": False})
+    assert fila["tipos"] == ["Cuento"]
+    assert fila["en_kindle"] is False
+
+@pytest.mark.parametrize("valor, esperado", [("1", True), ("x", True), ("TRUE", True), ("no", False), ("", False)])
+def test_normalizar_fila_en_kindle(valor, esperado):
+    assert importacion.normalizar_fila({"nombre": "L", "en_kindle": valor})["en_kindle"] is esperado
+
+@pytest.mark.parametrize("fila, mensaje", [
+    ({"nombre": "   "}, "Falta el nombre"),
+    ({"nombre": "L", "estado_lectura": "releyendo"}, "Estado de lectura desconocido"),
+    ({"nombre": "L", "fecha_leido": "05/01/2024"}, "Fecha inválida"),
+])
+def test_normalizar_fila_invalida(fila, mensaje):
+    with pytest.raises(ValueError, match=mensaje):
+        importacion.normalizar_fila(fila)
+
+#================== IMPORTACIÓN =========================
+
+@pytest.fixture
+def repositorio(tmp_path):
+    return RepositorioSQLite(":memory:", tmp_path / "portadas")
+
+def test_variantes_de_un_nombre_no_duplican(repositorio):
+    filas = [
+        {"nombre": "Cien años de soledad", "autor": "García Márquez", "tipos": "Realismo mágico"},
+        {"nombre": "Cien Años de Soledad", "autor": "Garcia Marquez", "tipos": "realismo magico; Clásico"},
+        {"nombre": "El otoño del patriarca", "autor": "GARCIA  MARQUEZ"},
+    ]
+    resumen = importacion.importar(repositorio, filas)
+
+    assert resumen["errores"] == []
+    assert [a["nombre"] for a in repositorio.listar("autores")] == ["García Márquez"]
+    assert [t["nombre"] for t in repositorio.listar("tipos")] == ["Clásico", "Realismo mágico"]
+    libros = {l["nombre"]: l for l in repositorio.listar("vista_libros")}
+    assert set(libros) == {"Cien Años de Soledad", "El otoño del patriarca"}
+    assert libros["Cien Años de Soledad"]["tipos"] == "Clásico, Realismo mágico"
+
+def test_reimportar_con_otra_grafia_actualiza(repositorio):
+    importacion.importar(repositorio, [{"nombre": "Rayuela", "autor": "Julio Cortázar", "estado_lectura": "Por leer"}])
+    importacion.importar(repositorio, [{"nombre": "Rayuela", "autor": "julio cortazar", "estado_lectura": "Leído"}])
+
+    libros = repositorio.listar("vista_libros")
+    assert [(l["nombre"], l["autor"], l["estado_lectura"]) for l in libros] == [("Rayuela", "Julio Cortázar", "Leído")]
+
+def test_mismo_autor_con_y_sin_tilde_en_un_lote():
+    cliente = ClienteFalso({"autores": [], "tipos": [], "libros": [], "libro_tipos": []})
+    filas = [
+        {"nombre": "Crónica de una muerte anunciada", "autor": "García"},
+        {"nombre": "La hojarasca", "autor": "garcia"},
+        {"nombre": "Relato de un náufrago", "autor": " GARCÍA "},
+    ]
+    resumen = importacion.importar(RepositorioSupabase(cliente), filas)
+
+    assert resumen["errores"] == []
+    assert [(a["nombre"], a["nombre_busqueda"]) for a in cliente.tablas["autores"]] == [("García", "garcia")]
+    assert {l["autor_id"] for l in cliente.tablas["libros"]} == {cliente.tablas["autores"][0]["id"]}
+
+def test_el_upsert_de_nombres_apunta_a_la_clave_normalizada():
+    # El cliente falso rechaza, como Postgres, un on_conflict sin clave única (sql/010)
+    cliente = ClienteFalso({"autores": []})
+    with pytest.raises(RuntimeError, match="ON CONFLICT"):
+        cliente.table("autores").upsert([{"nombre": "García"}], on_conflict="nombre").execute()
+    assert RepositorioSupabase(cliente).resolver_nombres("autores", ["García", "garcia"]) == {"García": 1, "garcia": 1}
+
+#================== PORTADAS POR URL =========================
+
+@pytest.mark.parametrize("url", [
+    "file:///etc/passwd",
+    "ftp://ejemplo.com/portada.jpg",
+    "http://127.0.0.1/portada.jpg",
+    "http://localhost:8501/portada.jpg",
+    "http://10.0.0.7/portada.jpg",
+    "http://192.168.1.1/portada.jpg",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://[::1]/portada.jpg",
+    "http://[::ffff:127.0.0.1]/portada.jpg",
+    "https:///sin-host",
+])
+def test_urls_de_portada_rechazadas(url):
+    with pytest.raises(ValueError):
+        importacion.validar_url_portada(url)
+
+def test_url_de_portada_publica():
+    importacion.validar_url_portada("https://93.184.216.34/portada.jpg")
+
+@pytest.fixture
+def servidor(monkeypatch):
+    """Servidor HTTP local; la validación se relaja para todo salvo ``/interno``."""
+
+    class Manejador(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/redirige":
+                self.send_response(302)
+                self.send_header("Location", f"http://127.0.0.1:{self.server.server_port}/interno")
+                self.end_headers()
+                return
+            cuerpo = b"x" * (5000 if self.path == "/grande" else 100)
+            self.send_response(200)
+            if self.path != "/grande":
+                self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, *_):
+            pass
+
+    def validar(url):
+        if url.endswith("/interno"):
+            raise ValueError("Dirección no permitida para una portada: 127.0.0.1")
+
+    monkeypatch.setattr(importacion, "validar_url_portada", validar)
+    monkeypatch.setattr(importacion, "MAX_BYTES_PORTADA", 1000)
+    servidor = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Manejador)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{servidor.server_port}"
+    servidor.shutdown()
+
+def test_descarga_de_portada(servidor):
+    assert importacion._leer_portada(f"{servidor}/chica") == b"x" * 100
+
+def test_portada_demasiado_grande(servidor):
+    with pytest.raises(ValueError, match="supera"):
+        importacion._leer_portada(f"{servidor}/grande")
+
+def test_redireccion_a_una_direccion_interna(servidor):
+    with pytest.raises(ValueError, match="no permitida"):
+        importacion._leer_portada(f"{servidor}/redirige")
@@ -0,0 +1,63 @@
+import pytest
+
+from indice_busqueda import IndiceCatalogo, normalizar
+from tipos_libro import preparar_libros
+
+def libro(libro_id, nombre, autor, tipos, estado="Por leer"):
+    return {"id": libro_id, "nombre": nombre, "autor": autor, "tipos": tipos, "estado_lectura": estado}
+
+@pytest.fixture
+def indice():
+    return IndiceCatalogo(preparar_libros([
+        libro(1, "Cien años de soledad", "Gabriel García Márquez", "Realismo mágico, Clásico", "Leído"),
+        libro(2, "El Aleph", "Jorge Luis Borges", "Cuento, Fantasía", "Leído"),
+        libro(3, "Ficciones", "Jorge Luis Borges", "Cuento", "Por leer"),
+        libro(4, "La ciudad y los perros", "Mario Vargas Llosa", "Clásico", "En proceso"),
+        libro(5, "Ñandú", None, None, "Abandonado"),
+    ]))
+
+def ids(libros):
+    return [l["id"] for l in libros]
+
+def test_normalizar():
+    assert normalizar("  García   MÁRQUEZ ") == "garcia marquez"
+    assert normalizar("Ñandú") == "nandu"
+    assert normalizar(None) == ""
+
+def test_sin_filtros_devuelve_todo_en_el_orden_original(indice):
+    assert ids(indice.filtrar()) == [1, 2, 3, 4, 5]
+    assert ids(indice.filtrar(busqueda="", autor="", tipo=None, estado=None)) == [1, 2, 3, 4, 5]
+
+@pytest.mark.parametrize("consulta", ["garcia", "GARCÍA", "Márquez", "soledad", "  realismo   MAGICO "])
+def test_busqueda_ignora_tildes_mayusculas_y_espacios(indice, consulta):
+    assert ids(indice.filtrar(busqueda=consulta)) == [1]
+
+def test_busqueda_corta_sin_trigramas(indice):
+    assert ids(indice.filtrar(busqueda="Ña")) == [5]
+    assert ids(indice.filtrar(busqueda="el")) == [1, 2]  # "Gabriel", "El Aleph"
+
+def test_busqueda_abarca_titulo_autor_y_tipos(indice):
+    assert ids(indice.filtrar(busqueda="cuento")) == [2, 3]
+    assert ids(indice.filtrar(busqueda="borges")) == [2, 3]
+    assert ids(indice.filtrar(busqueda="inexistente")) == []
+
+def test_autor_solo_mira_el_autor(indice):
+    assert ids(indice.filtrar(autor="jorge")) == [2, 3]
+    assert ids(indice.filtrar(autor="cuento")) == []
+    assert ids(indice.filtrar(autor="VARGAS")) == [4]
+
+def test_tipo_exacto_sin_tildes_ni_mayusculas(indice):
+    assert ids(indice.filtrar(tipo="Clásico")) == [1, 4]
+    assert ids(indice.filtrar(tipo="clasico")) == [1, 4]
+    # El tipo es exacto, no una subcadena
+    assert ids(indice.filtrar(tipo="Realismo")) == []
+
+def test_estado_exacto(indice):
+    assert ids(indice.filtrar(estado="Leído")) == [1, 2]
+    assert ids(indice.filtrar(estado="No leído")) == []
+
+def test_filtros_combinados_se_intersectan(indice):
+    assert ids(indice.filtrar(autor="borges", tipo="cuento", estado="Leído")) == [2]
+    assert ids(indice.filtrar(busqueda="clasico", estado="En proceso")) == [4]
+    assert ids(indice.filtrar(busqueda="aleph", autor="garcia")) == []
+    assert ids(indice.filtrar(tipo="Cuento", busqueda="ficciones")) == [3]
@@ -0,0 +1,27 @@
+import types
+
+import pytest
+
+import portadas
+
+@pytest.fixture
+def secrets(monkeypatch):
+    def usar(valores):
+        monkeypatch.setattr(portadas, "st", types.SimpleNamespace(secrets=valores))
+    return usar
+
+def test_url_publica_del_bucket(secrets):
+    secrets({"supabase": {"url": "https://x.supabase.co/", "key": "k"}})
+    assert portadas.url_publica("a/completa.webp") == (
+        "https://x.supabase.co/storage/v1/object/public/portadas_libros/a/completa.webp"
+    )
+
+def test_url_publica_sin_supabase_usa_el_placeholder(secrets):
+    secrets({"nbooks": {"backend": "sqlite"}})
+    assert portadas.url_publica("a/completa.webp") == portadas.PLACEHOLDER_URL
+
+def test_url_portada_sin_secrets(monkeypatch):
+    # Sin archivo de secrets st.secrets lanza un FileNotFoundError
+    monkeypatch.setattr(portadas, "cache_activa", lambda: False)
+    assert portadas.url_portada("a/completa.webp", "tarjeta") == portadas.PLACEHOLDER_URL
+    assert portadas.url_portada(None) == portadas.PLACEHOLDER_URL
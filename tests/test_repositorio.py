@@ -0,0 +1,49 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from repositorio import RepositorioSQLite
+from utils import CacheLibreria
+
+def esperar(condicion, segundos=2.0):
+    limite = time.monotonic() + segundos
+    while not condicion():
+        assert time.monotonic() < limite, "no se cumplió a tiempo"
+        time.sleep(0.01)
+
+#================== SQLITE EN MEMORIA =========================
+
+@pytest.fixture(params=[":memory:", "archivo"])
+def repositorio(request, tmp_path):
+    ruta = request.param if request.param == ":memory:" else tmp_path / "nbooks.db"
+    return RepositorioSQLite(ruta, tmp_path / "portadas")
+
+def test_otro_hilo_ve_la_misma_base(repositorio):
+    repositorio.resolver_nombres("autores", ["Borges"])
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        autores = pool.submit(repositorio.listar, "autores").result()
+        pool.submit(repositorio.resolver_nombres, "autores", ["Cortázar"]).result()
+    assert [a["nombre"] for a in autores] == ["Borges"]
+    assert [a["nombre"] for a in repositorio.listar("autores")] == ["Borges", "Cortázar"]
+
+def test_refresco_de_la_cache_en_segundo_plano(repositorio):
+    cache = CacheLibreria(ttl=0)
+    cargar = lambda: [a["nombre"] for a in repositorio.listar("autores")]
+    assert cache.obtener(("autores",), cargar) == []
+
+    # La escritura corre en el pool (como las optimistas) y la relectura en
+    # el hilo de refresco de la caché: los tres hilos ven la misma base
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pool.submit(repositorio.resolver_nombres, "autores", ["Borges"]).result()
+    cache.obtener(("autores",), cargar)  # vencida: devuelve la copia y refresca
+    esperar(lambda: cache.obtener(("autores",), cargar) == ["Borges"])
+
+def test_escrituras_concurrentes(repositorio):
+    def registrar(i):
+        repositorio.resolver_nombres("tipos", [f"Tipo {i}"])
+        return repositorio.listar("tipos")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(registrar, range(40)))
+    assert len(repositorio.listar("tipos")) == 40
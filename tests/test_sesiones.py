@@ -0,0 +1,73 @@
+import time
+import types
+
+from sesiones import PoolSesiones
+
+class AuthFalso:
+    def __init__(self, cuenta: list):
+        self.cuenta = cuenta
+        self.llamadas = []
+
+    def _respuesta(self):
+        self.cuenta.append(None)
+        n = len(self.cuenta)
+        return types.SimpleNamespace(
+            user=types.SimpleNamespace(id="usuario"),
+            session=types.SimpleNamespace(access_token=f"a{n}", refresh_token=f"r{n}", expires_at=time.time() + 3600),
+        )
+
+    def sign_in_with_password(self, credenciales):
+        self.llamadas.append("sign_in")
+        return self._respuesta()
+
+    def set_session(self, access_token, refresh_token):
+        self.llamadas.append(("set_session", access_token))
+        return self._respuesta()
+
+    def sign_out(self, opciones):
+        self.llamadas.append(("sign_out", opciones["scope"]))
+
+def crear_pool():
+    clientes, cuenta = [], []
+
+    def crear():
+        clientes.append(types.SimpleNamespace(auth=AuthFalso(cuenta)))
+        return clientes[-1]
+
+    return PoolSesiones(crear, intervalo=0), clientes
+
+def test_iniciar_guarda_el_usuario():
+    pool, _ = crear_pool()
+    _, sesion = pool.iniciar("pestaña", "a@b.c", "x")
+    assert sesion.usuario == "usuario"
+    assert pool.activas() == 1
+
+def test_iniciar_de_nuevo_cierra_el_cliente_anterior():
+    pool, clientes = crear_pool()
+    _, primera = pool.iniciar("pestaña", "a@b.c", "x")
+    _, segunda = pool.iniciar("pestaña", "a@b.c", "x")
+
+    assert clientes[0].auth.llamadas == ["sign_in", ("sign_out", "local")]
+    assert primera.cliente is None and segunda.cliente is clientes[1]
+    assert pool.activas() == 1
+
+def test_iniciar_de_nuevo_revoca_una_sesion_desalojada():
+    pool, clientes = crear_pool()
+    _, primera = pool.iniciar("pestaña", "a@b.c", "x")
+    pool.inactividad = 0
+    time.sleep(0.01)
+    pool.barrer()
+    assert primera.cliente is None and pool.activas() == 0
+
+    pool.iniciar("pestaña", "a@b.c", "x", anterior=primera)
+    # Un cliente descartable con los tokens de la anterior, solo para cerrarla
+    revocador = clientes[2]
+    assert revocador.auth.llamadas == [("set_session", "a1"), ("sign_out", "local")]
+    assert pool.activas() == 1
+
+def test_cerrar_no_suelta_una_sesion_nueva_de_la_pestaña():
+    pool, _ = crear_pool()
+    _, primera = pool.iniciar("pestaña", "a@b.c", "x")
+    _, segunda = pool.iniciar("pestaña", "a@b.c", "x")
+    pool.cerrar("pestaña", primera)
+    assert pool.activas() == 1 and segunda.cliente is not None
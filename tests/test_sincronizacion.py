@@ -0,0 +1,98 @@
+import datetime
+
+from benchmarks.cliente_falso import ClienteFalso
+from repositorio import RepositorioSupabase
+from sincronizacion import LIMITE_CAMBIOS, MARGEN, ReplicaLibros
+
+T0 = datetime.datetime(2024, 5, 1, 12, 0, tzinfo=datetime.timezone.utc)
+
+def fila(libro_id, nombre, minutos, **extra):
+    return {"id": libro_id, "nombre": nombre, "tipos": None, "updated_at": (T0 + datetime.timedelta(minutes=minutos)).isoformat(), **extra}
+
+class RepositorioFalso:
+    """Devuelve lo que el test prepara y anota cada pedido."""
+
+    def __init__(self, filas):
+        self.filas = filas
+        self.cambios, self.lapidas = [], []
+        self.pedidos = []
+
+    def listar_libros(self, columnas):
+        self.pedidos.append(("listar_libros",))
+        return [dict(f) for f in self.filas]
+
+    def cambios_libros(self, desde, limite, usuario=None):
+        self.pedidos.append(("cambios_libros", desde, limite, usuario))
+        return [dict(f) for f in self.cambios[:limite]], list(self.lapidas)
+
+def nombres(libros):
+    return [l["nombre"] for l in libros]
+
+def test_primera_vez_descarga_todo_y_fija_la_marca():
+    repositorio = RepositorioFalso([fila(1, "b", 5), fila(2, "a", 10), fila(3, None, 1)])
+    replica = ReplicaLibros()
+    assert nombres(replica.sincronizar(repositorio)) == ["a", "b", None]
+    assert replica.marca == T0 + datetime.timedelta(minutes=10)
+    assert repositorio.pedidos == [("listar_libros",)]
+
+def test_despues_pide_desde_la_marca_menos_el_margen():
+    repositorio = RepositorioFalso([fila(1, "a", 10)])
+    replica = ReplicaLibros()
+    replica.sincronizar(repositorio)
+    replica.sincronizar(repositorio)
+    assert repositorio.pedidos[1] == ("cambios_libros", T0 + datetime.timedelta(minutes=10) - MARGEN, LIMITE_CAMBIOS, None)
+
+def test_fusiona_cambios_y_lapidas():
+    repositorio = RepositorioFalso([fila(1, "a", 0), fila(2, "b", 0), fila(3, "c", 0)])
+    replica = ReplicaLibros()
+    replica.sincronizar(repositorio)
+
+    repositorio.cambios = [fila(2, "b", 20, estado_lectura="Leído"), fila(4, "d", 25)]
+    repositorio.lapidas = [{"libro_id": 1, "eliminado_en": (T0 + datetime.timedelta(minutes=30)).isoformat()}]
+    libros = replica.sincronizar(repositorio)
+
+    assert nombres(libros) == ["b", "c", "d"]
+    assert libros[0]["estado_lectura"] == "Leído"
+    # La lápida es lo más reciente: de ahí sale la marca
+    assert replica.marca == T0 + datetime.timedelta(minutes=30)
+
+def test_repetir_cambios_dentro_del_margen_es_idempotente():
+    repositorio = RepositorioFalso([fila(1, "a", 10), fila(2, "b", 10)])
+    replica = ReplicaLibros()
+    primera = replica.sincronizar(repositorio)
+    repositorio.cambios = [fila(2, "b", 10)]
+    repositorio.lapidas = [{"libro_id": 99, "eliminado_en": T0.isoformat()}]  # una lápida vieja o ajena
+    assert replica.sincronizar(repositorio) == primera
+    assert replica.marca == T0 + datetime.timedelta(minutes=10)
+
+def test_con_demasiados_cambios_vuelve_a_descargar_todo():
+    repositorio = RepositorioFalso([fila(1, "a", 0)])
+    replica = ReplicaLibros()
+    replica.sincronizar(repositorio)
+
+    repositorio.filas = [fila(i, f"libro {i:05}", 60) for i in range(LIMITE_CAMBIOS + 5)]
+    repositorio.cambios = repositorio.filas
+    libros = replica.sincronizar(repositorio)
+
+    assert [p[0] for p in repositorio.pedidos] == ["listar_libros", "cambios_libros", "listar_libros"]
+    assert len(libros) == LIMITE_CAMBIOS + 5
+    assert replica.marca == T0 + datetime.timedelta(minutes=60)
+
+def test_devuelve_una_lista_nueva_cada_vez():
+    repositorio = RepositorioFalso([fila(1, "a", 0)])
+    replica = ReplicaLibros()
+    assert replica.sincronizar(repositorio) is not replica.sincronizar(repositorio)
+
+def test_la_replica_pide_las_lapidas_de_su_usuario():
+    repositorio = RepositorioFalso([fila(1, "a", 10)])
+    replica = ReplicaLibros("ana")
+    replica.sincronizar(repositorio)
+    replica.sincronizar(repositorio)
+    assert repositorio.pedidos[1][-1] == "ana"
+
+def test_las_lapidas_se_filtran_por_dueno():
+    cliente = ClienteFalso({"libros": [fila(1, "a", 0, user_id="ana"), fila(2, "b", 0, user_id="beto")]})
+    repositorio = RepositorioSupabase(cliente)
+    cliente.table("libros").delete().in_("id", [1, 2]).execute()
+    assert [l["libro_id"] for l in repositorio.cambios_libros(T0, LIMITE_CAMBIOS, "ana")[1]] == [1]
+    assert [l["libro_id"] for l in repositorio.cambios_libros(T0, LIMITE_CAMBIOS, "beto")[1]] == [2]
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+import snapshot
+from benchmarks.cliente_falso import ClienteFalso
+from benchmarks.generador import generar_biblioteca
+
+@pytest.fixture(scope="module")
+def biblioteca():
+    return generar_biblioteca(1500)  # más de una página de PostgREST
+
+def test_exporta_y_carga_todas_las_filas(biblioteca, tmp_path):
+    cliente = ClienteFalso(biblioteca)
+    carpeta = snapshot.exportar_snapshot(cliente, tmp_path)
+
+    manifest = json.loads((carpeta / "manifest.json").read_text(encoding="utf-8"))
+    assert manifest["tablas"]["vista_libros"]["filas"] == len(biblioteca["libros"])
+    datos = snapshot.cargar_snapshot(carpeta)
+    assert [l["id"] for l in datos["vista_libros"]] == sorted(l["id"] for l in biblioteca["libros"])
+    assert len(datos["libro_tipos"]) == len(biblioteca["libro_tipos"])
+
+def test_sin_libros_pero_con_autores_falla(biblioteca, tmp_path):
+    # Lo que ve la clave anónima con RLS sobre libros y no sobre autores
+    cliente = ClienteFalso({**biblioteca, "libros": [], "libro_tipos": []})
+    with pytest.raises(RuntimeError, match="vista_libros vino vacía pero autores"):
+        snapshot.exportar_snapshot(cliente, tmp_path)
+    assert list(tmp_path.iterdir()) == []
+
+def test_sin_libros_cuando_el_anterior_tenia_falla(biblioteca, tmp_path, monkeypatch):
+    snapshot.exportar_snapshot(ClienteFalso(biblioteca), tmp_path / "snapshots")
+    monkeypatch.setattr(snapshot.datetime, "datetime", _MasTarde)
+    with pytest.raises(RuntimeError, match="el snapshot anterior tenía 1500 libros"):
+        snapshot.exportar_snapshot(ClienteFalso({}), tmp_path / "snapshots")
+    assert snapshot.exportar_snapshot(ClienteFalso({}), tmp_path / "snapshots", permitir_vacio=True)
+
+def test_biblioteca_vacia(tmp_path):
+    carpeta = snapshot.exportar_snapshot(ClienteFalso({}), tmp_path)
+    assert snapshot.cargar_snapshot(carpeta)["vista_libros"] == []
+
+def test_exportar_pide_credenciales(tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        snapshot.main(["exportar", "--destino", str(tmp_path)])
+    assert "--email" in capsys.readouterr().err
+
+class _MasTarde(snapshot.datetime.datetime):
+    """Un año después: la carpeta del segundo snapshot no choca con la del primero."""
+
+    @classmethod
+    def now(cls, tz=None):
+        return super().now(tz).replace(year=super().now(tz).year + 1)
+
+@pytest.fixture
+def secrets(tmp_path):
+    ruta = tmp_path / "secrets.toml"
+    ruta.write_text('[supabase]\nurl = "https://x.supabase.co"\nkey = "anonima"\n', encoding="utf-8")
+    return ruta
+
+def test_cliente_con_sesion_de_usuario(secrets, monkeypatch):
+    cliente = ClienteFalso({})
+    monkeypatch.setattr(snapshot, "initialize_supabase_client", lambda _secrets: cliente)
+    monkeypatch.setenv("NBOOKS_PASSWORD", "secreta")
+    assert snapshot.cliente_exportacion(secrets, email="yo@ejemplo.com") is cliente
+    assert [(l.tabla, l.operacion) for l in cliente.llamadas] == [("auth", "sign_in")]
+
+def test_cliente_con_clave_de_servicio(secrets, monkeypatch):
+    monkeypatch.setattr(snapshot, "create_client", lambda url, clave: (url, clave))
+    assert snapshot.cliente_exportacion(secrets, clave_servicio="servicio") == ("https://x.supabase.co", "servicio")
+
+def test_cliente_anonimo_rechazado(secrets):
+    with pytest.raises(ValueError, match="RLS"):
+        snapshot.cliente_exportacion(secrets)
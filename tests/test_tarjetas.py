@@ -0,0 +1,27 @@
+import tarjetas
+from tipos_libro import preparar_libro
+
+def libro(libro_id, **cambios):
+    return preparar_libro({
+        "id": libro_id, "nombre": f"Libro {libro_id}", "autor": "Autora", "tipos_lista": [{"id": 1, "nombre": "Novela"}],
+        "estado_lectura": "Por leer", "en_kindle": False, "portada_path": None, **cambios,
+    })
+
+def test_la_grilla_es_un_bloque_con_un_boton_de_detalles_por_tarjeta():
+    html = tarjetas.grilla_html([libro(1), libro(2), libro(3)])
+    assert html.startswith('<div class="nb-grilla">')
+    assert html.count('class="nb-tarjeta"') == 3
+    assert [f'data-libro="{i}"' in html for i in (1, 2, 3)] == [True, True, True]
+    # Sin líneas en blanco: el bloque viaja entero al componente
+    assert "\n" not in html
+
+def test_las_tarjetas_se_cachean_por_version_de_la_fila():
+    tarjetas._tarjeta_html.cache_clear()
+    tarjetas.grilla_html([libro(1), libro(2)])
+    tarjetas.grilla_html([libro(1), libro(2, estado_lectura="Leído")])
+    info = tarjetas._tarjeta_html.cache_info()
+    assert (info.hits, info.misses) == (1, 3)
+
+def test_escapa_el_texto_de_la_fila():
+    html = tarjetas.tarjeta_html(libro(1, nombre="<script>x</script>"))
+    assert "<script>" not in html and "&lt;script&gt;" in html
@@ -0,0 +1,49 @@
+"""Tipos de novela de cada libro, parseados una sola vez al cargar los datos.
+
+``vista_libros.tipos_lista`` (sql/005_tipos_lista.sql) llega como una lista
+JSON de ``{"id", "nombre"}``. Al cargar las filas se reemplaza por una tupla
+de ``TipoLibro`` internados: todos los libros de un mismo tipo comparten el
+mismo objeto, y el resto del código usa ``libro["tipos_lista"]`` sin volver a
+partir cadenas.
+"""
+import sys
+from typing import NamedTuple
+
+class TipoLibro(NamedTuple):
+    id: int
+    nombre: str
+
+_internados = {}  # (id, nombre) -> TipoLibro
+
+def _internar(tipo_id: int, nombre: str) -> TipoLibro:
+    clave = (tipo_id, nombre)
+    tipo = _internados.get(clave)
+    if tipo is None:
+        tipo = _internados.setdefault(clave, TipoLibro(tipo_id, sys.intern(nombre)))
+    return tipo
+
+def preparar_libro(libro: dict) -> dict:
+    """Deja ``libro["tipos_lista"]`` como tupla de ``TipoLibro`` y devuelve el libro.
+
+    Si la fila no trae ``tipos_lista`` (vista sin actualizar o snapshot viejo)
+    se arma desde el texto ``tipos``, sin ids.
+    """
+    lista = libro.get("tipos_lista")
+    if isinstance(lista, tuple):
+        return libro
+    if lista is None:
+        lista = [{"id": None, "nombre": n} for n in (libro.get("tipos") or "").split(",")]
+    libro["tipos_lista"] = tuple(
+        _internar(t.get("id"), t["nombre"].strip()) for t in lista if (t.get("nombre") or "").strip()
+    )
+    return libro
+
+def preparar_libros(libros: list) -> list:
+    """Aplica ``preparar_libro`` a cada fila y devuelve la misma lista."""
+    for libro in libros:
+        preparar_libro(libro)
+    return libros
+
+def nombres_tipos(libro: dict) -> list:
+    """Nombres de los tipos de un libro ya preparado."""
+    return [tipo.nombre for tipo in libro.get("tipos_lista", ())]
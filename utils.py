@@ -0,0 +1,513 @@
+import datetime
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import streamlit as st
+from configuracion import config
+from entidades import IndiceEntidades
+from indice_busqueda import IndiceCatalogo, normalizar
+from repositorio import COLUMNAS_LISTADO, repositorio_de_sesion
+from sesiones import SesionExpirada, usuario_de_sesion
+from sincronizacion import ReplicaLibros
+from tipos_libro import preparar_libros
+import calendario
+import estadisticas
+import importacion
+
+logger = logging.getLogger("nbooks.datos")
+
+# Segundos que una lectura se considera fresca. Pasado ese tiempo se sigue
+# sirviendo la copia guardada mientras se refresca en segundo plano.
+TTL_SEGUNDOS = 300
+
+# Vistas cuyas lecturas dependen de más de una tabla: invalidar la tabla
+# invalida también la vista.
+VISTAS_DERIVADAS = {
+    "autores": ("vista_autores",),
+    "vista_libros": ("vista_autores",),
+}
+
+#================== CACHÉ DE LECTURAS =========================
+
+class CacheLibreria:
+    """Caché de lecturas compartida por todas las sesiones.
+
+    Cada entrada se guarda bajo una clave cuyo primer elemento es la tabla de
+    la que depende (p. ej. ``("vista_libros", usuario)``, ver ``_clave``), de
+    modo que una escritura en esa tabla invalida solo sus entradas. Las
+    entradas vencidas se siguen sirviendo mientras un hilo las vuelve a leer
+    (stale-while-revalidate).
+    """
+
+    def __init__(self, ttl: float = TTL_SEGUNDOS):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entradas = {}        # clave -> (datos, instante, version)
+        self._invalidaciones = {}  # tabla -> contador de invalidaciones
+        self._refrescando = set()
+        self._version = 0
+
+    def obtener(self, clave: tuple, cargador: callable) -> any:
+        """Devuelve los datos de ``clave``, cargándolos con ``cargador`` si hace falta."""
+        return self.obtener_con_version(clave, cargador)[0]
+
+    def obtener_con_version(self, clave: tuple, cargador: callable) -> tuple:
+        """Como ``obtener`` pero devuelve también la versión de los datos servidos."""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+
+        if entrada is None:
+            # Primera lectura o recién invalidada: hay que esperar a la base de datos.
+            return self._cargar(clave, cargador)
+
+        datos, instante, version = entrada
+        if time.monotonic() - instante > self.ttl:
+            self._refrescar_en_segundo_plano(clave, cargador)
+        return datos, version
+
+    def invalidar(self, *tablas: str) -> None:
+        """Descarta todas las entradas que dependen de las tablas indicadas."""
+        tablas = set(tablas).union(*(VISTAS_DERIVADAS.get(t, ()) for t in tablas))
+        with self._lock:
+            for clave in [c for c in self._entradas if c[0] in tablas]:
+                del self._entradas[clave]
+            for tabla in tablas:
+                self._invalidaciones[tabla] = self._invalidaciones.get(tabla, 0) + 1
+
+    def parchear(self, tabla: str, fila_id: int, cambios: dict, conservar: callable) -> None:
+        """Aplica ``cambios`` a la fila ``fila_id`` en las entradas guardadas de ``tabla``.
+
+        Solo se modifican las entradas para las que ``conservar(clave)`` es
+        verdadero (listas de filas o ``(filas, total)``); las demás, y las
+        vistas derivadas, se descartan. Las entradas modificadas reciben una
+        versión nueva para que se reconstruya lo que dependa de ella.
+        """
+        with self._lock:
+            for clave in [c for c in self._entradas if c[0] == tabla]:
+                if not conservar(clave):
+                    del self._entradas[clave]
+                    continue
+                datos, instante, _ = self._entradas[clave]
+                filas = datos[0] if isinstance(datos, tuple) else datos
+                for fila in filas:
+                    if fila.get("id") == fila_id:
+                        fila.update(cambios)
+                self._version += 1
+                self._entradas[clave] = (datos, instante, self._version)
+            # Una lectura en curso pudo haber empezado antes del cambio
+            self._invalidaciones[tabla] = self._invalidaciones.get(tabla, 0) + 1
+        self.invalidar(*VISTAS_DERIVADAS.get(tabla, ()))
+
+    def _cargar(self, clave: tuple, cargador: callable) -> tuple:
+        with self._lock:
+            invalidaciones = self._invalidaciones.get(clave[0], 0)
+
+        datos = cargador()
+
+        with self._lock:
+            self._version += 1
+            version = self._version
+            # Si alguien escribió en la tabla mientras leíamos, lo leído ya no
+            # es confiable: se devuelve pero no se guarda.
+            if self._invalidaciones.get(clave[0], 0) == invalidaciones:
+                self._entradas[clave] = (datos, time.monotonic(), version)
+        return datos, version
+
+    def _refrescar_en_segundo_plano(self, clave: tuple, cargador: callable) -> None:
+        with self._lock:
+            if clave in self._refrescando:
+                return
+            self._refrescando.add(clave)
+
+        def tarea():
+            try:
+                self._cargar(clave, cargador)
+            except Exception:
+                # Si Supabase falla seguimos sirviendo la copia anterior.
+                logger.exception("No se pudo refrescar %s", clave)
+            finally:
+                with self._lock:
+                    self._refrescando.discard(clave)
+
+        threading.Thread(target=tarea, daemon=True).start()
+
+
+@st.cache_resource
+def get_cache() -> CacheLibreria:
+    """Devuelve la caché de lecturas, compartida globalmente."""
+    return CacheLibreria()
+
+@st.cache_resource(max_entries=32)
+def _replica_libros(usuario: str) -> ReplicaLibros:
+    # Una réplica por usuario: cada uno sincroniza lo que sus políticas le dejan ver
+    return ReplicaLibros(usuario)
+
+@st.cache_resource
+def _pool_escrituras() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="nbooks-escritura")
+
+
+#================== LECTURAS POR USUARIO =========================
+
+def _repositorio_lectura():
+    """Repositorio de las lecturas: en Supabase, con el cliente del usuario de
+    la sesión (RLS decide qué ve). Si la sesión expiró, lleva al login."""
+    try:
+        return repositorio_de_sesion()
+    except SesionExpirada:
+        st.switch_page("pages/0_login.py")
+
+def _clave(tabla: str, *resto) -> tuple:
+    """Clave de la caché: la tabla (para invalidar), el usuario de la sesión y el resto.
+
+    Las sesiones de un mismo usuario comparten lecturas; las de otro no las ven.
+    """
+    return (tabla, usuario_de_sesion(), *resto)
+
+#================== SNAPSHOT (SOLO LECTURA) =========================
+
+def modo_snapshot() -> bool:
+    """Indica si la app lee de un snapshot Parquet (``snapshot = "<carpeta>"``) en vez del repositorio."""
+    return bool(config("snapshot"))
+
+@st.cache_resource
+def _datos_snapshot(carpeta: str) -> dict:
+    import snapshot  # pyarrow solo se carga si se usa un snapshot
+
+    datos = snapshot.cargar_snapshot(carpeta)
+    preparar_libros(datos["vista_libros"])
+    for tabla in ("vista_libros", "autores", "tipos"):
+        # Mismo orden que las consultas a Supabase: por nombre, nulls al final
+        datos[tabla].sort(key=lambda f: (f.get("nombre") is None, f.get("nombre") or ""))
+    return datos
+
+def _verificar_escritura() -> None:
+    if modo_snapshot():
+        raise RuntimeError("La biblioteca está abierta sobre un snapshot (solo lectura).")
+
+def _cargador_tabla(tabla: str) -> callable:
+    if modo_snapshot():
+        datos = _datos_snapshot(config("snapshot"))
+        return lambda: datos[tabla]
+
+    # El repositorio se resuelve aquí (con contexto de Streamlit) y no dentro
+    # del hilo de refresco.
+    repositorio = _repositorio_lectura()
+    if tabla == "vista_libros" and config("sincronizacion_incremental", False):
+        # Solo viajan los libros cambiados desde la última lectura (sql/007)
+        replica = _replica_libros(usuario_de_sesion())
+        return lambda: replica.sincronizar(repositorio)
+    if tabla == "vista_libros":
+        # Sin la descripción: se pide por libro (obtener_detalle_libro)
+        return lambda: preparar_libros(repositorio.listar_libros(COLUMNAS_LISTADO))
+    return lambda: repositorio.listar(tabla)
+
+#================== LECTURAS =========================
+
+def obtener_libros() -> list:
+    """Devuelve todos los libros de ``vista_libros`` ordenados por nombre (sin la descripción)."""
+    return get_cache().obtener(_clave("vista_libros"), _cargador_tabla("vista_libros"))
+
+def obtener_detalle_libro(libro_id: int) -> dict:
+    """Devuelve lo que no viaja en los listados de un libro (``COLUMNAS_DETALLE``).
+
+    Se pide por id al abrir los detalles y queda en la caché por libro.
+    """
+    if modo_snapshot():
+        libros = _datos_snapshot(config("snapshot"))["vista_libros"]
+        return next((l for l in libros if l["id"] == libro_id), {})
+
+    repositorio = _repositorio_lectura()
+    # Como lista de una fila, igual que las demás entradas: parchear() la mantiene
+    filas = get_cache().obtener(
+        _clave("vista_libros", "detalle", libro_id),
+        lambda: [repositorio.detalle_libro(libro_id) or {"id": libro_id}],
+    )
+    return filas[0]
+
+@st.cache_resource(max_entries=2)
+def _indice_para_version(version: int, _libros: list) -> IndiceCatalogo:
+    return IndiceCatalogo(_libros)
+
+def obtener_indice_catalogo() -> IndiceCatalogo:
+    """Devuelve el índice de búsqueda de la biblioteca, reconstruido solo si cambian los datos."""
+    libros, version = get_cache().obtener_con_version(_clave("vista_libros"), _cargador_tabla("vista_libros"))
+    return _indice_para_version(version, libros)
+
+def obtener_pagina_libros(offset: int, limite: int) -> tuple:
+    """Devuelve ``(libros, total)`` con solo la ventana pedida de ``vista_libros``."""
+    if modo_snapshot():
+        libros = obtener_libros()
+        return libros[offset:offset + limite], len(libros)
+
+    repositorio = _repositorio_lectura()
+
+    def cargar():
+        libros, total = repositorio.pagina_libros(offset, limite)
+        return preparar_libros(libros), total
+
+    return get_cache().obtener(_clave("vista_libros", "pagina", offset, limite), cargar)
+
+#================== FILTROS EN EL SERVIDOR =========================
+
+def obtener_pagina_filtrada(filtros: dict, offset: int, limite: int) -> tuple:
+    """Devuelve ``(libros, total)`` de la ventana pedida, filtrando en la base de datos.
+
+    Todos los filtros se resuelven en el servidor, así que solo viaja la ventana.
+    """
+    repositorio = _repositorio_lectura()
+    clave_filtros = tuple(sorted((k, v) for k, v in filtros.items() if v))
+
+    def cargar():
+        libros, total = repositorio.pagina_filtrada(filtros, offset, limite)
+        return preparar_libros(libros), total
+
+    return get_cache().obtener(_clave("vista_libros", "filtrado", clave_filtros, offset, limite), cargar)
+
+def obtener_busqueda(filtros: dict, offset: int, limite: int) -> tuple:
+    """Devuelve ``(libros, total)`` de la búsqueda de texto completo, los mejores primero.
+
+    Busca en título, autor, tipos y descripción, tolera errores de tipeo y
+    aplica los demás filtros en la base de datos (``buscar_libros`` de sql/008).
+    """
+    repositorio = _repositorio_lectura()
+    clave_filtros = tuple(sorted((k, v) for k, v in filtros.items() if v))
+
+    def cargar():
+        libros, total = repositorio.buscar_libros(filtros, offset, limite)
+        return preparar_libros(libros), total
+
+    return get_cache().obtener(_clave("vista_libros", "busqueda", clave_filtros, offset, limite), cargar)
+
+def obtener_autores() -> list:
+    """Devuelve todos los autores ordenados por nombre."""
+    return get_cache().obtener(_clave("autores"), _cargador_tabla("autores"))
+
+def obtener_tipos() -> list:
+    """Devuelve todos los tipos de novela ordenados por nombre."""
+    return get_cache().obtener(_clave("tipos"), _cargador_tabla("tipos"))
+
+#================== AUTORES =========================
+
+# Órdenes de la página de autores: clave -> (columna, descendente)
+ORDENES_AUTORES = {
+    "nombre": ("nombre", False),
+    "libros": ("libros", True),
+    "leidos": ("leidos", True),
+    "ultima_lectura": ("ultima_lectura", True),
+}
+
+def _pagina_autores_en_memoria(busqueda: str, columna: str, descendente: bool, offset: int, limite: int) -> tuple:
+    conteos = {}
+    for libro in obtener_libros():
+        conteo = conteos.setdefault(libro.get("autor"), {"libros": 0, "leidos": 0, "ultima_lectura": None})
+        conteo["libros"] += 1
+        conteo["leidos"] += libro.get("estado_lectura") == "Leído"
+        if libro.get("fecha_leido"):
+            conteo["ultima_lectura"] = max(conteo["ultima_lectura"] or "", str(libro["fecha_leido"]))
+
+    prefijo = normalizar(busqueda)
+    filas = [
+        {"id": a["id"], "nombre": a["nombre"], **conteos.get(a["nombre"], {"libros": 0, "leidos": 0, "ultima_lectura": None})}
+        for a in obtener_autores() if normalizar(a["nombre"]).startswith(prefijo)
+    ]
+    # Mismo criterio que en el servidor: nulls al final y desempate por nombre
+    con_valor = sorted((f for f in filas if f[columna] is not None), key=lambda f: f[columna], reverse=descendente)
+    filas = con_valor + [f for f in filas if f[columna] is None]
+    return filas[offset:offset + limite], len(filas)
+
+def obtener_pagina_autores(busqueda: str, orden: str, offset: int, limite: int) -> tuple:
+    """Devuelve ``(autores, total)`` con los conteos de libros de cada autor.
+
+    La búsqueda por prefijo (sin tildes ni mayúsculas), el orden
+    (``ORDENES_AUTORES``) y la paginación se resuelven en la base de datos
+    (``vista_autores`` de sql/006 en Supabase).
+    """
+    columna, descendente = ORDENES_AUTORES[orden]
+    busqueda = normalizar(busqueda)
+    if modo_snapshot():
+        return _pagina_autores_en_memoria(busqueda, columna, descendente, offset, limite)
+
+    repositorio = _repositorio_lectura()
+    return get_cache().obtener(
+        _clave("vista_autores", "pagina", busqueda, orden, offset, limite),
+        lambda: repositorio.pagina_autores(busqueda, columna, descendente, offset, limite),
+    )
+
+#================== AUTORES Y TIPOS POR NOMBRE =========================
+
+@st.cache_resource(max_entries=4)
+def _indice_entidades_para_version(tabla: str, version: int, _filas: list) -> IndiceEntidades:
+    return IndiceEntidades(_filas)
+
+def obtener_indice_entidades(tabla: str) -> IndiceEntidades:
+    """Índice nombre -> id de ``autores`` o ``tipos``, reconstruido solo si cambia la tabla."""
+    filas, version = get_cache().obtener_con_version(_clave(tabla), _cargador_tabla(tabla))
+    return _indice_entidades_para_version(tabla, version, filas)
+
+#================== ESTADÍSTICAS =========================
+
+@st.cache_resource(max_entries=2)
+def _estadisticas_para_version(version: int, _libros: list) -> list:
+    return estadisticas.agregar(_libros)
+
+def obtener_estadisticas() -> list:
+    """Devuelve los agregados de la página de Estadísticas (ver ``estadisticas.py``).
+
+    Los calcula la base de datos: en Supabase, ``vista_estadisticas`` de
+    sql/004, mantenida por triggers (unas decenas de filas, sin bajar los
+    libros); en SQLite, una consulta agrupada. Solo un snapshot, que no tiene
+    base de datos, los calcula en memoria una vez por versión de ``vista_libros``.
+    """
+    if modo_snapshot():
+        libros, version = get_cache().obtener_con_version(_clave("vista_libros"), _cargador_tabla("vista_libros"))
+        return _estadisticas_para_version(version, libros)
+
+    repositorio = _repositorio_lectura()
+    # Bajo la clave de vista_libros: se invalida con las mismas escrituras
+    return get_cache().obtener(_clave("vista_libros", "estadisticas"), repositorio.estadisticas)
+
+#================== CALENDARIO =========================
+
+def obtener_lecturas_en_ventana(desde: datetime.date, hasta: datetime.date) -> list:
+    """Libros cuya lectura toca la ventana ``[desde, hasta]`` (ver ``calendario.py``).
+
+    Solo se piden las columnas del calendario y el filtro de fechas corre en
+    la base de datos.
+    """
+    hoy = datetime.date.today()
+    if modo_snapshot():
+        return [l for l in obtener_libros() if calendario.en_ventana(l, desde, hasta, hoy)]
+
+    repositorio = _repositorio_lectura()
+
+    def cargar():
+        filas = repositorio.lecturas_en_ventana(desde, hasta)
+        return [l for l in filas if calendario.en_ventana(l, desde, hasta, hoy)]
+
+    return get_cache().obtener(_clave("vista_libros", "calendario", desde, hasta, hoy), cargar)
+
+#================== ESCRITURAS =========================
+# Cada escritura invalida únicamente las lecturas que dependen de la tabla tocada.
+# Corren con el cliente autenticado de la sesión (ver sesiones.py).
+
+def resolver_entidades(tabla: str, nombres) -> dict:
+    """Devuelve ``{nombre: id}`` de ``autores`` o ``tipos``, creando los que falten.
+
+    Los existentes salen del índice (sin llamadas); los nuevos se crean todos
+    en un solo upsert. Las grafías de un mismo nombre ("García" y "Garcia")
+    reciben el mismo id.
+    """
+    nombres = list(nombres)
+    indice = obtener_indice_entidades(tabla)
+    creados = {}
+    if indice.faltantes(nombres):
+        _verificar_escritura()
+        creados = repositorio_de_sesion().resolver_nombres(tabla, [n for n in nombres if n not in indice])
+        get_cache().invalidar(tabla)
+    return {n: indice.id_de(n) or creados.get(n) for n in nombres}
+
+def _asegurar_entidad(tabla: str, nombre: str) -> dict:
+    existente = obtener_indice_entidades(tabla).fila(nombre)
+    if existente:
+        return existente
+    return {"id": resolver_entidades(tabla, [nombre])[nombre], "nombre": nombre.strip()}
+
+def crear_autor(nombre: str) -> dict:
+    """Devuelve el autor con ese nombre, creándolo solo si no existe."""
+    return _asegurar_entidad("autores", nombre)
+
+def crear_tipo(nombre: str) -> dict:
+    """Devuelve el tipo de novela con ese nombre, creándolo solo si no existe."""
+    return _asegurar_entidad("tipos", nombre)
+
+def actualizar_estado_libro(libro_id: int, nuevo_estado: str) -> None:
+    """Cambia el estado de lectura de un libro."""
+    _verificar_escritura()
+    repositorio_de_sesion().actualizar_libro(libro_id, {"estado_lectura": nuevo_estado})
+    get_cache().invalidar("vista_libros")
+
+def _parcheable(clave: tuple) -> bool:
+    # La lista completa, las páginas sin filtros, las columnas de
+    # Estadísticas y los detalles se pueden corregir en el lugar; las
+    # filtradas y los agregados dependen del estado y se descartan.
+    return len(clave) == 2 or clave[2] in ("pagina", "columnas_estadisticas", "detalle")
+
+def actualizar_estado_optimista(libro: dict, nuevo_estado: str) -> Future:
+    """Cambia el estado de lectura en la caché al instante y lo guarda en segundo plano.
+
+    Devuelve el ``Future`` de la escritura. Si falla, el estado anterior se
+    restaura en la caché y el ``Future`` queda con la excepción.
+    """
+    _verificar_escritura()
+    libro_id, estado_anterior = libro["id"], libro["estado_lectura"]
+    cache = get_cache()
+    repositorio = repositorio_de_sesion()
+    # La fila que tiene la tarjeta puede venir de una entrada que se descarta
+    libro["estado_lectura"] = nuevo_estado
+    cache.parchear("vista_libros", libro_id, {"estado_lectura": nuevo_estado}, conservar=_parcheable)
+
+    def guardar():
+        try:
+            repositorio.actualizar_libro(libro_id, {"estado_lectura": nuevo_estado})
+        except Exception:
+            logger.exception("No se pudo guardar el estado del libro %s", libro_id)
+            libro["estado_lectura"] = estado_anterior
+            cache.parchear("vista_libros", libro_id, {"estado_lectura": estado_anterior}, conservar=_parcheable)
+            raise
+
+    return _pool_escrituras().submit(guardar)
+
+def registrar_libro(datos: dict, tipos_nombres: list) -> dict:
+    """Inserta un libro con sus tipos en una sola llamada y una sola transacción.
+
+    En Supabase usa la función ``registrar_libro`` de
+    sql/002_registrar_libro.sql. Devuelve la fila creada.
+    """
+    _verificar_escritura()
+    libro = repositorio_de_sesion().registrar_libro(datos, tipos_nombres)
+    get_cache().invalidar("vista_libros")
+    return libro
+
+def actualizar_libro(libro_id: int, datos: dict) -> None:
+    """Actualiza las columnas indicadas de un libro."""
+    _verificar_escritura()
+    repositorio_de_sesion().actualizar_libro(libro_id, datos)
+    get_cache().invalidar("vista_libros")
+
+def subir_portada(datos: bytes, nombre_libro: str) -> str:
+    """Genera las versiones de la portada, las guarda y devuelve el ``portada_path``."""
+    _verificar_escritura()
+    return repositorio_de_sesion().subir_portada(datos, nombre_libro)
+
+def importar_libros(filas, al_progresar: callable = None, **opciones) -> dict:
+    """Importa libros en bloque (ver ``importacion.importar``) e invalida la caché."""
+    _verificar_escritura()
+    try:
+        return importacion.importar(repositorio_de_sesion(), filas, al_progresar=al_progresar, **opciones)
+    finally:
+        get_cache().invalidar("vista_libros", "autores", "tipos")
+
+def sincronizar_tipos(libro_id: int, tipos_actuales: list, tipos_seleccionados: list) -> None:
+    """Ajusta los vínculos libro-tipo a la selección tocando solo lo que cambió.
+
+    Hace a lo sumo un borrado en bloque (tipos quitados) y una inserción en
+    bloque (tipos agregados); si la selección no cambió no hace ninguna llamada.
+    """
+    _verificar_escritura()
+    quitados = set(tipos_actuales) - set(tipos_seleccionados)
+    agregados = set(tipos_seleccionados) - set(tipos_actuales)
+    if not quitados and not agregados:
+        return
+
+    indice_tipos = obtener_indice_entidades("tipos")
+    # Un tipo creado en otro proceso se resuelve con el mismo upsert por nombre
+    ids_agregados = resolver_entidades("tipos", agregados)
+
+    repositorio = repositorio_de_sesion()
+    repositorio.desvincular_tipos(libro_id, [i for i in map(indice_tipos.id_de, quitados) if i is not None])
+    repositorio.vincular_tipos([(libro_id, i) for i in ids_agregados.values() if i is not None])
+
+    get_cache().invalidar("vista_libros")